@@ -11,6 +11,7 @@ import dspy
 from .fpl_service import FPLService
 from .ml_service import MLService
 from .models import AnalysisRequest, AnalysisResponse
+from .tracing import trace_methods
 
 # --- DSPy Signatures ---
 
@@ -44,6 +45,7 @@ class FPLTeamAnalysis(dspy.Signature):
 # --- Service ---
 
 
+@trace_methods()
 class AnalysisService:
     def __init__(self):
         self.fpl_service = FPLService()
@@ -93,12 +95,12 @@ class AnalysisService:
                 picks_gw = gw
             picks = await self.fpl_service.get_entry_picks(request.team_id, picks_gw)
 
-        bootstrap = await self.fpl_service.get_bootstrap_static()
-        fixtures = await self.fpl_service.get_fixtures()
+        snapshot = await self.fpl_service.get_bootstrap_snapshot()
+        fixture_index = await self.fpl_service.get_fixture_index()
 
         # 2. Enrich User Squad
-        elements = {p["id"]: p for p in bootstrap["elements"]}
-        teams = {t["id"]: t for t in bootstrap["teams"]}
+        elements = snapshot.elements_by_id
+        teams = snapshot.teams_by_id
 
         current_squad = []
         for pick in picks["picks"]:
@@ -130,23 +132,21 @@ class AnalysisService:
 
         # Filter next 3 GW fixtures
         upcoming_fixtures = []
-        for f in fixtures:
-            # Fixture is a Pydantic model now, use dot notation
-            if f.event and gw <= f.event <= gw + 2:
-                h_team = teams.get(f.team_h)
-                a_team = teams.get(f.team_a)
-
-                h_name = h_team["short_name"] if h_team else "UNK"
-                a_name = a_team["short_name"] if a_team else "UNK"
-
-                upcoming_fixtures.append(
-                    {
-                        "event": f.event,
-                        "match": f"{h_name} vs {a_name}",
-                        "difficulty_h": f.team_h_difficulty,
-                        "difficulty_a": f.team_a_difficulty,
-                    }
-                )
+        for f in fixture_index.for_events(gw, gw + 2):
+            h_team = teams.get(f.team_h)
+            a_team = teams.get(f.team_a)
+
+            h_name = h_team["short_name"] if h_team else "UNK"
+            a_name = a_team["short_name"] if a_team else "UNK"
+
+            upcoming_fixtures.append(
+                {
+                    "event": f.event,
+                    "match": f"{h_name} vs {a_name}",
+                    "difficulty_h": f.team_h_difficulty,
+                    "difficulty_a": f.team_a_difficulty,
+                }
+            )
 
         # Calculate Chip Status (Shared Logic)
         my_team_data = None
@@ -0,0 +1,198 @@
+import asyncio
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any
+
+from loguru import logger
+
+CACHE_BACKEND = os.getenv("FPL_CACHE_BACKEND", "memory")  # "memory" or "sqlite"
+CACHE_DB_PATH = os.getenv("FPL_CACHE_DB_PATH", os.path.join("data", "cache.sqlite3"))
+LEASE_TTL = 30.0  # seconds a refresh lease is held before another worker may take over
+LEASE_POLL_INTERVAL = 0.1
+
+
+class CacheBackend(ABC):
+    """Shared second-level store for cached values, plus per-key refresh leases.
+
+    Values are stored with the time they were fetched, so every worker ages
+    them the same way. A lease marks one worker as the refresher of a key
+    until it is released or ``ttl`` seconds pass; other workers wait for the
+    new value instead of hitting upstream themselves.
+    """
+
+    # Whether other workers can see stored values; callers skip storing into unshared backends
+    shared = True
+
+    @abstractmethod
+    async def get(self, key: str) -> tuple[Any, float] | None:
+        """The stored value and its fetch time, or None."""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, stored_at: float) -> None: ...
+
+    @abstractmethod
+    async def purge(self, prefix: str, stored_before: float) -> None:
+        """Delete values under keys starting with ``prefix`` that were stored before ``stored_before``."""
+
+    @abstractmethod
+    async def acquire_lease(self, key: str, ttl: float = LEASE_TTL) -> bool:
+        """Try to become the refresher of ``key`` for ``ttl`` seconds."""
+
+    @abstractmethod
+    async def release_lease(self, key: str) -> None: ...
+
+
+class MemoryBackend(CacheBackend):
+    """In-process backend: nothing is shared, leases only coordinate tasks of this process.
+
+    Callers keep values in their own bounded caches instead of storing them
+    here, where they would be held outside any memory budget.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self._values: dict[str, tuple[Any, float]] = {}
+        self._leases: dict[str, float] = {}
+
+    async def get(self, key: str) -> tuple[Any, float] | None:
+        return self._values.get(key)
+
+    async def set(self, key: str, value: Any, stored_at: float) -> None:
+        self._values[key] = (value, stored_at)
+
+    async def purge(self, prefix: str, stored_before: float) -> None:
+        for key in [
+            key for key, (_, stored_at) in self._values.items() if key.startswith(prefix) and stored_at < stored_before
+        ]:
+            del self._values[key]
+
+    async def acquire_lease(self, key: str, ttl: float = LEASE_TTL) -> bool:
+        now = time.time()
+        if self._leases.get(key, 0) > now:
+            return False
+        self._leases[key] = now + ttl
+        return True
+
+    async def release_lease(self, key: str) -> None:
+        self._leases.pop(key, None)
+
+
+class SQLiteBackend(CacheBackend):
+    """Backend shared by all workers on one host through a SQLite database in WAL mode.
+
+    WAL lets readers proceed while one worker writes. Values are pickled, so
+    the database file must only be writable by this application. Each
+    instance has its own lease owner id; acquiring a lease is a single
+    conditional upsert, which SQLite applies atomically across processes, and
+    re-acquiring an own lease extends it.
+    """
+
+    def __init__(self, path: str = CACHE_DB_PATH):
+        self.path = path
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        self._conn: sqlite3.Connection | None = None
+        self._conn_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB, stored_at REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT, expires REAL)")
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        # One connection per instance, used from worker threads one statement at a time
+        with self._conn_lock:
+            return self._connect().execute(sql, params)
+
+    def _get(self, key: str) -> tuple[Any, float] | None:
+        with self._conn_lock:
+            row = self._connect().execute("SELECT value, stored_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return pickle.loads(row[0]), row[1]
+        except Exception as e:
+            logger.warning(f"Discarding unreadable shared cache entry {key}: {e}")
+            return None
+
+    def _acquire(self, key: str, ttl: float) -> bool:
+        now = time.time()
+        cursor = self._execute(
+            "INSERT INTO leases (key, owner, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+            "WHERE leases.expires < ? OR leases.owner = excluded.owner",
+            (key, self.owner, now + ttl, now),
+        )
+        return cursor.rowcount == 1
+
+    # A broken shared store degrades to per-worker caching: misses, unshared writes, and
+    # leases that are always granted so no worker waits on a lock it cannot see.
+    async def get(self, key: str) -> tuple[Any, float] | None:
+        try:
+            return await asyncio.to_thread(self._get, key)
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache read of {key} failed: {e}")
+            return None
+
+    async def set(self, key: str, value: Any, stored_at: float) -> None:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            await asyncio.to_thread(
+                self._execute,
+                "INSERT OR REPLACE INTO entries (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, blob, stored_at),
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache write of {key} failed: {e}")
+
+    async def purge(self, prefix: str, stored_before: float) -> None:
+        # Keys are matched by range rather than LIKE so the primary key index is used
+        try:
+            await asyncio.to_thread(
+                self._execute,
+                "DELETE FROM entries WHERE key >= ? AND key < ? AND stored_at < ?",
+                (prefix, prefix + "\U0010ffff", stored_before),
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache purge of {prefix}* failed: {e}")
+
+    async def acquire_lease(self, key: str, ttl: float = LEASE_TTL) -> bool:
+        try:
+            return await asyncio.to_thread(self._acquire, key, ttl)
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache lease on {key} failed, refreshing without one: {e}")
+            return True
+
+    async def release_lease(self, key: str) -> None:
+        try:
+            await asyncio.to_thread(self._execute, "DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache lease release on {key} failed: {e}")
+
+    def close(self) -> None:
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_cache_backend(kind: str = CACHE_BACKEND, path: str = CACHE_DB_PATH) -> CacheBackend:
+    """Backend selected by ``FPL_CACHE_BACKEND``; use "sqlite" when running several workers."""
+    if kind == "sqlite":
+        return SQLiteBackend(path)
+    if kind != "memory":
+        logger.warning(f"Unknown cache backend {kind!r}, using in-process memory")
+    return MemoryBackend()
@@ -0,0 +1,266 @@
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+import polars as pl
+from loguru import logger
+
+MB = 1024 * 1024
+
+# (byte budget, max age in seconds or None) per namespace; keys are routed by the prefix before ":"
+CACHE_NAMESPACES: dict[str, tuple[int, float | None]] = {
+    "core": (128 * MB, None),  # bootstrap and fixtures snapshots
+    "gw_payload": (64 * MB, 3600),  # per-gameweek payloads of gameweeks still in play
+    "polymarket": (16 * MB, 3600),
+    "history": (256 * MB, None),  # past-season frames, refetched or re-read from the shared backend
+    "immutable": (128 * MB, None),  # memory tier of final gameweek payloads, also kept on disk
+}
+DEFAULT_NAMESPACE = "core"
+DECODED_JSON_FACTOR = 3  # decoded JSON takes roughly this many times its body size in memory
+
+
+def _budget_overrides() -> dict[str, int]:
+    """``FPL_CACHE_BUDGETS_MB="history=128,gw_payload=32"`` overrides namespace budgets."""
+    overrides = {}
+    for item in filter(None, os.getenv("FPL_CACHE_BUDGETS_MB", "").split(",")):
+        name, _, mb = item.partition("=")
+        try:
+            overrides[name.strip()] = int(float(mb) * MB)
+        except ValueError:
+            logger.warning(f"Ignoring invalid cache budget {item!r}")
+    return overrides
+
+
+def estimate_size(obj: Any) -> int:
+    """Approximate deep size of ``obj`` in bytes, counting shared objects once.
+
+    Containers, dataclasses (including slotted ones) and pydantic models are
+    walked; DataFrames and arrays report their buffer sizes.
+    """
+    seen: set[int] = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        if isinstance(o, pl.DataFrame):
+            total += o.estimated_size()
+            continue
+        if isinstance(o, np.ndarray):
+            total += o.nbytes
+            continue
+        total += sys.getsizeof(o)
+        if isinstance(o, (str, bytes, int, float, bool)) or o is None:
+            continue
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        else:
+            if hasattr(o, "__dict__"):
+                stack.append(vars(o))
+            for cls in type(o).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    if hasattr(o, slot):
+                        stack.append(getattr(o, slot))
+    return total
+
+
+class _Entry:
+    __slots__ = ("size", "stored_at", "value")
+
+    def __init__(self, value: Any, size: int, stored_at: float):
+        self.value = value
+        self.size = size
+        self.stored_at = stored_at
+
+
+class CacheNamespace:
+    """LRU cache with a byte budget and an optional maximum age.
+
+    Each entry's size is given or estimated once when it is stored. Storing beyond
+    ``max_bytes`` evicts least recently used entries first; entries older than
+    ``max_age`` are dropped when read or swept. ``get`` counts hits and misses.
+    """
+
+    def __init__(self, name: str, max_bytes: int, max_age: float | None = None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.bytes = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return self.max_age is not None and now - entry.stored_at >= self.max_age
+
+    def _remove(self, key: str) -> None:
+        self.bytes -= self._entries.pop(key).size
+
+    def get(self, key: str, default: Any = None, max_age: float | None = None) -> Any:
+        """The value for ``key``; an entry older than ``max_age`` is kept but reported as a miss."""
+        entry = self._entries.get(key)
+        now = time.time()
+        if entry is not None and self._expired(entry, now):
+            self._remove(key)
+            self._counters["expirations"] += 1
+            entry = None
+        if entry is None or (max_age is not None and now - entry.stored_at >= max_age):
+            self._counters["misses"] += 1
+            return default
+        self._counters["hits"] += 1
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def set(self, key: str, value: Any, stored_at: float | None = None, size: int | None = None) -> None:
+        """Store ``value``; pass ``size`` when it is already known, since walking a large value blocks."""
+        stored_at = time.time() if stored_at is None else stored_at
+        previous = self._entries.get(key)
+        if previous is not None and previous.value is value:
+            # Revalidated values are often the very same object: keep its size instead of re-walking it
+            size = previous.size
+        elif size is None:
+            size = estimate_size(value)
+        if previous is not None:
+            self._remove(key)
+        self._entries[key] = _Entry(value, size, stored_at)
+        self.bytes += size
+
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            evicted = next(iter(self._entries))
+            if evicted == key:
+                break
+            self._remove(evicted)
+            self._counters["evictions"] += 1
+        if size > self.max_bytes:
+            logger.warning(f"Cache entry {key} ({size} bytes) exceeds the {self.name} budget of {self.max_bytes}")
+
+    def stored_at(self, key: str) -> float | None:
+        entry = self._entries.get(key)
+        return entry.stored_at if entry is not None else None
+
+    def set_stored_at(self, key: str, stored_at: float) -> None:
+        self._entries[key].stored_at = stored_at
+
+    def pop(self, key: str) -> Any:
+        value = self._entries[key].value
+        self._remove(key)
+        return value
+
+    def sweep(self, now: float | None = None) -> int:
+        """Drop every entry past ``max_age``; returns how many were dropped."""
+        now = time.time() if now is None else now
+        expired = [key for key, entry in self._entries.items() if self._expired(entry, now)]
+        for key in expired:
+            self._remove(key)
+        self._counters["expirations"] += len(expired)
+        return len(expired)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def keys(self) -> list[str]:
+        return list(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __getitem__(self, key: str) -> Any:
+        return self._entries[key].value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.set(key, value)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "max_age": self.max_age,
+            **self._counters,
+            "hit_rate": round(self._counters["hits"] / lookups, 3) if lookups else None,
+        }
+
+
+class CacheManager:
+    """Namespaced in-process caches, addressed by key.
+
+    A key goes to the namespace named by its prefix before ":" (e.g.
+    ``gw_payload:event/3/live/``), or to the default namespace. Every namespace
+    has its own byte budget and maximum age, so one kind of data cannot push
+    out another or grow the process without bound.
+    """
+
+    def __init__(
+        self,
+        namespaces: dict[str, tuple[int, float | None]] | None = None,
+        default: str = DEFAULT_NAMESPACE,
+    ):
+        namespaces = CACHE_NAMESPACES if namespaces is None else namespaces
+        overrides = _budget_overrides()
+        self.default = default
+        self.namespaces = {
+            name: CacheNamespace(name, overrides.get(name, max_bytes), max_age)
+            for name, (max_bytes, max_age) in namespaces.items()
+        }
+
+    def namespace(self, name: str) -> CacheNamespace:
+        return self.namespaces[name]
+
+    def _route(self, key: str) -> CacheNamespace:
+        prefix, sep, _ = key.partition(":")
+        if sep and prefix in self.namespaces:
+            return self.namespaces[prefix]
+        return self.namespaces[self.default]
+
+    def get(self, key: str, default: Any = None, max_age: float | None = None) -> Any:
+        return self._route(key).get(key, default, max_age)
+
+    def set(self, key: str, value: Any, stored_at: float | None = None, size: int | None = None) -> None:
+        self._route(key).set(key, value, stored_at, size)
+
+    def stored_at(self, key: str) -> float | None:
+        return self._route(key).stored_at(key)
+
+    def set_stored_at(self, key: str, stored_at: float) -> None:
+        self._route(key).set_stored_at(key, stored_at)
+
+    def pop(self, key: str) -> Any:
+        return self._route(key).pop(key)
+
+    def sweep(self) -> int:
+        now = time.time()
+        return sum(ns.sweep(now) for ns in self.namespaces.values())
+
+    def clear(self, namespace: str | None = None) -> None:
+        for name, ns in self.namespaces.items():
+            if namespace is None or name == namespace:
+                ns.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._route(key)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._route(key)[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.set(key, value)
+
+    def stats(self) -> dict[str, Any]:
+        namespaces = {name: ns.stats() for name, ns in self.namespaces.items()}
+        return {
+            "entries": sum(ns["entries"] for ns in namespaces.values()),
+            "bytes": sum(ns["bytes"] for ns in namespaces.values()),
+            "namespaces": namespaces,
+        }
@@ -18,9 +18,9 @@ class FormService:
         """
         Analyzes all players to find those in 'good form' and classifies the sustainability of that form.
         """
-        bootstrap = await self.fpl_service.get_bootstrap_static()
-        elements = bootstrap["elements"]
-        teams = {t["id"]: t for t in bootstrap["teams"]}
+        snapshot = await self.fpl_service.get_bootstrap_snapshot()
+        elements = snapshot.elements
+        teams = snapshot.teams_by_id
 
         # Filter for "In Form" players
         # Criteria: 'form' > 3.0 (FPL metric) OR Total Points > 50 (top performers)
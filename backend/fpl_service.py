@@ -1,15 +1,38 @@
 import asyncio
+import functools
+import hashlib
 import time
-from collections import Counter
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from typing import Any
 
 import httpx
-import pulp
+import numpy as np
 from loguru import logger
 from pydantic import ValidationError
 
+from .cache_backend import LEASE_POLL_INTERVAL, create_cache_backend
+from .cache_manager import DECODED_JSON_FACTOR, CacheManager, estimate_size
+from .immutable_cache import ImmutableCache
+from .metrics import UPSTREAM_EVENT_HOOKS
 from .models import Fixture, Team
+from .points_cube import APPEARANCES, POINTS, PointsCube
+from .singleflight import SingleFlight
+from .snapshots import BootstrapSnapshot, FixtureIndex
+from .solver import SOLVER_GAP_REL, SOLVER_TIME_LIMIT, SolverPool
 from .team_details import NAME_TO_FULL_NAME, TEAM_MAPPINGS
+from .top_managers import (
+    TOP_MANAGER_REQUEST_RATE,
+    OwnershipMatrix,
+    RateLimiter,
+    TopManagerStore,
+    collect_picks,
+    collect_sample,
+    transfer_trends,
+)
+from .tracing import UPSTREAM_TRACE_HOOKS, trace_methods
+from .ttl_scheduler import TTLScheduler
 
 FPL_BASE_URL = "https://fantasy.premierleague.com/api"
 
@@ -23,12 +46,39 @@ PINGONE_SCOPE = "openid profile offline_access p1:update:user p1:read:device p1:
 CHIP_RESET_GW = 20
 MAX_FREE_TRANSFERS = 5
 AFCON_TOPUP_GW = 15
-STANDINGS_PAGE_SIZE = 50
 TOP_MANAGERS_CACHE_TTL = 3600  # 1 hour
 POLYMARKET_CACHE_TTL = 600  # 10 minutes
 BOOTSTRAP_CACHE_TTL = 300  # 5 minutes
+LIVE_GAMEWEEK_CACHE_TTL = 30  # 30 seconds
+MAX_STALENESS = 3600  # 1 hour: stale values older than this are never served
+REFRESH_LOOP_INTERVAL = 15  # seconds between proactive refresh checks
+REFRESH_AHEAD_FACTOR = 0.8  # proactively refresh once 80% of the TTL has elapsed
 OVERALL_LEAGUE_ID = 314
 
+# Upstream body bytes read by the current loader, used as its value's cache size
+_body_bytes: ContextVar[list[int] | None] = ContextVar("body_bytes", default=None)
+
+
+@contextmanager
+def _count_body_bytes() -> Iterator[list[int]]:
+    counter = [0]
+    token = _body_bytes.set(counter)
+    try:
+        yield counter
+    finally:
+        _body_bytes.reset(token)
+
+
+def _record_body(response: httpx.Response) -> None:
+    counter = _body_bytes.get()
+    if counter is not None:
+        counter[0] += len(response.content)
+
+
+def _decoded_size(counter: list[int]) -> int | None:
+    """Cache size for a value decoded from ``counter`` body bytes; None (estimate it) when nothing was read."""
+    return counter[0] * DECODED_JSON_FACTOR or None
+
 
 def calculate_match_result(home_score: int, away_score: int, is_home: bool) -> str:
     """Determine W/D/L from the perspective of the given team."""
@@ -45,13 +95,40 @@ def calculate_match_result(home_score: int, away_score: int, is_home: bool) -> s
     return "D"
 
 
+@trace_methods()
 class FPLService:
-    # Class-level cache to persist across request instances
-    _cache: dict[str, Any] = {}
-    _last_updated: dict[str, float] = {}
-    _cache_lock = asyncio.Lock()
-    CACHE_TTL = BOOTSTRAP_CACHE_TTL
+    # Class-level cache to persist across request instances, with per-namespace byte budgets
+    _cache = CacheManager()
+    # Second level shared between workers (FPL_CACHE_BACKEND), with refresh leases
+    _backend = create_cache_backend()
+    # Per-key refresh locks and background refresh tasks (stale-while-revalidate)
+    _key_locks: dict[str, asyncio.Lock] = {}
+    _refresh_tasks: dict[str, asyncio.Task] = {}
+    # Calendar-aware TTLs; the constants apply until deadlines and kickoffs are known
+    _ttl_scheduler = TTLScheduler(
+        defaults={
+            "bootstrap": BOOTSTRAP_CACHE_TTL,
+            "fixtures": BOOTSTRAP_CACHE_TTL,
+            "live_gameweek": LIVE_GAMEWEEK_CACHE_TTL,
+            "polymarket": POLYMARKET_CACHE_TTL,
+            "top_managers": TOP_MANAGERS_CACHE_TTL,
+        }
+    )
     _http_client: httpx.AsyncClient | None = None
+    # Per-URL validators (ETag / Last-Modified / body hash) for conditional requests
+    _validators: dict[str, dict[str, str | None]] = {}
+    # Shared upstream requests for uncached endpoints, keyed by URL
+    _inflight = SingleFlight()
+    # Permanent tier for per-gameweek payloads once the gameweek is final
+    _immutable = ImmutableCache(memory=_cache.namespace("immutable"))
+    # Process pool for MILP solves, so CBC never blocks the event loop
+    _solver_pool = SolverPool()
+    # Per-gameweek points and stats with prefix sums, for arbitrary range queries
+    _points_cube = PointsCube()
+    # Top-manager standings pages and picks per gameweek, grown incrementally
+    _top_managers = TopManagerStore()
+    # Shared pace for standings and picks requests across concurrent collections
+    _top_manager_limiter = RateLimiter(TOP_MANAGER_REQUEST_RATE)
 
     @classmethod
     def _get_client(cls) -> httpx.AsyncClient:
@@ -60,9 +137,198 @@ class FPLService:
             cls._http_client = httpx.AsyncClient(
                 timeout=httpx.Timeout(30.0),
                 limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                event_hooks={
+                    event: UPSTREAM_EVENT_HOOKS[event] + UPSTREAM_TRACE_HOOKS[event] for event in UPSTREAM_EVENT_HOOKS
+                },
             )
         return cls._http_client
 
+    @classmethod
+    async def close_client(cls) -> None:
+        """Close the shared httpx client and its pooled connections."""
+        if cls._http_client is not None:
+            await cls._http_client.aclose()
+            cls._http_client = None
+
+    @classmethod
+    def _lock_for(cls, key: str) -> asyncio.Lock:
+        lock = cls._key_locks.get(key)
+        if lock is None:
+            lock = cls._key_locks[key] = asyncio.Lock()
+        return lock
+
+    def _ttl_for(self, resource: str, key: str | None = None) -> float:
+        """Calendar-aware TTL for a cache entry, measured from when it was stored."""
+        return self._ttl_scheduler.ttl(resource, since=self._cache.stored_at(key or resource))
+
+    def _is_fresh(self, key: str, ttl: float) -> bool:
+        stored_at = self._cache.stored_at(key)
+        return stored_at is not None and (time.time() - stored_at) < ttl
+
+    async def _get_cached(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float,
+        max_staleness: float = MAX_STALENESS,
+    ) -> Any:
+        """Return the cached value for ``key`` with stale-while-revalidate semantics.
+
+        Fresh values are returned directly. Values past ``ttl`` but younger than
+        ``max_staleness`` are returned immediately while a single background task
+        refreshes them. Missing or too-stale values are loaded inline, under a
+        lock scoped to this key only, so a slow refresh never blocks other keys.
+        Before loading, the shared backend is checked for a copy another worker
+        fetched.
+        """
+        value = self._cache.get(key)
+        if value is not None:
+            age = time.time() - self._cache.stored_at(key)
+            if age < ttl:
+                return value
+            if age < max_staleness:
+                self._schedule_refresh(key, loader, ttl)
+                return value
+
+        async with self._lock_for(key):
+            # Another caller or worker may have refreshed it while we were waiting
+            if self._is_fresh(key, ttl) or await self._adopt_shared(key, ttl):
+                return self._cache[key]
+            return await self._refresh(key, loader)
+
+    async def _adopt(self, key: str, value: Any, stored_at: float) -> None:
+        # No response body to size it by; walk the unpickled value off the event loop
+        size = await asyncio.to_thread(estimate_size, value)
+        self._cache.set(key, value, stored_at, size)
+        # Deadlines and kickoffs are normally set by the loaders, which this worker skipped
+        if key == "bootstrap":
+            self._ttl_scheduler.set_deadlines(value.events)
+        elif key == "fixtures":
+            self._ttl_scheduler.set_kickoffs([f.kickoff_time for f in value.fixtures])
+
+    async def _adopt_shared(self, key: str, ttl: float) -> bool:
+        """Take the backend's copy of ``key`` if it is newer than ours and younger than ``ttl``."""
+        if not self._backend.shared:
+            return False
+        stored = await self._backend.get(key)
+        if stored is None:
+            return False
+        value, stored_at = stored
+        if stored_at <= (self._cache.stored_at(key) or 0) or time.time() - stored_at >= ttl:
+            return False
+        await self._adopt(key, value, stored_at)
+        return True
+
+    async def _refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Load ``key`` as the only worker doing so, publishing the result to the backend."""
+        since = self._cache.stored_at(key) or 0
+        while not await self._backend.acquire_lease(key):
+            # Another worker is refreshing: take its value, or take over once its lease expires
+            await asyncio.sleep(LEASE_POLL_INTERVAL)
+            stored = await self._backend.get(key)
+            if stored is not None and stored[1] > since:
+                await self._adopt(key, *stored)
+                return stored[0]
+        try:
+            with _count_body_bytes() as body:
+                value = await loader()
+            stored_at = time.time()
+            self._cache.set(key, value, stored_at, _decoded_size(body))
+            if self._backend.shared:
+                await self._backend.set(key, value, stored_at)
+        finally:
+            await self._backend.release_lease(key)
+        return value
+
+    def _schedule_refresh(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: float) -> None:
+        task = self._refresh_tasks.get(key)
+        if task is not None and not task.done():
+            return
+
+        async def run():
+            async with self._lock_for(key):
+                try:
+                    if self._is_fresh(key, ttl) or await self._adopt_shared(key, ttl):
+                        return
+                    await self._refresh(key, loader)
+                except Exception as e:
+                    logger.warning(f"Background refresh of {key} failed, serving stale data: {e}")
+
+        self._refresh_tasks[key] = asyncio.create_task(run())
+
+    async def _conditional_get_json(self, url: str, revalidate: bool = True) -> Any | None:
+        """GET a JSON resource, revalidating against the last response seen for this URL.
+
+        Sends If-None-Match / If-Modified-Since when validators are known and
+        ``revalidate`` is set. Returns None when upstream answers 304 or the body
+        hashes to the same digest as before, so callers can keep their cached,
+        already-parsed value instead of decoding the payload again.
+        """
+        validators = self._validators.get(url, {}) if revalidate else {}
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        client = self._get_client()
+        response = await client.get(url, headers=headers)
+        if response.status_code == 304 and revalidate:
+            return None
+        response.raise_for_status()
+
+        digest = hashlib.sha256(response.content).hexdigest()
+        unchanged = revalidate and digest == validators.get("hash")
+        self._validators[url] = {
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "hash": digest,
+        }
+        if unchanged:
+            return None
+        _record_body(response)
+        return response.json()
+
+    async def _get_json(self, url: str) -> Any:
+        """GET a JSON resource, sharing one upstream request between concurrent callers.
+
+        Only the HTTP round-trip is shared; each caller decodes its own copy of
+        the body, so callers are free to enrich the result in place.
+        """
+        response = await self._inflight.do(url, lambda: self._get_client().get(url))
+        response.raise_for_status()
+        _record_body(response)
+        return response.json()
+
+    async def _is_gameweek_final(self, gw: int) -> bool:
+        snapshot = await self.get_bootstrap_snapshot()
+        return snapshot.is_gameweek_final(gw)
+
+    async def _get_gameweek_json(self, path: str, gw: int) -> Any:
+        """Fetch a per-gameweek payload, served from the immutable tier once the gameweek is final.
+
+        Gameweeks that are still in play are cached for the short "live_gameweek" TTL only.
+        The returned object is shared across requests and must not be mutated.
+        """
+        if await self._is_gameweek_final(gw):
+            data = await self._immutable.get(path)
+            if data is None:
+                with _count_body_bytes() as body:
+                    data = await self._get_json(f"{FPL_BASE_URL}/{path}")
+                await self._immutable.put(path, data, _decoded_size(body))
+            return data
+
+        cache_key = f"gw_payload:{path}"
+        now = time.time()
+        cached = self._cache.get(cache_key, max_age=self._ttl_for("live_gameweek", cache_key))
+        if cached is not None:
+            return cached
+
+        with _count_body_bytes() as body:
+            data = await self._get_json(f"{FPL_BASE_URL}/{path}")
+        self._cache.set(cache_key, data, now, _decoded_size(body))
+        return data
+
     @staticmethod
     def get_authorize_url() -> str:
         """Returns the PingOne OAuth authorize URL for FPL login.
@@ -125,41 +391,36 @@ class FPLService:
         return response.json()
 
     async def get_bootstrap_static(self) -> dict[str, Any]:
-        async with self._cache_lock:
-            now = time.time()
-            if "bootstrap" in self._cache and (now - self._last_updated.get("bootstrap", 0)) < self.CACHE_TTL:
-                return self._cache["bootstrap"]
+        snapshot = await self.get_bootstrap_snapshot()
+        return snapshot.raw
 
-            client = self._get_client()
-            response = await client.get(f"{FPL_BASE_URL}/bootstrap-static/")
-            response.raise_for_status()
-            data = response.json()
+    async def get_bootstrap_snapshot(self) -> BootstrapSnapshot:
+        """Bootstrap-static with its lookup indexes, built once per upstream change."""
+        return await self._get_cached("bootstrap", self._load_bootstrap, self._ttl_for("bootstrap"))
 
-            # Populate full_name from overrides
-            for team in data.get("teams", []):
-                team["full_name"] = NAME_TO_FULL_NAME.get(team["name"], team["name"])
+    async def _load_bootstrap(self) -> BootstrapSnapshot:
+        data = await self._conditional_get_json(
+            f"{FPL_BASE_URL}/bootstrap-static/", revalidate="bootstrap" in self._cache
+        )
+        if data is None:
+            # Not modified upstream: keep the existing snapshot, the caller just extends its TTL
+            return self._cache["bootstrap"]
 
-            self._cache["bootstrap"] = data
-            self._last_updated["bootstrap"] = now
-            return data
+        # Populate full_name from overrides
+        for team in data.get("teams", []):
+            team["full_name"] = NAME_TO_FULL_NAME.get(team["name"], team["name"])
+
+        self._ttl_scheduler.set_deadlines(data.get("events", []))
+        return BootstrapSnapshot.from_bootstrap(data)
 
     async def get_entry_history(self, team_id: int) -> dict[str, Any]:
-        client = self._get_client()
-        response = await client.get(f"{FPL_BASE_URL}/entry/{team_id}/history/")
-        response.raise_for_status()
-        return response.json()
+        return await self._get_json(f"{FPL_BASE_URL}/entry/{team_id}/history/")
 
     async def get_entry_picks(self, team_id: int, gw: int) -> dict[str, Any]:
-        client = self._get_client()
-        response = await client.get(f"{FPL_BASE_URL}/entry/{team_id}/event/{gw}/picks/")
-        response.raise_for_status()
-        return response.json()
+        return await self._get_gameweek_json(f"entry/{team_id}/event/{gw}/picks/", gw)
 
     async def get_transfers(self, team_id: int) -> list:
-        client = self._get_client()
-        response = await client.get(f"{FPL_BASE_URL}/entry/{team_id}/transfers/")
-        response.raise_for_status()
-        return response.json()
+        return await self._get_json(f"{FPL_BASE_URL}/entry/{team_id}/transfers/")
 
     async def get_me(self, auth_token: str) -> dict[str, Any]:
         headers = {
@@ -202,22 +463,18 @@ class FPLService:
         return response.json()
 
     async def get_entry(self, team_id: int) -> dict[str, Any]:
-        client = self._get_client()
-        response = await client.get(f"{FPL_BASE_URL}/entry/{team_id}/")
-        response.raise_for_status()
-        return response.json()
+        return await self._get_json(f"{FPL_BASE_URL}/entry/{team_id}/")
 
     async def get_event_live(self, gw: int) -> dict[str, Any]:
-        client = self._get_client()
-        response = await client.get(f"{FPL_BASE_URL}/event/{gw}/live/")
-        response.raise_for_status()
-        return response.json()
+        return await self._get_gameweek_json(f"event/{gw}/live/", gw)
 
     async def get_enriched_squad(
         self, team_id: int, gw: int | None = None, auth_token: str | None = None
     ) -> dict[str, Any]:
         logger.debug(f"get_enriched_squad called for team {team_id} with gw={gw} auth={bool(auth_token)}")
-        bootstrap = await self.get_bootstrap_static()
+        snapshot = await self.get_bootstrap_snapshot()
+        elements = snapshot.elements_by_id
+        teams = snapshot.teams_by_id
 
         # Determine Gameweek
         gw_status = await self.get_gameweek_status()
@@ -225,7 +482,7 @@ class FPLService:
         default_gw = gw_status["id"]
 
         # But we also need the strict 'current' gameweek for data fetching logic
-        current_gw = await self.get_current_gameweek()
+        current_gw = snapshot.current_gameweek
 
         resolved_gw: int = default_gw if gw is None else int(gw)
 
@@ -235,59 +492,80 @@ class FPLService:
         if resolved_gw > current_gw:
             target_fixture_gw = resolved_gw
 
-        try:
-            entry = await self.get_entry(team_id)
-            if entry.get("favourite_team"):
-                fav_team_id = entry["favourite_team"]
-                teams = {t["id"]: t for t in bootstrap["teams"]}
-                if fav_team_id in teams:
-                    entry["favourite_team_code"] = teams[fav_team_id]["code"]
-                    entry["favourite_team_name"] = teams[fav_team_id]["name"]
-        except httpx.HTTPStatusError as e:
-            logger.warning(f"Failed to fetch entry for team {team_id}: {e}")
-            entry = {}
-        except httpx.RequestError as e:
-            logger.warning(f"Network error fetching entry for team {team_id}: {e}")
-            entry = {}
-
-        try:
-            history = await self.get_entry_history(team_id)
-        except (httpx.HTTPStatusError, httpx.RequestError) as e:
-            logger.warning(f"Failed to fetch history for team {team_id}: {e}")
-            history = {"chips": [], "current": []}
-
         picks_gw = resolved_gw
         if resolved_gw > current_gw:
             picks_gw = current_gw
 
-        picks = None
-        my_team_data = None
+        # Each upstream branch is independent once the gameweek is resolved, so they are
+        # fetched concurrently; every branch keeps its own fallback and cannot fail the others.
+        async def fetch_entry() -> dict[str, Any]:
+            try:
+                return await self.get_entry(team_id)
+            except httpx.HTTPStatusError as e:
+                logger.warning(f"Failed to fetch entry for team {team_id}: {e}")
+            except httpx.RequestError as e:
+                logger.warning(f"Network error fetching entry for team {team_id}: {e}")
+            return {}
 
-        if auth_token:
+        async def fetch_history() -> dict[str, Any]:
             try:
-                my_team_data = await self.get_my_team(team_id, auth_token)
-                picks = my_team_data
-                # If using auth token, we are likely looking at the most up to date team (possibly next GW)
-                # But we keep gw as requested or default current
+                return await self.get_entry_history(team_id)
             except (httpx.HTTPStatusError, httpx.RequestError) as e:
-                logger.debug(f"Failed to fetch my team with token: {e}")
+                logger.warning(f"Failed to fetch history for team {team_id}: {e}")
+                return {"chips": [], "current": []}
 
-        if not picks:
+        async def fetch_picks() -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
+            if auth_token:
+                try:
+                    # If using auth token, we are likely looking at the most up to date team (possibly next GW)
+                    # But we keep gw as requested or default current
+                    my_team = await self.get_my_team(team_id, auth_token)
+                    if my_team:
+                        return my_team, my_team
+                except (httpx.HTTPStatusError, httpx.RequestError) as e:
+                    logger.debug(f"Failed to fetch my team with token: {e}")
             try:
-                picks = await self.get_entry_picks(team_id, picks_gw)
+                return await self.get_entry_picks(team_id, picks_gw), None
             except (httpx.HTTPStatusError, httpx.RequestError) as e:
                 logger.warning(f"Failed to fetch picks for team {team_id} GW{picks_gw}: {e}")
-                return {"squad": [], "chips": [], "entry": entry}
+                return None, None
 
-        logger.info(f"gw={resolved_gw} picks_count={len(picks.get('picks', []))}")
-        try:
-            all_transfers = await self.get_transfers(team_id)
-        except (httpx.HTTPStatusError, httpx.RequestError) as e:
-            logger.warning(f"Failed to fetch transfers for team {team_id}: {e}")
-            all_transfers = []
+        async def fetch_transfers() -> list[dict[str, Any]]:
+            try:
+                return await self.get_transfers(team_id)
+            except (httpx.HTTPStatusError, httpx.RequestError) as e:
+                logger.warning(f"Failed to fetch transfers for team {team_id}: {e}")
+                return []
+
+        async def fetch_live_elements() -> dict[int, dict[str, Any]]:
+            try:
+                live_data = await self.get_event_live(resolved_gw)
+                live = {e["id"]: e["stats"] for e in live_data["elements"]}
+                logger.debug(f"Fetched live data for GW{resolved_gw}, {len(live)} elements found.")
+                return live
+            except (httpx.HTTPStatusError, httpx.RequestError) as e:
+                logger.debug(f"Failed to fetch live data for GW{resolved_gw}: {e}")
+                return {}
+
+        entry, history, (picks, my_team_data), all_transfers, fixture_index, live_elements = await asyncio.gather(
+            fetch_entry(),
+            fetch_history(),
+            fetch_picks(),
+            fetch_transfers(),
+            self.get_fixture_index(),
+            fetch_live_elements(),
+        )
+
+        if entry.get("favourite_team"):
+            fav_team_id = entry["favourite_team"]
+            if fav_team_id in teams:
+                entry["favourite_team_code"] = teams[fav_team_id]["code"]
+                entry["favourite_team_name"] = teams[fav_team_id]["name"]
 
-        elements = {p["id"]: p for p in bootstrap["elements"]}
-        teams = {t["id"]: t for t in bootstrap["teams"]}
+        if not picks:
+            return {"squad": [], "chips": [], "entry": entry}
+
+        logger.info(f"gw={resolved_gw} picks_count={len(picks.get('picks', []))}")
 
         # Filter transfers for this specific GW and enrich them
         gw_transfers = []
@@ -307,38 +585,27 @@ class FPLService:
                     }
                 )
 
-        # Fetch fixtures for next GW to show in 'Fix' column
-        fixtures = await self.get_fixtures()
+        # Fixtures for the target GW to show in 'Fix' column
         team_next_fixture = {}
-        for f in fixtures:
-            if f.event == target_fixture_gw:
-                # Home team
-                team_next_fixture[f.team_h] = {
-                    "opponent_id": f.team_a,
-                    "is_home": True,
-                    "difficulty": f.team_h_difficulty,
-                    "started": f.started,
-                    "finished": f.finished,
-                    "kickoff_time": f.kickoff_time,
-                }
-                # Away team
-                team_next_fixture[f.team_a] = {
-                    "opponent_id": f.team_h,
-                    "is_home": False,
-                    "difficulty": f.team_a_difficulty,
-                    "started": f.started,
-                    "finished": f.finished,
-                    "kickoff_time": f.kickoff_time,
-                }
-
-        # Fetch live data for points
-        try:
-            live_data = await self.get_event_live(resolved_gw)
-            live_elements = {e["id"]: e["stats"] for e in live_data["elements"]}
-            logger.debug(f"Fetched live data for GW{resolved_gw}, {len(live_elements)} elements found.")
-        except (httpx.HTTPStatusError, httpx.RequestError) as e:
-            logger.debug(f"Failed to fetch live data for GW{resolved_gw}: {e}")
-            live_elements = {}
+        for f in fixture_index.for_event(target_fixture_gw):
+            # Home team
+            team_next_fixture[f.team_h] = {
+                "opponent_id": f.team_a,
+                "is_home": True,
+                "difficulty": f.team_h_difficulty,
+                "started": f.started,
+                "finished": f.finished,
+                "kickoff_time": f.kickoff_time,
+            }
+            # Away team
+            team_next_fixture[f.team_a] = {
+                "opponent_id": f.team_h,
+                "is_home": False,
+                "difficulty": f.team_a_difficulty,
+                "started": f.started,
+                "finished": f.finished,
+                "kickoff_time": f.kickoff_time,
+            }
 
         squad = []
         logger.debug(f"Processing {len(picks['picks'])} picks for GW{resolved_gw}")
@@ -649,31 +916,74 @@ class FPLService:
         return ft
 
     async def get_fixtures(self) -> list[Fixture]:
-        async with self._cache_lock:
-            now = time.time()
-            if "fixtures" in self._cache and (now - self._last_updated.get("fixtures", 0)) < self.CACHE_TTL:
-                return self._cache["fixtures"]
+        # A fresh list: callers may sort or filter it without touching the shared index
+        index = await self.get_fixture_index()
+        return list(index.fixtures)
+
+    async def get_fixture_index(self) -> FixtureIndex:
+        """All fixtures indexed by event, team and (event, team), built once per upstream change."""
+        return await self._get_cached("fixtures", self._load_fixtures, self._ttl_for("fixtures"))
+
+    async def _load_fixtures(self) -> FixtureIndex:
+        data = await self._conditional_get_json(f"{FPL_BASE_URL}/fixtures/", revalidate="fixtures" in self._cache)
+        if data is None:
+            return self._cache["fixtures"]
+
+        # Parse into models
+        fixtures = []
+        for f in data:
+            try:
+                fixtures.append(Fixture(**f))
+            except ValidationError:
+                logger.warning(f"Failed parsing fixture: {f}")
 
-            client = self._get_client()
-            response = await client.get(f"{FPL_BASE_URL}/fixtures/")
-            response.raise_for_status()
-            data = response.json()
+        self._ttl_scheduler.set_kickoffs([f.kickoff_time for f in fixtures])
+        return FixtureIndex.from_fixtures(fixtures)
 
-            # Parse into models
-            fixtures = []
-            for f in data:
-                try:
-                    fixtures.append(Fixture(**f))
-                except ValidationError:
-                    logger.warning(f"Failed parsing fixture: {f}")
+    async def run_refresh_loop(self, interval: float = REFRESH_LOOP_INTERVAL) -> None:
+        """Keep bootstrap and fixtures warm so user requests never pay a cache miss.
 
-            self._cache["fixtures"] = fixtures
-            self._last_updated["fixtures"] = now
-            return fixtures
+        Each entry is refreshed in the background once REFRESH_AHEAD_FACTOR of its
+        current (calendar-aware) TTL has elapsed, or immediately if missing.
+        """
+        while True:
+            for key, loader in (("bootstrap", self._load_bootstrap), ("fixtures", self._load_fixtures)):
+                self._schedule_refresh(key, loader, self._ttl_for(key) * REFRESH_AHEAD_FACTOR)
+            self._cache.sweep()
+            await asyncio.sleep(interval)
+
+    def get_cache_policy(self) -> dict[str, Any]:
+        """Current TTL policy plus the age of each cached resource."""
+        now = time.time()
+        policy = self._ttl_scheduler.policy(now)
+        policy["entries"] = {
+            key: {
+                "age": round(now - self._cache.stored_at(key), 1),
+                "refreshing": key in self._refresh_tasks and not self._refresh_tasks[key].done(),
+            }
+            for key in ("bootstrap", "fixtures")
+            if key in self._cache
+        }
+        return policy
+
+    def get_cache_stats(self) -> dict[str, Any]:
+        """Entry counts, estimated bytes, hit rates and evictions per cache namespace.
+
+        ``working_sets`` reports the derived in-memory structures that are
+        bounded by the data itself rather than a byte budget, and
+        ``single_flight`` how many upstream GETs were coalesced.
+        """
+        stats = self._cache.stats()
+        stats["working_sets"] = {
+            "points_cube": {"gameweeks": len(self._points_cube.gameweeks), "bytes": self._points_cube.nbytes},
+            "top_managers": self._top_managers.stats(),
+        }
+        stats["single_flight"] = self._inflight.stats()
+        return stats
 
     async def get_live_fixtures(self, gw: int) -> list[Fixture]:
-        bootstrap = await self.get_bootstrap_static()
-        teams = {t["id"]: t for t in bootstrap["teams"]}
+        snapshot = await self.get_bootstrap_snapshot()
+        teams = snapshot.teams_by_id
 
         # Import HistoryService here to avoid circular dependencies
         from .history_service import HistoryService
@@ -795,19 +1105,18 @@ class FPLService:
 
     async def get_club_squad(self, club_id: int, gw: int | None = None) -> dict[str, Any]:
         logger.debug(f"get_club_squad called for club {club_id} with gw={gw}")
-        bootstrap = await self.get_bootstrap_static()
-        current_gw = await self.get_current_gameweek()
+        snapshot = await self.get_bootstrap_snapshot()
         if gw is None:
-            gw = current_gw
+            gw = snapshot.current_gameweek
         else:
             gw = int(gw)
 
-        teams_map = {t["id"]: t for t in bootstrap["teams"]}
+        teams_map = snapshot.teams_by_id
         club_team = teams_map.get(club_id)
         club_code = club_team["code"] if club_team else None
 
         # Get all players for this club
-        club_players = [e for e in bootstrap["elements"] if e["team"] == club_id]
+        club_players = snapshot.players_by_team.get(club_id, ())
 
         if not club_players:
             return {"squad": [], "team": teams_map.get(club_id, {}), "gameweek": gw}
@@ -819,10 +1128,9 @@ class FPLService:
             logger.debug(f"Failed to fetch live data for club squad GW{gw}: {e}")
             live_elements = {}
 
-        # Fetch fixtures for this GW
-        fixtures = await self.get_fixtures()
-        # Filter for club fixtures in this GW
-        club_fixtures = [f for f in fixtures if f.event == gw and (f.team_h == club_id or f.team_a == club_id)]
+        # Club fixtures in this GW (two in a double gameweek)
+        fixture_index = await self.get_fixture_index()
+        club_fixtures = fixture_index.for_event_team(gw, club_id)
 
         # Attempt to get Official Lineup from Pulse API
         starting_xi_codes = []
@@ -997,12 +1305,8 @@ class FPLService:
 
         # Process all fixtures for the club (Season Schedule)
         club_schedule = []
-        all_fixtures = await self.get_fixtures()
-        relevant_fixtures = [f for f in all_fixtures if f.team_h == club_id or f.team_a == club_id]
-        # Sort by event/kickoff
-        relevant_fixtures.sort(key=lambda x: x.event or 999)
-
-        for f in relevant_fixtures:
+        # Already ordered by event
+        for f in fixture_index.for_team(club_id):
             is_home = f.is_home_for(club_id)
             opponent_id = f.get_opponent_id(club_id)
             opp_team = teams_map.get(opponent_id, {})
@@ -1041,15 +1345,14 @@ class FPLService:
         }
 
     async def get_club_summary(self, club_id: int) -> dict[str, Any]:
-        bootstrap = await self.get_bootstrap_static()
-        teams_map = {t["id"]: t for t in bootstrap["teams"]}
+        snapshot = await self.get_bootstrap_snapshot()
+        teams_map = snapshot.teams_by_id
         team = teams_map.get(club_id)
         if not team:
             return {}
 
         # Get top 5 players
-        club_players = [p for p in bootstrap["elements"] if p["team"] == club_id]
-        club_players.sort(key=lambda x: x["total_points"], reverse=True)
+        club_players = sorted(snapshot.players_by_team.get(club_id, ()), key=lambda x: x["total_points"], reverse=True)
         top_players = club_players[:5]
 
         # Simple format for top players
@@ -1070,20 +1373,17 @@ class FPLService:
             )
 
         # Get next 3 fixtures
-        fixtures = await self.get_fixtures()
+        fixture_index = await self.get_fixture_index()
 
         # Find next fixtures & recent results
         upcoming = []
         recent = []
 
-        # Sort by event
-        fixtures.sort(key=lambda x: x.event or 999)
-
         # Separate fixtures into past and future
-        # Note: fixtures are sorted by event ascending (1, 2, 3...)
+        # Note: team fixtures are indexed by event ascending (1, 2, 3...)
 
         # 1. Collect all club fixtures
-        club_fixtures = [f for f in fixtures if f.team_h == club_id or f.team_a == club_id]
+        club_fixtures = fixture_index.for_team(club_id)
 
         # 2. Upcoming (first 3 that are not finished)
         future_fixtures = [f for f in club_fixtures if not f.finished and not f.finished_provisional][:5]
@@ -1146,42 +1446,29 @@ class FPLService:
         }
 
     async def get_current_gameweek(self) -> int:
-        data = await self.get_bootstrap_static()
-        for event in data["events"]:
-            if event["is_current"]:
-                return event["id"]
-        # Fallback if no current (e.g. pre-season)
-        for event in data["events"]:
-            if event["is_next"]:
-                return max(1, event["id"] - 1)
-        return 38
+        snapshot = await self.get_bootstrap_snapshot()
+        return snapshot.current_gameweek
 
     async def get_gameweek_status(self) -> dict[str, Any]:
-        data = await self.get_bootstrap_static()
+        snapshot = await self.get_bootstrap_snapshot()
         now = time.time()
 
         # 1. Try to find current event
-        current_event = None
-        for event in data["events"]:
-            if event["is_current"]:
-                current_event = event
-                break
+        current_event = snapshot.current_event
+        next_event = snapshot.next_event
 
         # 2. If current event exists and is finished, we want to return the NEXT event instead
         # FPL "is_current" stays True until the next gw update, which might be days after it finished.
         if current_event:
-            if current_event["finished"]:
-                # Find the next event
-                for event in data["events"]:
-                    if event["is_next"]:
-                        deadline = event.get("deadline_time_epoch", 0)
-                        started = now > deadline
-                        return {
-                            "id": event["id"],
-                            "finished": event["finished"],
-                            "data_checked": event["data_checked"],
-                            "started": started,
-                        }
+            if current_event["finished"] and next_event:
+                deadline = next_event.get("deadline_time_epoch", 0)
+                started = now > deadline
+                return {
+                    "id": next_event["id"],
+                    "finished": next_event["finished"],
+                    "data_checked": next_event["data_checked"],
+                    "started": started,
+                }
 
             # If not finished, or no next event found (e.g. end of season), return current
             deadline = current_event.get("deadline_time_epoch", 0)
@@ -1194,27 +1481,23 @@ class FPLService:
             }
 
         # 3. Fallback if no current (e.g. pre-season)
-        for event in data["events"]:
-            if event["is_next"]:
-                prev_id = max(1, event["id"] - 1)
-                return {
-                    "id": prev_id,
-                    "finished": True,  # Assume prev is finished
-                    "data_checked": True,
-                    "started": True,
-                }
+        if next_event:
+            prev_id = max(1, next_event["id"] - 1)
+            return {
+                "id": prev_id,
+                "finished": True,  # Assume prev is finished
+                "data_checked": True,
+                "started": True,
+            }
         return {"id": 38, "finished": True, "data_checked": True, "started": True}
 
     async def get_next_gameweek_id(self) -> int:
-        data = await self.get_bootstrap_static()
-        for event in data["events"]:
-            if event["is_next"]:
-                return event["id"]
-        return 38
+        snapshot = await self.get_bootstrap_snapshot()
+        return snapshot.next_gameweek
 
     async def get_league_table(self, min_gw: int = 1, max_gw: int = 38) -> list:
         bootstrap = await self.get_bootstrap_static()
-        fixtures = await self.get_fixtures()
+        fixture_index = await self.get_fixture_index()
 
         # Initialize table with team details
         teams = {}
@@ -1235,11 +1518,8 @@ class FPLService:
                 "form": [],  # List to store last 5 results
             }
 
-        # Process fixtures
-        # Sort fixtures by kickoff time to help with form calculation later if needed
-        fixtures.sort(key=lambda x: x.kickoff_time if x.kickoff_time else "")
-
-        for f in fixtures:
+        # Process fixtures in kickoff order so form is chronological
+        for f in fixture_index.by_kickoff:
             if not f.finished and not f.finished_provisional:
                 continue
 
@@ -1311,14 +1591,11 @@ class FPLService:
         return table
 
     async def get_player_summary(self, player_id: int, opponent_id: int | None = None) -> dict[str, Any]:
-        bootstrap = await self.get_bootstrap_static()
-        teams = {t["id"]: t for t in bootstrap["teams"]}
-        elements = {p["id"]: p for p in bootstrap["elements"]}
+        snapshot = await self.get_bootstrap_snapshot()
+        teams = snapshot.teams_by_id
+        elements = snapshot.elements_by_id
 
-        client = self._get_client()
-        response = await client.get(f"{FPL_BASE_URL}/element-summary/{player_id}/")
-        response.raise_for_status()
-        data = response.json()
+        data = await self._get_json(f"{FPL_BASE_URL}/element-summary/{player_id}/")
 
         # Enrich history
         for fixture in data.get("history", []):
@@ -1369,18 +1646,15 @@ class FPLService:
         return data
 
     async def get_dream_team(self, gw: int) -> dict[str, Any]:
-        bootstrap = await self.get_bootstrap_static()
-        elements = {p["id"]: p for p in bootstrap["elements"]}
-        teams = {t["id"]: t for t in bootstrap["teams"]}
+        snapshot = await self.get_bootstrap_snapshot()
+        elements = snapshot.elements_by_id
+        teams = snapshot.teams_by_id
 
-        client = self._get_client()
-        response = await client.get(f"{FPL_BASE_URL}/dream-team/{gw}/")
-        response.raise_for_status()
-        data = response.json()
+        data = await self._get_gameweek_json(f"dream-team/{gw}/", gw)
 
         # Fetch fixtures for this GW
-        fixtures = await self.get_fixtures()
-        gw_fixtures = [f for f in fixtures if f.event == gw]
+        fixture_index = await self.get_fixture_index()
+        gw_fixtures = fixture_index.for_event(gw)
 
         # Map team ID to fixture info
         team_fixture = {}
@@ -1472,158 +1746,227 @@ class FPLService:
         if gw is None:
             gw = await self.get_current_gameweek()
 
-        # Cap count at 1000 for now to prevent abuse/timeouts
+        # Cap count at 2000 to prevent abuse/timeouts
         count = min(max(count, 5), 2000)
 
-        # Cache check
-        cache_key = f"top_{count}_ownership_{gw}"
-        now = time.time()
-        # Cache for 1 hour
-        if cache_key in self._cache and (now - self._last_updated.get(cache_key, 0)) < TOP_MANAGERS_CACHE_TTL:
-            return self._cache[cache_key]
+        matrix = await self.get_top_manager_matrix(gw, count)
+        (band,) = matrix.band_counts([(0, matrix.size)])
+        summary = await self._summarize_ownership_band(gw, band)
+        # Ranks on standings pages that failed to load are not in the sample
+        sample = await self._top_managers.get(gw)
+        return {**summary, "missing_pages": sample.missing_pages(count)}
 
-        # 1. Raw Cache Check
-        # We store the raw picks data in a special cache key: "top_managers_raw_{gw}"
-        # This allows us to serve any "count" that is <= the cached amount without re-fetching.
+    async def get_top_manager_bands(self, gw: int | None, bands: list[tuple[int, int]]) -> dict[str, Any]:
+        """Ownership, captaincy, effective ownership and chips per rank band, e.g. ``(500, 1000)`` for 501-1000."""
+        if gw is None:
+            gw = await self.get_current_gameweek()
 
-        raw_cache_key = f"top_managers_raw_{gw}"
-        raw_cached = self._cache.get(raw_cache_key)
+        matrix = await self.get_top_manager_matrix(gw, min(max(stop for _, stop in bands), 2000))
+        summaries = [await self._summarize_ownership_band(gw, band) for band in matrix.band_counts(bands)]
+        return {"gameweek": gw, "bands": summaries}
 
-        picks_data = []  # List of {'picks': [], 'active_chip': str}
+    async def get_top_manager_matrix(
+        self, gw: int, count: int, on_picks: Callable[[int, dict[str, Any]], None] | None = None
+    ) -> OwnershipMatrix:
+        """Rank-ordered picks of the top ``count`` overall managers for ``gw``.
 
-        # If we have enough data in cache, use it
-        if raw_cached and len(raw_cached) >= count:
-            logger.info(f"Using raw cache for Top {count} (cached {len(raw_cached)})")
-            picks_data = raw_cached[:count]
-        else:
-            # Need to fetch data
-            # If we have some data, we could potentially just fetch the delta.
-            # But simpler to just fetch all if what we have is insufficient,
-            # OR we can append. Let's append to be efficient.
-
-            # If we need more than we have, fetch the difference or all if no cache
-            # Actually, to keep it robust and simple:
-            # If we need more data than cached, let's just fetch everything to ensure we have the *latest* rank order
-            # (Ranks change as games update).
-            # But typically this is for static analysis.
-            # Let's just fetch what we need.
-
-            # Fetch Top Manager Team IDs from Overall League (ID 314)
-            num_pages = (count + STANDINGS_PAGE_SIZE - 1) // STANDINGS_PAGE_SIZE
-            top_teams = []
+        The sample grows incrementally: only expired standings pages are re-read
+        and only entries new to the sample have their picks fetched (picks are
+        fixed within a GW). Picks requests start as soon as the first standings
+        page arrives. When nothing has expired no upstream call is made.
+        """
+        sample = await self._top_managers.get(gw)
+        # One collection per GW at a time; a concurrent request then finds the sample already grown
+        async with self._lock_for(f"top_managers:{gw}"):
+            client = self._get_client()
             league_id = OVERALL_LEAGUE_ID
 
-            # Helper to fetch a page of standings
-            async def fetch_standings_page(client, page):
+            async def fetch_standings_page(page: int) -> list[int] | None:
                 try:
                     resp = await client.get(
                         f"{FPL_BASE_URL}/leagues-classic/{league_id}/standings/",
                         params={"page_new_entries": 1, "page_standings": page},
                     )
                     resp.raise_for_status()
-                    return resp.json()
-                except (httpx.HTTPStatusError, httpx.RequestError) as e:
+                    res = resp.json()
+                except (httpx.HTTPStatusError, httpx.RequestError, ValueError) as e:
+                    # ValueError: a non-JSON body such as the "game is updating" page
                     logger.error(f"Failed to fetch standings page {page}: {e}")
                     return None
+                if "standings" in res and "results" in res["standings"]:
+                    return [t["entry"] for t in res["standings"]["results"]]
+                return None
+
+            stats = await collect_sample(
+                sample,
+                count,
+                fetch_standings_page,
+                functools.partial(self._fetch_manager_picks, gw),
+                max_page_age=self._ttl_for("top_managers"),
+                limiter=self._top_manager_limiter,
+                on_picks=on_picks,
+            )
+            if stats["pages"] or stats["picks"]:
+                logger.info(f"Top {count} GW{gw}: {stats}")
+                await self._top_managers.save(sample)
+        return sample.matrix(count)
 
-            client = self._get_client()
-            tasks = [fetch_standings_page(client, page) for page in range(1, num_pages + 1)]
-            results = await asyncio.gather(*tasks)
+    async def _fetch_manager_picks(self, gw: int, tid: int) -> dict[str, Any] | None:
+        try:
+            resp = await self._get_client().get(f"{FPL_BASE_URL}/entry/{tid}/event/{gw}/picks/")
+        except httpx.RequestError as e:
+            logger.debug(f"Failed to fetch picks for {tid} GW{gw}: {e}")
+            return None
+        if resp.status_code != 200:
+            return None
+        try:
+            data = resp.json()
+        except ValueError:
+            # e.g. the HTML "game is updating" page served with a 200
+            logger.debug(f"Non-JSON picks response for {tid} GW{gw}")
+            return None
+        return {"picks": data.get("picks", []), "active_chip": data.get("active_chip")}
 
-            for res in results:
-                if res and "standings" in res and "results" in res["standings"]:
-                    top_teams.extend(res["standings"]["results"])
+    async def get_top_manager_trends(self, gw: int | None, bands: list[tuple[int, int]]) -> dict[str, Any]:
+        """Transfers, captaincy switches and chips of the top managers between ``gw - 1`` and ``gw``.
 
-            # Slice to exact count
-            top_teams = top_teams[:count]
-            team_ids = [t["entry"] for t in top_teams]
-            logger.info(f"Fetched {len(team_ids)} top team IDs")
+        Bands are ranks in ``gw`` (0-based, stop exclusive). The same entries are
+        looked up in the previous gameweek's stored sample; only picks it lacks
+        are fetched and no previous-GW standings are read.
+        """
+        if gw is None:
+            gw = await self.get_current_gameweek()
+        if gw < 2:
+            return {"gameweek": gw, "previous_gameweek": None, "bands": []}
+
+        current = await self.get_top_manager_matrix(gw, min(max(stop for _, stop in bands), 2000))
+        entries = current.entries.tolist()
+        previous_sample = await self._top_managers.get(gw - 1)
+        async with self._lock_for(f"top_managers:{gw - 1}"):
+            stats = await collect_picks(
+                previous_sample,
+                entries,
+                functools.partial(self._fetch_manager_picks, gw - 1),
+                limiter=self._top_manager_limiter,
+            )
+            if stats["picks"]:
+                logger.info(f"Top managers GW{gw - 1} for trends: {stats}")
+                await self._top_managers.save(previous_sample)
+        previous = previous_sample.matrix_for(entries)
+
+        snapshot = await self.get_bootstrap_snapshot()
+        summaries = []
+        for band in transfer_trends(previous, current, bands):
+            players = []
+            transfers_in, transfers_out = band["transfers_in"], band["transfers_out"]
+            captain_in, captain_out = band["captain_in"], band["captain_out"]
+            for pid in np.flatnonzero(transfers_in + transfers_out + captain_in + captain_out):
+                player = snapshot.elements_by_id.get(int(pid))
+                if not player:
+                    continue
+                team = snapshot.teams_by_id.get(player["team"])
+                players.append(
+                    {
+                        "id": int(pid),
+                        "web_name": player["web_name"],
+                        "team_short": team["short_name"] if team else "UNK",
+                        "element_type": player["element_type"],
+                        "cost": player["now_cost"] / 10,
+                        "transfers_in": int(transfers_in[pid]),
+                        "transfers_out": int(transfers_out[pid]),
+                        "net_transfers": int(transfers_in[pid]) - int(transfers_out[pid]),
+                        "captain_in": int(captain_in[pid]),
+                        "captain_out": int(captain_out[pid]),
+                    }
+                )
+            # Biggest net movers first, sells at the end
+            players.sort(key=lambda p: (-p["net_transfers"], -p["transfers_in"]))
+            summaries.append(
+                {
+                    "rank_band": f"{band['start'] + 1}-{band['stop']}",
+                    "sample_size": band["size"],
+                    "players": players,
+                    "captain_switches": band["captain_switches"],
+                    "chips": band["chips"],
+                    "previous_chips": band["previous_chips"],
+                }
+            )
+        return {"gameweek": gw, "previous_gameweek": gw - 1, "bands": summaries}
 
-            # 2. Fetch Picks for all teams (that we don't have or just fetch all for simplicity/correctness)
+    async def stream_top_managers_ownership(
+        self, gw: int | None = None, count: int = 1000, every: int = 100
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Ownership aggregates that refine while the sample is collected.
 
-            # Since ranks shuffle, "Top 50" now might be different teams than "Top 50" an hour ago.
-            # So mixing cached 50 with new 50 might duplicate or miss.
-            # Decision: reliable approach -> if requesting more than cache, fetch ALL requested and overwrite cache.
+        Yields a partial summary over the managers fetched so far every
+        ``every`` newly stored picks, then the final summary (identical to
+        ``get_top_managers_ownership``). Closing the generator, e.g. when the
+        client disconnects, cancels the crawl.
+        """
+        if gw is None:
+            gw = await self.get_current_gameweek()
+        count = min(max(count, 5), 2000)
+        sample = await self._top_managers.get(gw)
 
-            picks_data = []
+        progressed = asyncio.Event()
+        arrived = 0
 
-            chunk_size = 50
+        def on_picks(entry: int, picks: dict[str, Any]) -> None:
+            nonlocal arrived
+            arrived += 1
+            if arrived % every == 0:
+                progressed.set()
 
-            client = self._get_client()
-            for i in range(0, len(team_ids), chunk_size):
-                chunk = team_ids[i : i + chunk_size]
-                tasks = []
-                for tid in chunk:
-                    tasks.append(client.get(f"{FPL_BASE_URL}/entry/{tid}/event/{gw}/picks/"))
-
-                responses = await asyncio.gather(*tasks, return_exceptions=True)
-
-                # Process chunk results IN ORDER
-                for resp in responses:
-                    if isinstance(resp, httpx.Response) and resp.status_code == 200:
-                        data = resp.json()
-                        picks_data.append(
-                            {
-                                "picks": data.get("picks", []),
-                                "active_chip": data.get("active_chip"),
-                            }
-                        )
-                    else:
-                        picks_data.append({"picks": [], "active_chip": None})
-
-                # Small sleep to be nice to FPL API
-                await asyncio.sleep(0.2)
-
-            # Update Raw Cache if this is the largest set we've seen
-            if not raw_cached or len(picks_data) > len(raw_cached):
-                # Evict stale raw caches from other gameweeks
-                stale_keys = [k for k in self._cache if k.startswith("top_managers_raw_") and k != raw_cache_key]
-                for k in stale_keys:
-                    del self._cache[k]
-                    self._last_updated.pop(k, None)
-                self._cache[raw_cache_key] = picks_data
-                self._last_updated[raw_cache_key] = now
-
-        # 3. Process Picks Data (Aggregation)
-        # Now we have `picks_data` (list of dicts) of size `count` (or close to it)
-
-        player_counts = Counter()
-        captain_counts = Counter()
-        chip_counts = Counter()
-
-        for entry in picks_data:
-            active_chip = entry.get("active_chip")
-            if active_chip:
-                chip_counts[active_chip] += 1
-
-            for p in entry.get("picks", []):
-                player_counts[p["element"]] += 1
-                if p["is_captain"]:
-                    captain_counts[p["element"]] += 1
-
-        # Enrich with Player Data
-        bootstrap = await self.get_bootstrap_static()
-        elements = {p["id"]: p for p in bootstrap["elements"]}
-        teams = {t["id"]: t for t in bootstrap["teams"]}
+        crawl = asyncio.create_task(self.get_top_manager_matrix(gw, count, on_picks=on_picks))
+        try:
+            while not crawl.done():
+                waiter = asyncio.ensure_future(progressed.wait())
+                await asyncio.wait({crawl, waiter}, return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                if progressed.is_set() and not crawl.done():
+                    progressed.clear()
+                    partial = sample.matrix(count, fetched_only=True)
+                    (band,) = partial.band_counts([(0, partial.size)])
+                    summary = await self._summarize_ownership_band(gw, band)
+                    yield {**summary, "progress": {"fetched": partial.size, "target": count, "complete": False}}
+
+            matrix = crawl.result()
+            (band,) = matrix.band_counts([(0, matrix.size)])
+            summary = await self._summarize_ownership_band(gw, band)
+            yield {
+                **summary,
+                "missing_pages": sample.missing_pages(count),
+                "progress": {"fetched": matrix.size, "target": count, "complete": True},
+            }
+        finally:
+            crawl.cancel()
+
+    async def _summarize_ownership_band(self, gw: int, band: dict[str, Any]) -> dict[str, Any]:
+        snapshot = await self.get_bootstrap_snapshot()
+        elements = snapshot.elements_by_id
+        teams = snapshot.teams_by_id
 
-        enriched_players = []
         # Use actual count of data we have
-        count = len(picks_data)
-        if count == 0:
-            count = 1  # avoid div by zero
+        count = band["size"] or 1  # avoid div by zero
+        owned, captained, effective = band["owned"], band["captained"], band["effective"]
 
-        for pid, p_count in player_counts.most_common():
-            player = elements.get(pid)
+        enriched_players = []
+        # Most owned first
+        for pid in np.argsort(-owned, kind="stable"):
+            p_count = int(owned[pid])
+            if p_count == 0:
+                break
+            player = elements.get(int(pid))
             if not player:
                 continue
 
             team = teams.get(player["team"])
             ownership = (p_count / count) * 100
-            cap_ownership = (captain_counts[pid] / count) * 100
+            cap_ownership = (int(captained[pid]) / count) * 100
 
             enriched_players.append(
                 {
-                    "id": pid,
+                    "id": int(pid),
                     "web_name": player["web_name"],
                     "full_name": f"{player['first_name']} {player['second_name']}",
                     "team_short": team["short_name"] if team else "UNK",
@@ -1635,28 +1978,44 @@ class FPLService:
                     "news": player["news"],
                     "ownership_top_1000": round(ownership, 1),
                     "captain_top_1000": round(cap_ownership, 1),
+                    "effective_ownership": round(float(effective[pid]) / count * 100, 1),
                     "global_ownership": float(player["selected_by_percent"]),
                     "rank_diff": round(ownership - float(player["selected_by_percent"]), 1),
                 }
             )
 
-        result = {
-            "players": enriched_players,  # Already sorted by ownership due to most_common()
-            "chips": dict(chip_counts),
+        return {
+            "players": enriched_players,
+            "chips": band["chips"],
             "sample_size": count,
+            "rank_band": f"{band['start'] + 1}-{band['stop']}",
             "gameweek": gw,
         }
 
-        # Cache the processed result for this specific count too, if we want?
-        # The prompt asked for optimizing fetching. We did that via raw_cache.
-        # But we still calculate the result every time. That is fine as it's fast.
-        # But we should respect the original function cache logic if we want to be super efficient?
-        # Actually, let's update the specific count cache so next time identical request is instant.
+    async def get_points_cube(self, max_gw: int | None = None) -> PointsCube:
+        """Points cube covering gameweeks 1..max_gw, capped at the current gameweek.
 
-        self._cache[cache_key] = result
-        self._last_updated[cache_key] = now
-
-        return result
+        Final gameweeks are ingested once; the others are re-ingested whenever
+        their cached live payload is replaced. Gameweeks that fail to load are
+        left empty and retried on the next call.
+        """
+        snapshot = await self.get_bootstrap_snapshot()
+        last_gw = snapshot.current_gameweek if max_gw is None else min(max_gw, snapshot.current_gameweek)
+        cube = self._points_cube
+        gws = [gw for gw in range(1, last_gw + 1) if gw not in cube.final_gameweeks]
+        if not gws:
+            return cube
+
+        results = await asyncio.gather(*(self.get_event_live(gw) for gw in gws), return_exceptions=True)
+        stale = [
+            (gw, data) for gw, data in zip(gws, results) if not isinstance(data, BaseException) and cube.needs(gw, data)
+        ]
+        if stale:
+            fixture_index = await self.get_fixture_index()
+            team_of = {pid: p["team"] for pid, p in snapshot.elements_by_id.items()}
+            for gw, data in stale:
+                cube.ingest(gw, data, fixture_index.by_id, team_of, final=snapshot.is_gameweek_final(gw))
+        return cube
 
     async def get_aggregated_player_stats(self, min_gw: int, max_gw: int, venue: str = "both") -> list[dict]:
         """
@@ -1664,33 +2023,9 @@ class FPLService:
         venue: 'both', 'home', 'away'
         """
         # 1. Fetch base data
-        bootstrap = await self.get_bootstrap_static()
-        elements = {p["id"]: p for p in bootstrap["elements"]}
-        teams = {t["id"]: t for t in bootstrap["teams"]}
-
-        # 2. Fetch fixtures for the season (cached) to determine H/A status
-        all_fixtures = await self.get_fixtures()
-        # Index fixtures by (gw, team_id) -> is_home?
-        # Actually, a fixture has team_h and team_a.
-        # We need a quick lookup: map[gw][team_id] -> 'home' or 'away'
-        venue_map = {}  # {gw: {team_id: 'home'|'away'}}
-        for fix in all_fixtures:
-            event = fix.event
-            if event is None:
-                continue
-            if event not in venue_map:
-                venue_map[event] = {}
-            venue_map[event][fix.team_h] = "home"
-            venue_map[event][fix.team_a] = "away"
-
-        # Helper map for fixtures to support DGWs and precise points attribution
-        fixture_lookup = {f.id: f for f in all_fixtures}
-
-        # 3. Fetch live data for each GW in range in parallel
-        tasks = []
-        # If range is invalid, default to current GW only? Or return empty?
-        # Assuming caller safeguards.
-        # Check against available GWs
+        snapshot = await self.get_bootstrap_snapshot()
+        elements = snapshot.elements_by_id
+        teams = snapshot.teams_by_id
 
         # Check if ranges are reasonable
         if min_gw < 1:
@@ -1698,93 +2033,14 @@ class FPLService:
         if max_gw < min_gw:
             max_gw = min_gw
 
-        for gw in range(min_gw, max_gw + 1):
-            tasks.append(self.get_event_live(gw))
-
-        gw_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        player_stats = {}  # pid -> {total_points: 0, games: 0, etc}
-
-        for i, result in enumerate(gw_results):
-            gw = min_gw + i
-            if isinstance(result, BaseException):
-                # GW might not have happened yet or API error
-                continue
-
-            # result is the live data struct: { elements: [ {id, stats: {total_points, ...}, explain: []}, ... ] }
-            live_elements = result.get("elements", [])
-
-            for el in live_elements:
-                pid = el["id"]
-                points = el["stats"].get("total_points", 0)
-
-                # Check venue filter
-                player = elements.get(pid)
-                if not player:
-                    continue
-
-                team_id = player["team"]
-
-                # If filter is 'both', we take the total points for this GW directly (easiest)
-                # UNLESS we want to support 'home' or 'away'
-                # If venue != 'both', we must inspect 'explain' to separate points
-                # from Home vs Away games in this GW (DGW support)
-
-                points_to_add = 0
-                matches_to_add = 0
-
-                if venue == "both":
-                    points_to_add = points
-                    # matches logic
-                    explains = el.get("explain", [])
-                    for expl in explains:
-                        mins = next(
-                            (s["value"] for s in expl.get("stats", []) if s["identifier"] == "minutes"),
-                            0,
-                        )
-                        if mins > 0:
-                            matches_to_add += 1
-                else:
-                    # Filter by venue
-                    explains = el.get("explain", [])
-                    for expl in explains:
-                        fixture_id = expl["fixture"]
-                        fix_info = fixture_lookup.get(fixture_id)
-                        if not fix_info:
-                            continue
-
-                        is_home = fix_info.is_home_for(team_id)
-
-                        target_venue = venue.lower()
-                        should_include = False
-
-                        if (target_venue == "home" and is_home) or (target_venue == "away" and not is_home):
-                            should_include = True
-
-                        if should_include:
-                            fix_points = sum(s["points"] for s in expl.get("stats", []))
-                            points_to_add += fix_points
-                            mins = next(
-                                (s["value"] for s in expl.get("stats", []) if s["identifier"] == "minutes"),
-                                0,
-                            )
-                            if mins > 0:
-                                matches_to_add += 1
-
-                if points_to_add == 0 and venue != "both":
-                    # If we filtered out all points, do we still count it?
-                    # Yes, but value is 0.
-                    pass
-
-                if pid not in player_stats:
-                    player_stats[pid] = {
-                        "id": pid,
-                        "points_in_range": 0,
-                        "matches_in_range": 0,
-                    }
-
-                player_stats[pid]["points_in_range"] += points_to_add
-                player_stats[pid]["matches_in_range"] += matches_to_add
+        # 2. Range totals are prefix-sum differences on the points cube (DGWs split by venue per fixture)
+        cube = await self.get_points_cube(max_gw)
+        points_in_range = cube.totals_by_player(POINTS, min_gw, max_gw, venue)
+        matches_in_range = cube.totals_by_player(APPEARANCES, min_gw, max_gw, venue)
+        player_stats = {
+            pid: {"points_in_range": points, "matches_in_range": matches_in_range[pid]}
+            for pid, points in points_in_range.items()
+        }
 
         # Format result
         results = []
@@ -1832,11 +2088,11 @@ class FPLService:
 
     async def get_polymarket_data(self) -> list:
         # Cache check
-        cache_key = "polymarket_premier_league_v10"  # Bump version
+        cache_key = "polymarket:premier_league_v10"  # Bump version
         now = time.time()
-        # Cache for 10 minutes
-        if cache_key in self._cache and (now - self._last_updated.get(cache_key, 0)) < POLYMARKET_CACHE_TTL:
-            return self._cache[cache_key]
+        cached = self._cache.get(cache_key, max_age=self._ttl_for("polymarket", cache_key))
+        if cached is not None:
+            return cached
 
         url = "https://gamma-api.polymarket.com/events"
         params = {
@@ -2002,13 +2258,18 @@ class FPLService:
 
             # Cache top 50 to cover multiple gameweeks if available
             final_list = markets[:50]
-            self._cache[cache_key] = final_list
-            self._last_updated[cache_key] = now
+            self._cache.set(cache_key, final_list, now)
             return final_list
         except Exception as e:
             logger.error(f"Failed to fetch Polymarket data: {e}")
             return []
 
+    def get_solver_stats(self) -> dict[str, Any]:
+        return self._solver_pool.stats()
+
+    def shutdown_solver(self) -> None:
+        self._solver_pool.shutdown()
+
     async def get_optimized_team(
         self,
         budget: float = 100.0,
@@ -2017,10 +2278,12 @@ class FPLService:
         exclude_bench: bool = False,
         exclude_unavailable: bool = False,
         predictions: dict[int, float] | None = None,
+        time_limit: float = SOLVER_TIME_LIMIT,
+        gap_rel: float = SOLVER_GAP_REL,
     ) -> dict[str, Any]:
-        bootstrap = await self.get_bootstrap_static()
-        elements = bootstrap["elements"]
-        current_gw = await self.get_current_gameweek()
+        snapshot = await self.get_bootstrap_snapshot()
+        elements = snapshot.elements
+        current_gw = snapshot.current_gameweek
 
         # Default range
         if min_gw is None:
@@ -2111,34 +2374,9 @@ class FPLService:
             # Use provided predictions
             player_period_points = predictions
         elif use_history:
-            # Batch fetch histories
-            # We need to fetch element-summary for each candidate
-            sem = asyncio.Semaphore(20)  # Concurrency limit
-
-            async def fetch_player_points(client, pid):
-                async with sem:
-                    try:
-                        resp = await client.get(f"{FPL_BASE_URL}/element-summary/{pid}/")
-                        resp.raise_for_status()
-                        data = resp.json()
-                        history = data.get("history", [])
-                        # Sum points in range
-                        pts = sum(h["total_points"] for h in history if min_gw <= h["round"] <= max_gw)
-                        return pid, pts
-                    except Exception as e:
-                        logger.error(f"Failed to fetch history for {pid}: {e}")
-                        return pid, 0
-
-            client = self._get_client()
-            # Optimized task creation: Only fetch history if player has total_points > 0.
-            tasks = []
-            for p in candidates:
-                if p["total_points"] > 0:
-                    tasks.append(fetch_player_points(client, p["id"]))
-
-            results = await asyncio.gather(*tasks)
-            for pid, pts in results:
-                player_period_points[pid] = pts
+            # Window sums come from the shared points cube: no per-player element-summary calls
+            cube = await self.get_points_cube(max_gw)
+            player_period_points = cube.totals_by_player(POINTS, min_gw, max_gw)
         else:
             # Use total_points from bootstrap
             for p in candidates:
@@ -2171,118 +2409,27 @@ class FPLService:
                 }
             )
 
-        # Problem Definition
-        prob = pulp.LpProblem("FPL_Team_Optimization", pulp.LpMaximize)
-
-        # Decision Variables
-        # x[i] = 1 if player i is selected, 0 otherwise
-        player_vars = pulp.LpVariable.dicts("Player", [p["id"] for p in players], cat="Binary")
-
-        # Objective Function
-        if exclude_bench:
-            # If excluding bench points, we verify optimization based on Starting XI only.
-            # We need additional variables for "Starter".
-            starter_vars = pulp.LpVariable.dicts("Starter", [p["id"] for p in players], cat="Binary")
-
-            # Link Starter to Squad: if starter, must be in squad
-            for p in players:
-                prob += starter_vars[p["id"]] <= player_vars[p["id"]]
-
-            # 11 Starters
-            prob += (
-                pulp.lpSum([starter_vars[p["id"]] for p in players]) == 11,
-                "Starter Count",
-            )
-
-            # Formation Constraints (Starters)
-            # 1 GK
-            prob += (
-                pulp.lpSum([starter_vars[p["id"]] for p in players if p["position"] == 1]) == 1,
-                "Starter GKP",
-            )
-            # Min 3 DEF
-            prob += (
-                pulp.lpSum([starter_vars[p["id"]] for p in players if p["position"] == 2]) >= 3,
-                "Starter Min DEF",
-            )
-            # Min 1 FWD
-            prob += (
-                pulp.lpSum([starter_vars[p["id"]] for p in players if p["position"] == 4]) >= 1,
-                "Starter Min FWD",
-            )
-
-            # Objective: Maximize Starter Points - 0.001 * Total Cost (to prefer cheaper bench/squad)
-            prob += (
-                pulp.lpSum([p["points"] * starter_vars[p["id"]] for p in players])
-                - 0.001 * pulp.lpSum([p["cost"] * player_vars[p["id"]] for p in players]),
-                "Total Points",
-            )
-
-        else:
-            # Objective Function: Maximize Total Points (All 15)
-            prob += (
-                pulp.lpSum([p["points"] * player_vars[p["id"]] for p in players]),
-                "Total Points",
-            )
-
-        # Constraints
-
-        # 1. Budget Constraint
-        prob += (
-            pulp.lpSum([p["cost"] * player_vars[p["id"]] for p in players]) <= budget,
-            "Budget",
-        )
-
-        # 2. Squad Size (Exactly 15 players)
-        prob += pulp.lpSum([player_vars[p["id"]] for p in players]) == 15, "Squad Size"
-
-        # 3. Position Constraints
-        # GKP: 2
-        prob += (
-            pulp.lpSum([player_vars[p["id"]] for p in players if p["position"] == 1]) == 2,
-            "GKP Count",
-        )
-        # DEF: 5
-        prob += (
-            pulp.lpSum([player_vars[p["id"]] for p in players if p["position"] == 2]) == 5,
-            "DEF Count",
-        )
-        # MID: 5
-        prob += (
-            pulp.lpSum([player_vars[p["id"]] for p in players if p["position"] == 3]) == 5,
-            "MID Count",
-        )
-        # FWD: 3
-        prob += (
-            pulp.lpSum([player_vars[p["id"]] for p in players if p["position"] == 4]) == 3,
-            "FWD Count",
-        )
-
-        # 4. Max Players per Team (3)
-        teams = set(p["team"] for p in players)
-        for t in teams:
-            prob += (
-                pulp.lpSum([player_vars[p["id"]] for p in players if p["team"] == t]) <= 3,
-                f"Max Players Team {t}",
-            )
-
-        # Solve
-        # Suppress output
-        prob.solve(pulp.PULP_CBC_CMD(msg=False))
+        # Model building and CBC run in the solver pool, keeping the event loop free
+        solver_input = [
+            {"id": p["id"], "position": p["position"], "team": p["team"], "cost": p["cost"], "points": p["points"]}
+            for p in players
+        ]
+        solution = await self._solver_pool.solve(solver_input, budget, exclude_bench, time_limit, gap_rel)
+        logger.info(f"Optimization solved in {solution['solve_time']:.2f}s: {solution['status']}")
 
         # Extract Results
+        selected_ids = set(solution["selected"])
+        starter_ids = set(solution["starters"])
         selected_players = []
         total_cost = 0
         total_points = 0
 
-        team_map = {t["id"]: t for t in bootstrap["teams"]}
+        team_map = snapshot.teams_by_id
 
         for p in players:
-            if pulp.value(player_vars[p["id"]]) == 1:
+            if p["id"] in selected_ids:
                 t_info = team_map.get(p["team"])
-                is_starter = True
-                if exclude_bench:
-                    is_starter = pulp.value(starter_vars[p["id"]]) == 1
+                is_starter = p["id"] in starter_ids
 
                 selected_players.append(
                     {
@@ -2306,13 +2453,12 @@ class FPLService:
             )
         )
 
-        status = pulp.LpStatus[prob.status]
-
         return {
             "squad": selected_players,
             "total_points": total_points,
             "total_cost": round(total_cost, 1),
-            "status": status,
+            "status": solution["status"],
+            "solution_status": solution["solution_status"],
             "budget_used": round(total_cost, 1),
             "gameweek_range": f"{min_gw}-{max_gw}",
         }
@@ -2329,9 +2475,10 @@ class FPLService:
             else:
                 start_gw = status["id"]
 
-        fixtures = await self.get_fixtures()
-        bootstrap = await self.get_bootstrap_static()
-        teams = {t["id"]: t for t in bootstrap["teams"]}
+        fixture_index = await self.get_fixture_index()
+        snapshot = await self.get_bootstrap_snapshot()
+        bootstrap = snapshot.raw
+        teams = snapshot.teams_by_id
 
         # Fetch Polymarket Odds
         try:
@@ -2385,7 +2532,7 @@ class FPLService:
         # Calculates a custom difficulty score for each fixture.
 
         # Filter futures - allow finished if it's within our target range (to align grid)
-        future_fixtures = [f for f in fixtures if f.event is not None and f.event >= start_gw]
+        future_fixtures = fixture_index.for_events(start_gw, max(fixture_index.by_event, default=0))
 
         # Group by team
         team_fixtures = {t_id: [] for t_id in teams}
@@ -1,19 +1,23 @@
 import ast
 import asyncio
 import io
+import time
 from typing import Any
 
 import polars as pl
 from loguru import logger
 
 from .fpl_service import FPLService
+from .tracing import trace_methods
 
 REPO_BASE_URL = "https://raw.githubusercontent.com/vaastav/Fantasy-Premier-League/master/data"
 SEASONS = ["2019-20", "2020-21", "2021-22", "2022-23", "2023-24", "2024-25"]
 
 
+@trace_methods("_ensure_history_data", "_fetch_season_data")
 class HistoryService:
-    _cache: dict[str, Any] = {}
+    # Season frames live in the shared cache manager under their own byte budget
+    _cache = FPLService._cache.namespace("history")
     _cache_lock = asyncio.Lock()
 
     def __init__(self):
@@ -21,8 +25,8 @@ class HistoryService:
 
     async def get_h2h_history(self, team_h_id: int, team_a_id: int) -> list[dict[str, Any]]:
         # 1. Get current team details to find their names
-        bootstrap = await self.fpl_service.get_bootstrap_static()
-        teams = {t["id"]: t for t in bootstrap["teams"]}
+        snapshot = await self.fpl_service.get_bootstrap_snapshot()
+        teams = snapshot.teams_by_id
 
         home_team = teams.get(team_h_id)
         away_team = teams.get(team_a_id)
@@ -269,11 +273,23 @@ class HistoryService:
         history.sort(key=lambda x: x.get("date", ""), reverse=True)
         return history
 
+    async def warm(self) -> None:
+        """Load every past season's data ahead of the first request that needs it."""
+        await self._ensure_history_data()
+
     async def _ensure_history_data(self):
         async with self._cache_lock:
             if all(s in self._cache for s in SEASONS):
                 return
 
+            # Past seasons never change, so a copy another worker fetched is always good
+            backend = FPLService._backend
+            for season in SEASONS:
+                if season in self._cache or not backend.shared:
+                    continue
+                if (stored := await backend.get(f"history:{season}")) is not None:
+                    self._cache[season] = stored[0]
+
             tasks = []
             for season in SEASONS:
                 if season not in self._cache:
@@ -284,6 +300,8 @@ class HistoryService:
                 for res in results:
                     if res:
                         self._cache[res["season"]] = res
+                        if backend.shared:
+                            await backend.set(f"history:{res['season']}", res, time.time())
 
     async def _fetch_season_data(self, season: str) -> dict[str, Any] | None:
         logger.info(f"Fetching historical data for {season}")
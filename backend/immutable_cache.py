@@ -0,0 +1,71 @@
+import asyncio
+import gzip
+import json
+import os
+import re
+from typing import Any
+
+from loguru import logger
+
+from .cache_manager import CACHE_NAMESPACES, DECODED_JSON_FACTOR, CacheNamespace
+
+IMMUTABLE_CACHE_DIR = os.getenv("FPL_IMMUTABLE_CACHE_DIR", os.path.join("data", "immutable"))
+
+
+class ImmutableCache:
+    """Permanent cache for payloads that can no longer change upstream.
+
+    Entries are written once to gzipped JSON files on disk and fronted by an
+    in-memory LRU with a byte budget (the ``immutable`` cache namespace). There
+    is no TTL: callers must only store data that is final (e.g. gameweeks that
+    are finished and data-checked). Returned objects are shared between callers
+    and must be treated as read-only.
+    """
+
+    def __init__(self, directory: str = IMMUTABLE_CACHE_DIR, memory: CacheNamespace | None = None):
+        self.directory = directory
+        self.memory = memory if memory is not None else CacheNamespace("immutable", *CACHE_NAMESPACES["immutable"])
+
+    def _path(self, key: str) -> str:
+        name = re.sub(r"[^A-Za-z0-9]+", "_", key).strip("_")
+        return os.path.join(self.directory, f"{name}.json.gz")
+
+    def _read(self, path: str) -> tuple[Any, int] | None:
+        """The decoded payload and its JSON size in bytes."""
+        try:
+            with gzip.open(path, "rb") as f:
+                raw = f.read()
+            return json.loads(raw), len(raw)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable immutable cache file {path}: {e}")
+            return None
+
+    def _write(self, path: str, value: Any) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(value, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    async def get(self, key: str) -> Any | None:
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        loaded = await asyncio.to_thread(self._read, self._path(key))
+        if loaded is None:
+            return None
+        value, body_bytes = loaded
+        self.memory.set(key, value, size=body_bytes * DECODED_JSON_FACTOR)
+        return value
+
+    async def put(self, key: str, value: Any, size: int | None = None) -> None:
+        """Store ``value``; ``size`` is its in-memory size when known (see ``CacheNamespace.set``)."""
+        self.memory.set(key, value, size=size)
+        try:
+            await asyncio.to_thread(self._write, self._path(key), value)
+        except OSError as e:
+            # Memory copy is still valid; the payload is simply refetched after a restart
+            logger.warning(f"Failed to persist immutable cache entry {key}: {e}")
@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+from loguru import logger
+
+from .cache_backend import CacheBackend, MemoryBackend
+
+JOB_RESULT_TTL = 3600.0  # seconds a finished job's result is kept and reused
+JOB_POLL_INTERVAL = 1.0  # seconds between status reads for jobs running on another worker
+JOB_PROGRESS_INTERVAL = 1.0  # minimum seconds between progress writes to a shared backend
+JOB_HEARTBEAT_INTERVAL = 10.0  # seconds between writes of an unfinished job that reports no progress
+JOB_STALE_AFTER = 3 * JOB_HEARTBEAT_INTERVAL  # an unfinished stored job not written for this long is dead
+JOB_PURGE_INTERVAL = 60.0  # minimum seconds between deletions of expired jobs from a shared backend
+FINISHED = ("done", "failed")
+
+JobHandler = Callable[[dict[str, Any], Callable[[Any], None]], Awaitable[Any]]
+
+
+class UnknownJobType(KeyError):
+    pass
+
+
+def job_id(kind: str, params: dict[str, Any]) -> str:
+    """Hash of the job's inputs; identical submissions share an id."""
+    payload = json.dumps({"kind": kind, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class Job:
+    def __init__(self, id: str, kind: str, params: dict[str, Any]):
+        self.id = id
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.progress: Any = None
+        self.result: Any = None
+        self.error: str | None = None
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.updated_at = self.created_at
+        self.task: asyncio.Task | None = None
+        self._version = 0
+        self._changed = asyncio.Event()
+        self._store_lock = asyncio.Lock()
+        self._progress_store: asyncio.Task | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def expired(self, ttl: float, now: float | None = None) -> bool:
+        return self.finished_at is not None and (now or time.time()) - self.finished_at > ttl
+
+    def stale(self, now: float | None = None) -> bool:
+        return not self.finished and (now or time.time()) - self.updated_at > JOB_STALE_AFTER
+
+    def notify(self) -> None:
+        self._version += 1
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def updates(self) -> AsyncIterator[dict[str, Any]]:
+        """The job's state now and after every change, ending once it has finished."""
+        while True:
+            changed = self._changed
+            yield self.to_dict()
+            if self.finished:
+                return
+            await changed.wait()
+
+    def to_dict(self) -> dict[str, Any]:
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "updated_at": self.updated_at,
+        }
+        if self.status == "done":
+            data["result"] = self.result
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Job":
+        job = cls(data["id"], data["kind"], data["params"])
+        for field in ("status", "progress", "error", "created_at", "started_at", "finished_at"):
+            setattr(job, field, data[field])
+        job.updated_at = data.get("updated_at", job.created_at)
+        job.result = data.get("result")
+        return job
+
+
+class JobManager:
+    """Runs long computations as background jobs that clients poll or stream.
+
+    A job's id is the hash of its type and parameters, so submitting the same
+    inputs while a job runs, or within ``ttl`` of it finishing, returns that
+    job instead of starting another; failed jobs are re-run. Each job type has
+    its own concurrency limit; jobs beyond it wait as ``queued``.
+
+    With a shared cache backend every state change is stored there too, so
+    any worker can answer status polls and reuse running or finished jobs,
+    and finished results survive restarts. Progress is written at most every
+    ``JOB_PROGRESS_INTERVAL`` and unfinished jobs are rewritten every
+    ``JOB_HEARTBEAT_INTERVAL``; one whose record goes ``JOB_STALE_AFTER``
+    without a write lost its worker and is reported failed, so it is re-run.
+    Records older than ``ttl`` are purged from the backend.
+    """
+
+    def __init__(self, backend: CacheBackend | None = None, ttl: float = JOB_RESULT_TTL):
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        self._handlers: dict[str, JobHandler] = {}
+        self._limits: dict[str, asyncio.Semaphore] = {}
+        self._concurrency: dict[str, int] = {}
+        self._jobs: dict[str, Job] = {}
+        self._purged_at = 0.0
+        self.submitted = 0
+        self.deduplicated = 0
+
+    def register(self, kind: str, handler: JobHandler, concurrency: int = 1) -> None:
+        """``handler(params, report)`` computes the result; ``report(progress)`` publishes progress."""
+        self._handlers[kind] = handler
+        self._limits[kind] = asyncio.Semaphore(concurrency)
+        self._concurrency[kind] = concurrency
+
+    async def submit(self, kind: str, params: dict[str, Any]) -> Job:
+        if kind not in self._handlers:
+            raise UnknownJobType(kind)
+        self.submitted += 1
+        await self._sweep()
+        id = job_id(kind, params)
+        existing = await self.get(id)
+        if existing is not None and existing.status != "failed":
+            self.deduplicated += 1
+            return existing
+
+        job = Job(id, kind, params)
+        self._jobs[id] = job
+        await self._store(job)
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    async def get(self, id: str) -> Job | None:
+        job = self._jobs.get(id)
+        if job is None and self.backend.shared:
+            stored = await self.backend.get(f"job:{id}")
+            if stored is not None:
+                job = Job.from_dict(stored[0])
+                if job.stale():
+                    job.status, job.error = "failed", "worker stopped responding"
+        if job is None or job.expired(self.ttl):
+            return None
+        return job
+
+    async def updates(self, job: Job) -> AsyncIterator[dict[str, Any]]:
+        """Stream a job's state until it finishes; jobs running on another worker are polled."""
+        if self._jobs.get(job.id) is job:
+            async for update in job.updates():
+                yield update
+            return
+        while job is not None:
+            yield job.to_dict()
+            if job.finished:
+                return
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+            job = await self.get(job.id)
+
+    async def _run(self, job: Job) -> None:
+        def report(progress: Any) -> None:
+            job.progress = progress
+            job.notify()
+            pending = job._progress_store is not None and not job._progress_store.done()
+            if self.backend.shared and not pending and time.time() - job.updated_at >= JOB_PROGRESS_INTERVAL:
+                job._progress_store = asyncio.create_task(self._store(job))
+
+        heartbeat = asyncio.create_task(self._heartbeat(job)) if self.backend.shared else None
+        try:
+            async with self._limits[job.kind]:
+                job.status, job.started_at = "running", time.time()
+                await self._changed(job)
+                job.result = await self._handlers[job.kind](job.params, report)
+                job.status = "done"
+        except asyncio.CancelledError:
+            job.status, job.error = "failed", "cancelled"
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job.kind} {job.id} failed")
+            job.status, job.error = "failed", str(e) or type(e).__name__
+        finally:
+            job.finished_at = time.time()
+            if heartbeat is not None:
+                heartbeat.cancel()
+            await asyncio.shield(self._changed(job))
+
+    async def _changed(self, job: Job) -> None:
+        job.notify()
+        await self._store(job)
+
+    async def _store(self, job: Job) -> None:
+        if not self.backend.shared:
+            return
+        # Writes are serialized and snapshot the job once they hold the lock, so a
+        # progress write that was scheduled earlier never overwrites a later state
+        async with job._store_lock:
+            job.updated_at = time.time()
+            await self.backend.set(f"job:{job.id}", job.to_dict(), job.updated_at)
+
+    async def _heartbeat(self, job: Job) -> None:
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+            if time.time() - job.updated_at >= JOB_HEARTBEAT_INTERVAL:
+                await asyncio.shield(self._store(job))
+
+    async def _sweep(self) -> None:
+        now = time.time()
+        for id in [id for id, job in self._jobs.items() if job.expired(self.ttl, now)]:
+            del self._jobs[id]
+        if self.backend.shared and now - self._purged_at >= JOB_PURGE_INTERVAL:
+            self._purged_at = now
+            # A record is last written when its job finishes or its worker dies
+            await self.backend.purge("job:", now - self.ttl)
+
+    async def shutdown(self) -> None:
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        types = {}
+        for kind, limit in self._concurrency.items():
+            jobs = [job for job in self._jobs.values() if job.kind == kind]
+            types[kind] = {
+                "concurrency": limit,
+                **{
+                    status: sum(job.status == status for job in jobs)
+                    for status in ("queued", "running", "done", "failed")
+                },
+            }
+        return {"submitted": self.submitted, "deduplicated": self.deduplicated, "ttl": self.ttl, "types": types}
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any
+
+from loguru import logger
+
+from .metrics import REGISTRY, Counter, Histogram
+
+LOOP_SAMPLE_INTERVAL = 0.1  # seconds between scheduling-delay samples
+LOOP_STALL_THRESHOLD = float(os.getenv("FPL_LOOP_STALL_THRESHOLD", "0.25"))  # seconds without a sample
+MAX_STALL_SAMPLES = 20
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LOOP_LAG = REGISTRY.register(
+    Histogram("fpl_event_loop_lag_seconds", "Delay between a timer's due time and when it ran.", buckets=LAG_BUCKETS)
+)
+LOOP_STALLS = REGISTRY.register(Counter("fpl_event_loop_stalls_total", "Times the event loop was blocked too long."))
+
+
+class LoopMonitor:
+    """Measures event-loop scheduling delay and catches code that blocks the loop.
+
+    A task on the loop sleeps for ``interval`` and records how late it wakes
+    up. A watchdog thread checks that those wake-ups keep coming; once none
+    has happened for ``threshold`` seconds the loop is blocked right now, so
+    it captures the loop thread's stack (which shows the blocking coroutine)
+    and logs it, once per stall.
+    """
+
+    def __init__(self, interval: float = LOOP_SAMPLE_INTERVAL, threshold: float = LOOP_STALL_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls: deque[dict[str, Any]] = deque(maxlen=MAX_STALL_SAMPLES)
+        self.stall_count = 0
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._stop = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start sampling the running loop; must be called from a coroutine on it."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _sample(self) -> None:
+        while True:
+            due = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            lag = max(0.0, now - due)
+            LOOP_LAG.observe(lag)
+            if lag >= self.threshold and self.stalls:
+                # The watchdog reported the stall while it was ongoing; record its full length
+                self.stalls[-1]["blocked_for"] = round(lag, 3)
+
+    def _watch(self) -> None:
+        stalled_since: float | None = None
+        while not self._stop.wait(min(self.interval, self.threshold / 2)):
+            beat = self._last_beat
+            if time.monotonic() - beat < self.threshold:
+                stalled_since = None
+                continue
+            if stalled_since == beat:
+                continue  # already reported this stall
+            stalled_since = beat
+            self._report()
+
+    def _report(self) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id) if self._loop_thread_id else None
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        blocked_for = time.monotonic() - self._last_beat
+        LOOP_STALLS.inc()
+        self.stall_count += 1
+        self.stalls.append({"at": time.time(), "blocked_for": round(blocked_for, 3), "stack": stack})
+        logger.warning(f"Event loop blocked for {blocked_for:.2f}s, loop thread stack:\n{stack}")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "threshold": self.threshold,
+            "stalls": self.stall_count,
+            "recent_stalls": list(self.stalls),
+        }
@@ -1,16 +1,32 @@
+import asyncio
+import json
 import os
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
 
-from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from loguru import logger
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from .analysis_service import AnalysisService
+from .cache_backend import create_cache_backend
 from .form_service import FormService
 from .fpl_service import FPLService
+from .history_service import HistoryService
+from .jobs import JobManager
+from .loop_monitor import LoopMonitor
+from .metrics import HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS, REGISTRY, cache_metrics
 from .models import AnalysisRequest, AnalysisResponse, Fixture, Team
+from .solver import SOLVER_TIME_LIMIT, SolverBusyError
+from .tracing import TRACE_HEADER, start_trace
+from .warmup import Warmup
+
+if TYPE_CHECKING:
+    from .analysis_service import AnalysisService
+    from .ml_service import MLService
 
 
 class AuthCallbackRequest(BaseModel):
@@ -21,7 +37,45 @@ class RefreshTokenRequest(BaseModel):
     refresh_token: str
 
 
-app = FastAPI(title="FPL Alpha API")
+class TopManagersJobRequest(BaseModel):
+    gw: int | None = Field(None, ge=1, le=38)
+    count: int = Field(2000, ge=5, le=2000)
+
+
+class SolveJobRequest(BaseModel):
+    budget: float = Field(100.0, ge=50.0, le=200.0)
+    min_gw: int | None = Field(None, ge=1, le=38)
+    max_gw: int | None = Field(None, ge=1, le=38)
+    exclude_bench: bool = False
+    exclude_unavailable: bool = False
+    use_ml: bool = False
+    time_limit: float = Field(SOLVER_TIME_LIMIT, gt=0, le=60)
+    gap: float = Field(0.0, ge=0.0, le=0.2)
+
+
+class AggregatedPlayersJobRequest(BaseModel):
+    min_gw: int = Field(1, ge=1, le=38)
+    max_gw: int = Field(38, ge=1, le=38)
+    venue: str = Field("both", pattern="^(both|home|away)$")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep bootstrap/fixtures warm ahead of their TTLs so requests don't pay the miss
+    refresher = asyncio.create_task(fpl_service.run_refresh_loop())
+    loop_monitor.start()
+    warmup.start()
+    yield
+    await warmup.stop()
+    await jobs.shutdown()
+    loop_monitor.stop()
+    refresher.cancel()
+    await asyncio.gather(refresher, return_exceptions=True)
+    fpl_service.shutdown_solver()
+    await FPLService.close_client()
+
+
+app = FastAPI(title="FPL Alpha API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -46,13 +100,87 @@ async def global_exception_handler(request, call_next):
         )
 
 
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """Time service calls and upstream requests, reported in a Server-Timing header.
+
+    With an ``X-Debug-Trace`` request header the full span tree is also logged
+    as JSON under the trace id returned in ``X-Trace-Id``.
+    """
+    with start_trace() as trace:
+        response = await call_next(request)
+        response.headers["Server-Timing"] = trace.server_timing()
+        response.headers["X-Trace-Id"] = trace.id
+        if TRACE_HEADER in request.headers:
+            logger.info(f"Trace {request.method} {request.url.path}: {trace.to_json()}")
+        return response
+
+
+# Added last so it wraps the exception handler and also sees its 500s
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    HTTP_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        # Route templates, not raw paths, keep label values bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUESTS.inc(method=request.method, route=route, status=status)
+        HTTP_LATENCY.observe(time.perf_counter() - started, method=request.method, route=route)
+
+
 fpl_service = FPLService()
-analysis_service = AnalysisService()
+loop_monitor = LoopMonitor()
 form_service = FormService()
 
+# DSPy/OpenAI and scikit-learn take seconds to import, so the services that need
+# them are built in a worker thread on first use (or by the warmup) instead of at import
+_analysis_service: "AnalysisService | None" = None
+_analysis_lock = asyncio.Lock()
+
+
+def _build_analysis_service() -> "AnalysisService":
+    from .analysis_service import AnalysisService
+
+    return AnalysisService()
+
+
+def _build_ml_service() -> "MLService":
+    from .ml_service import MLService
+
+    return MLService()
+
+
+async def get_analysis_service() -> "AnalysisService":
+    global _analysis_service
+    if _analysis_service is None:
+        async with _analysis_lock:
+            if _analysis_service is None:
+                _analysis_service = await asyncio.to_thread(_build_analysis_service)
+    return _analysis_service
+
+
+# Loaded in the background at startup; readiness waits for the data every page needs
+warmup = Warmup(
+    {
+        "bootstrap": fpl_service.get_bootstrap_snapshot,
+        "fixtures": fpl_service.get_fixture_index,
+        "history": HistoryService().warm,
+        "analysis": get_analysis_service,
+    },
+    required={"bootstrap", "fixtures", "history"},
+)
+REGISTRY.add_collector(lambda: cache_metrics(fpl_service.get_cache_stats()))
+
 
 @app.post("/api/analyze", response_model=AnalysisResponse, tags=["Analysis"])
 async def analyze_team(request: AnalysisRequest):
+    analysis_service = await get_analysis_service()
     return await analysis_service.analyze_team(request)
 
 
@@ -178,6 +306,45 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/api/health/live", tags=["System"])
+async def liveness_check():
+    """The process is up and serving; says nothing about warm caches."""
+    return {"status": "ok"}
+
+
+@app.get("/api/health/ready", tags=["System"])
+async def readiness_check():
+    """200 once startup warmup has loaded the required data, 503 with progress until then."""
+    progress = warmup.progress()
+    if not progress["ready"]:
+        return JSONResponse({"status": "warming", **progress}, status_code=503)
+    return {"status": "ready", **progress}
+
+
+@app.get("/api/cache/policy", tags=["System"])
+async def get_cache_policy():
+    """Current calendar phase, per-resource TTLs and cached entry ages."""
+    return fpl_service.get_cache_policy()
+
+
+@app.get("/api/metrics", tags=["System"], response_class=PlainTextResponse)
+async def get_metrics():
+    """Request, upstream and cache metrics in the Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/api/loop/stalls", tags=["System"])
+async def get_loop_stalls():
+    """Recent event-loop stalls with the stack of the code that blocked the loop."""
+    return loop_monitor.stats()
+
+
+@app.get("/api/cache/stats", tags=["System"])
+async def get_cache_stats():
+    """Entries, estimated bytes, hit rates and evictions per in-process cache namespace."""
+    return fpl_service.get_cache_stats()
+
+
 @app.get("/api/analysis/top-managers", tags=["Analysis"])
 async def get_top_managers_analysis(
     gw: int | None = Query(None, ge=1, le=38),
@@ -187,37 +354,113 @@ async def get_top_managers_analysis(
     return data
 
 
+@app.get("/api/analysis/top-managers/stream", tags=["Analysis"])
+async def stream_top_managers_analysis(
+    gw: int | None = Query(None, ge=1, le=38),
+    count: int = Query(1000, ge=5, le=2000),
+    every: int = Query(100, ge=10, le=1000),
+):
+    """NDJSON: partial aggregates every ``every`` managers, the last line has ``progress.complete``."""
+
+    async def lines():
+        async for summary in fpl_service.stream_top_managers_ownership(gw, count, every):
+            yield json.dumps(summary) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+RANK_BANDS_PATTERN = r"^\d+-\d+(,\d+-\d+)*$"
+
+
+def _parse_rank_bands(bands: str) -> list[tuple[int, int]]:
+    # Rank bands are 1-based and inclusive, e.g. "501-1000"
+    parsed = []
+    for band in bands.split(","):
+        first, last = (int(x) for x in band.split("-"))
+        if not 1 <= first <= last <= 2000:
+            raise HTTPException(status_code=422, detail=f"Invalid rank band {band}")
+        parsed.append((first - 1, last))
+    return parsed
+
+
+@app.get("/api/analysis/top-managers/bands", tags=["Analysis"])
+async def get_top_managers_bands(
+    gw: int | None = Query(None, ge=1, le=38),
+    bands: str = Query("1-10,1-100,1-1000", pattern=RANK_BANDS_PATTERN),
+):
+    data = await fpl_service.get_top_manager_bands(gw, _parse_rank_bands(bands))
+    return data
+
+
+@app.get("/api/analysis/top-managers/trends", tags=["Analysis"])
+async def get_top_managers_trends(
+    gw: int | None = Query(None, ge=2, le=38),
+    bands: str = Query("1-100,1-1000", pattern=RANK_BANDS_PATTERN),
+):
+    """What the top managers (ranked in ``gw``) transferred in and out and who they captained since ``gw - 1``."""
+    data = await fpl_service.get_top_manager_trends(gw, _parse_rank_bands(bands))
+    return data
+
+
+async def _cancel_on_disconnect(request: Request, coro, poll_interval: float = 0.5):
+    """Await ``coro``, cancelling it if the client goes away first."""
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info(f"Client disconnected, cancelling {request.url.path}")
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        task.cancel()
+
+
+async def _ml_predictions(min_gw: int | None) -> dict[int, float]:
+    target_gw = min_gw or await fpl_service.get_next_gameweek_id()
+    ml_service = await asyncio.to_thread(_build_ml_service)
+    return await ml_service.predict_next_gw(target_gw)
+
+
 @app.get("/api/optimization/solve", tags=["Solver"])
 async def solve_optimization(
+    request: Request,
     budget: float = Query(100.0, ge=50.0, le=200.0),
     min_gw: int | None = Query(None, ge=1, le=38),
     max_gw: int | None = Query(None, ge=1, le=38),
     exclude_bench: bool = False,
     exclude_unavailable: bool = False,
     use_ml: bool = False,
+    time_limit: float = Query(SOLVER_TIME_LIMIT, gt=0, le=60),
+    gap: float = Query(0.0, ge=0.0, le=0.2),
 ):
-    predictions = None
-    if use_ml:
-        target_gw = min_gw
-        if not target_gw:
-            target_gw = await fpl_service.get_next_gameweek_id()
-
-        from .ml_service import MLService
-
-        ml_service = MLService()
-        predictions = await ml_service.predict_next_gw(target_gw)
-
-    data = await fpl_service.get_optimized_team(
-        budget,
-        min_gw,
-        max_gw,
-        exclude_bench,
-        exclude_unavailable,
-        predictions=predictions,
-    )
+    predictions = await _ml_predictions(min_gw) if use_ml else None
+    try:
+        data = await _cancel_on_disconnect(
+            request,
+            fpl_service.get_optimized_team(
+                budget,
+                min_gw,
+                max_gw,
+                exclude_bench,
+                exclude_unavailable,
+                predictions=predictions,
+                time_limit=time_limit,
+                gap_rel=gap,
+            ),
+        )
+    except SolverBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"}) from e
     return data
 
 
+@app.get("/api/optimization/stats", tags=["Solver"])
+async def get_solver_stats():
+    return fpl_service.get_solver_stats()
+
+
 @app.get("/api/optimization/fixtures", tags=["Solver"])
 async def get_fixture_analysis(gw: int | None = None):
     data = await fpl_service.get_advanced_fixtures(gw)
@@ -255,6 +498,107 @@ async def get_current_gameweek():
     return {"gameweek": status["id"], "status": status}
 
 
+# --- Background jobs ---
+# Crawls, solves and training that outlast an HTTP request run as jobs that are polled or streamed
+
+
+async def _top_managers_job(params: dict, report) -> dict:
+    gw = params["gw"] or await fpl_service.get_current_gameweek()
+    fetched = 0
+
+    def on_picks(entry: int, picks: dict) -> None:
+        nonlocal fetched
+        fetched += 1
+        report({"fetched": fetched, "count": params["count"]})
+
+    await fpl_service.get_top_manager_matrix(gw, params["count"], on_picks=on_picks)
+    return await fpl_service.get_top_managers_ownership(gw, params["count"])
+
+
+async def _solve_job(params: dict, report) -> dict:
+    predictions = await _ml_predictions(params["min_gw"]) if params["use_ml"] else None
+    return await fpl_service.get_optimized_team(
+        params["budget"],
+        params["min_gw"],
+        params["max_gw"],
+        params["exclude_bench"],
+        params["exclude_unavailable"],
+        predictions=predictions,
+        time_limit=params["time_limit"],
+        gap_rel=params["gap"],
+    )
+
+
+async def _aggregated_players_job(params: dict, report) -> list[dict]:
+    return await fpl_service.get_aggregated_player_stats(params["min_gw"], params["max_gw"], params["venue"])
+
+
+async def _train_model_job(params: dict, report) -> dict:
+    ml_service = await asyncio.to_thread(_build_ml_service)
+    report({"stage": "collecting"})
+    df = await ml_service.collect_training_data()
+    report({"stage": "training", "examples": len(df)})
+    score = await ml_service.train_model(df)
+    return {"examples": len(df), "score": score}
+
+
+jobs = JobManager(create_cache_backend())
+jobs.register("top_managers", _top_managers_job, concurrency=1)  # shares the upstream rate limit
+jobs.register("solve", _solve_job, concurrency=2)
+jobs.register("aggregated_players", _aggregated_players_job, concurrency=2)
+jobs.register("train_model", _train_model_job, concurrency=1)
+
+
+@app.post("/api/jobs/top-managers", status_code=202, tags=["Jobs"])
+async def submit_top_managers_job(request: TopManagersJobRequest):
+    return (await jobs.submit("top_managers", request.model_dump())).to_dict()
+
+
+@app.post("/api/jobs/solve", status_code=202, tags=["Jobs"])
+async def submit_solve_job(request: SolveJobRequest):
+    return (await jobs.submit("solve", request.model_dump())).to_dict()
+
+
+@app.post("/api/jobs/players-aggregated", status_code=202, tags=["Jobs"])
+async def submit_aggregated_players_job(request: AggregatedPlayersJobRequest):
+    return (await jobs.submit("aggregated_players", request.model_dump())).to_dict()
+
+
+@app.post("/api/jobs/train-model", status_code=202, tags=["Jobs"])
+async def submit_train_model_job():
+    return (await jobs.submit("train_model", {})).to_dict()
+
+
+@app.get("/api/jobs", tags=["Jobs"])
+async def get_job_stats():
+    return jobs.stats()
+
+
+async def _get_job(job_id: str):
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@app.get("/api/jobs/{job_id}", tags=["Jobs"])
+async def get_job(job_id: str):
+    """Status and progress of a job; ``result`` is included once ``status`` is ``done``."""
+    return (await _get_job(job_id)).to_dict()
+
+
+@app.get("/api/jobs/{job_id}/stream", tags=["Jobs"])
+async def stream_job(job_id: str):
+    """NDJSON: the job's state on every change; the last line has a ``done`` or ``failed`` status."""
+    job = await _get_job(job_id)
+
+    async def lines():
+        async for update in jobs.updates(job):
+            yield json.dumps(update) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 # Serve static files
 
 
@@ -0,0 +1,227 @@
+import re
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_START = "metrics_start"  # httpx request extension holding the send time
+
+_ID_SEGMENT = re.compile(r"^\d+$")
+_SEASON_SEGMENT = re.compile(r"^\d{4}-\d{2}$")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], Any] = {}
+
+    def _key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...], extra: dict[str, str] | None = None) -> str:
+        pairs = [*zip(self.labelnames, key), *(extra or {}).items()]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def _samples(self) -> Iterable[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{self._labels(key)} {_format_value(value)}"
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = (*sorted(buckets), float("inf"))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state["counts"][i] += 1
+                break
+        state["sum"] += value
+        state["count"] += 1
+
+    def _samples(self) -> Iterable[str]:
+        for key, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                yield f"{self.name}_bucket{self._labels(key, {'le': _format_value(bound)})} {cumulative}"
+            yield f"{self.name}_sum{self._labels(key)} {_format_value(state['sum'])}"
+            yield f"{self.name}_count{self._labels(key)} {state['count']}"
+
+
+class Registry:
+    """Process-local metrics rendered in the Prometheus text exposition format.
+
+    Metrics are updated in place by the middleware and the httpx hooks;
+    collectors build additional metrics from existing stats at scrape time.
+    """
+
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], Iterable[_Metric]]] = []
+
+    def register(self, metric: _Metric) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[_Metric]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in [*self._metrics, *(m for collect in self._collectors for m in collect())]:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        for metric in self._metrics:
+            metric._values.clear()
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter("fpl_http_requests_total", "API requests by route and status.", ("method", "route", "status"))
+)
+HTTP_LATENCY = REGISTRY.register(
+    Histogram("fpl_http_request_duration_seconds", "API request latency to response headers.", ("method", "route"))
+)
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge("fpl_http_requests_in_flight", "API requests being handled."))
+UPSTREAM_REQUESTS = REGISTRY.register(
+    Counter(
+        "fpl_upstream_requests_total", "Upstream HTTP requests by host, path and status.", ("host", "path", "status")
+    )
+)
+UPSTREAM_LATENCY = REGISTRY.register(
+    Histogram("fpl_upstream_request_duration_seconds", "Upstream request latency including body.", ("host", "path"))
+)
+UPSTREAM_BYTES = REGISTRY.register(
+    Counter("fpl_upstream_response_bytes_total", "Upstream response body bytes.", ("host", "path"))
+)
+
+
+def path_template(path: str) -> str:
+    """Replace ids and seasons in an upstream path so label values stay bounded."""
+    segments = []
+    for segment in path.split("/"):
+        if _ID_SEGMENT.match(segment):
+            segment = "{id}"
+        elif _SEASON_SEGMENT.match(segment):
+            segment = "{season}"
+        segments.append(segment)
+    return "/".join(segments)
+
+
+async def _record_upstream_request(request: httpx.Request) -> None:
+    request.extensions[_START] = time.perf_counter()
+
+
+async def _record_upstream_response(response: httpx.Response) -> None:
+    request = response.request
+    # Reading here is what the caller does next anyway; it lets the body size and time be counted
+    await response.aread()
+    parts = urlsplit(str(request.url))
+    host, path = parts.hostname or "", path_template(parts.path)
+    UPSTREAM_REQUESTS.inc(host=host, path=path, status=response.status_code)
+    UPSTREAM_BYTES.inc(len(response.content), host=host, path=path)
+    started = request.extensions.get(_START)
+    if started is not None:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - started, host=host, path=path)
+
+
+# For httpx.AsyncClient(event_hooks=...)
+UPSTREAM_EVENT_HOOKS = {"request": [_record_upstream_request], "response": [_record_upstream_response]}
+
+
+def cache_metrics(stats: dict[str, Any]) -> list[_Metric]:
+    """Cache gauges and counters built from ``CacheManager.stats()``."""
+    entries = Gauge("fpl_cache_entries", "Entries per cache namespace.", ("namespace",))
+    size = Gauge("fpl_cache_bytes", "Estimated bytes per cache namespace.", ("namespace",))
+    budget = Gauge("fpl_cache_max_bytes", "Byte budget per cache namespace.", ("namespace",))
+    counters = {
+        name: Counter(f"fpl_cache_{name}_total", f"Cache {name} per namespace.", ("namespace",))
+        for name in ("hits", "misses", "evictions", "expirations")
+    }
+    for namespace, ns in stats["namespaces"].items():
+        entries.set(ns["entries"], namespace=namespace)
+        size.set(ns["bytes"], namespace=namespace)
+        budget.set(ns["max_bytes"], namespace=namespace)
+        for name, counter in counters.items():
+            counter.inc(ns[name], namespace=namespace)
+    working_set = Gauge("fpl_working_set_bytes", "Bytes of derived in-memory structures.", ("name",))
+    for name, ws in stats.get("working_sets", {}).items():
+        working_set.set(ws["bytes"], name=name)
+    coalescing = _single_flight_metrics(stats["single_flight"]) if "single_flight" in stats else []
+    return [entries, size, budget, *counters.values(), working_set, *coalescing]
+
+
+def _single_flight_metrics(stats: dict[str, Any]) -> list[_Metric]:
+    # Waiters are summed rather than labelled by key, which would be an unbounded label
+    calls = Counter("fpl_upstream_coalesced_calls_total", "Upstream GETs requested through single-flight.")
+    shared = Counter("fpl_upstream_coalesced_shared_total", "Upstream GETs served by a call already in flight.")
+    in_flight = Gauge("fpl_upstream_coalesced_in_flight", "Distinct upstream GETs currently in flight.")
+    waiters = Gauge("fpl_upstream_coalesced_waiters", "Callers currently awaiting an in-flight upstream GET.")
+    calls.inc(stats["calls"])
+    shared.inc(stats["shared"])
+    in_flight.set(stats["in_flight"])
+    waiters.set(sum(stats["waiters"].values()))
+    return [calls, shared, in_flight, waiters]
@@ -1,17 +1,13 @@
 import asyncio
 import logging
 import os
+import threading
 
-import joblib
 import numpy as np
 import polars as pl
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.impute import SimpleImputer
-from sklearn.model_selection import train_test_split
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import StandardScaler
 
 from .fpl_service import FPLService
+from .tracing import trace_methods
 
 logger = logging.getLogger("ml_service")
 logger.setLevel(logging.INFO)
@@ -21,21 +17,39 @@ MODEL_FILE = os.path.join(DATA_DIR, "fpl_points_model.pkl")
 TRAINING_DATA_FILE = os.path.join(DATA_DIR, "training_data.csv")
 
 
+@trace_methods()
 class MLService:
+    # The model file is read once per process and shared by every instance
+    _shared_model = None
+    _model_loaded = False
+    _model_lock = threading.Lock()
+
     def __init__(self):
         self.fpl_service = FPLService()
         self.model = None
         self._load_model()
 
+    @classmethod
+    def load_shared_model(cls):
+        """Load the model on first call; blocks for seconds (unpickling imports scikit-learn)."""
+        with cls._model_lock:
+            if cls._model_loaded:
+                return cls._shared_model
+            if os.path.exists(MODEL_FILE):
+                try:
+                    import joblib
+
+                    cls._shared_model = joblib.load(MODEL_FILE)
+                    logger.info("Loaded FPL ML Model.")
+                except Exception as e:
+                    logger.error(f"Failed to load model: {e}")
+            else:
+                logger.warning("No ML model found. Training required.")
+            cls._model_loaded = True
+            return cls._shared_model
+
     def _load_model(self):
-        if os.path.exists(MODEL_FILE):
-            try:
-                self.model = joblib.load(MODEL_FILE)
-                logger.info("Loaded FPL ML Model.")
-            except Exception as e:
-                logger.error(f"Failed to load model: {e}")
-        else:
-            logger.warning("No ML model found. Training required.")
+        self.model = self.load_shared_model()
 
     async def collect_training_data(self) -> pl.DataFrame:
         """
@@ -45,9 +59,9 @@ class MLService:
         logger.info("Starting data collection...")
         os.makedirs(DATA_DIR, exist_ok=True)
 
-        bootstrap = await self.fpl_service.get_bootstrap_static()
-        elements = bootstrap["elements"]
-        teams = {t["id"]: t for t in bootstrap["teams"]}
+        snapshot = await self.fpl_service.get_bootstrap_snapshot()
+        elements = snapshot.elements
+        teams = snapshot.teams_by_id
 
         candidates = [p for p in elements if p["total_points"] > 0 or p["minutes"] > 0]
 
@@ -196,6 +210,14 @@ class MLService:
 
     def _train_model_sync(self, df: pl.DataFrame | None = None):
         """Synchronous model training — call via asyncio.to_thread."""
+        # scikit-learn takes seconds to import, so it is only imported by training and model loading
+        import joblib
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.impute import SimpleImputer
+        from sklearn.model_selection import train_test_split
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler
+
         if df is None:
             if os.path.exists(TRAINING_DATA_FILE):
                 try:
@@ -253,7 +275,8 @@ class MLService:
         os.makedirs(DATA_DIR, exist_ok=True)
         joblib.dump(pipeline, MODEL_FILE)
 
-        self.model = pipeline
+        self.model = MLService._shared_model = pipeline
+        MLService._model_loaded = True
         return score
 
     async def train_model(self, df: pl.DataFrame | None = None):
@@ -276,10 +299,10 @@ class MLService:
         if not self.model:
             return {}
 
-        bootstrap = await self.fpl_service.get_bootstrap_static()
-        elements = bootstrap["elements"]
+        snapshot = await self.fpl_service.get_bootstrap_snapshot()
+        elements = snapshot.elements
 
-        current_gw_id = await self.fpl_service.get_current_gameweek()
+        current_gw_id = snapshot.current_gameweek
 
         # Fetch last 3 GWs data
         start_gw = max(1, current_gw_id - 3)
@@ -304,8 +327,8 @@ class MLService:
                     player_stats[pid]["minutes"].append(stats["minutes"])
 
         # Fetch Fixtures
-        fixtures = await self.fpl_service.get_fixtures()
-        next_fixtures = [f for f in fixtures if f.event == gw]
+        fixture_index = await self.fpl_service.get_fixture_index()
+        next_fixtures = fixture_index.for_event(gw)
 
         player_fixture = {}  # pid -> {difficulty, is_home}
 
@@ -0,0 +1,146 @@
+from typing import Any
+
+import numpy as np
+
+from .models import Fixture
+
+VENUE_HOME = 0
+VENUE_AWAY = 1
+VENUE_OTHER = 2  # points with no known fixture, counted only when both venues are requested
+VENUES = {"home": (VENUE_HOME,), "away": (VENUE_AWAY,), "both": (VENUE_HOME, VENUE_AWAY, VENUE_OTHER)}
+
+POINTS = "points"
+APPEARANCES = "appearances"  # fixtures with minutes > 0
+MAX_GAMEWEEK = 38
+
+
+class PointsCube:
+    """Columnar players x gameweeks x venue totals built from ``event/{gw}/live/``.
+
+    Channels are total points, appearances and the ``value`` of every stat
+    identifier seen in ``explain`` (goals_scored, bonus, bps, ...). Cumulative
+    sums along the gameweek axis are kept up to date on ingest, so a
+    ``min_gw..max_gw`` total for any venue is one vectorised subtraction.
+    Gameweeks are ingested individually and may be re-ingested while live.
+    """
+
+    def __init__(self, max_gw: int = MAX_GAMEWEEK):
+        self.max_gw = max_gw
+        self.player_ids: list[int] = []
+        self.channels: list[str] = [POINTS, APPEARANCES]
+        self._rows: dict[int, int] = {}
+        self._channel_index: dict[str, int] = {POINTS: 0, APPEARANCES: 1}
+        # [channel, player, gameweek (index 0 unused), venue]
+        self._data = np.zeros((len(self.channels), 0, max_gw + 1, len(VENUES["both"])), dtype=np.int32)
+        self._prefix = self._data.copy()
+        self.final_gameweeks: set[int] = set()
+        self._sources: dict[int, Any] = {}  # live payloads of ingested, not-yet-final gameweeks
+
+    def clear(self) -> None:
+        self.__init__(self.max_gw)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the totals and their cumulative sums (source payloads live in the cache)."""
+        return self._data.nbytes + self._prefix.nbytes
+
+    @property
+    def gameweeks(self) -> set[int]:
+        return self.final_gameweeks | set(self._sources)
+
+    def needs(self, gw: int, payload: Any | None = None) -> bool:
+        """Whether ``gw`` must be (re-)ingested; final gameweeks never change."""
+        if gw in self.final_gameweeks:
+            return False
+        return payload is None or self._sources.get(gw) is not payload
+
+    def _grow(self, n_players: int, n_channels: int) -> None:
+        pad_channels = n_channels - self._data.shape[0]
+        pad_players = n_players - self._data.shape[1]
+        if pad_channels <= 0 and pad_players <= 0:
+            return
+        pad = ((0, max(0, pad_channels)), (0, max(0, pad_players)), (0, 0), (0, 0))
+        self._data = np.pad(self._data, pad)
+        self._prefix = np.pad(self._prefix, pad)
+
+    def _row(self, player_id: int) -> int:
+        row = self._rows.get(player_id)
+        if row is None:
+            row = self._rows[player_id] = len(self.player_ids)
+            self.player_ids.append(player_id)
+        return row
+
+    def _channel(self, name: str) -> int:
+        index = self._channel_index.get(name)
+        if index is None:
+            index = self._channel_index[name] = len(self.channels)
+            self.channels.append(name)
+        return index
+
+    def ingest(
+        self,
+        gw: int,
+        live_data: dict[str, Any],
+        fixtures_by_id: dict[int, Fixture],
+        team_of: dict[int, int],
+        final: bool = False,
+    ) -> None:
+        """Replace gameweek ``gw`` with ``live_data`` and refresh the cumulative sums.
+
+        ``team_of`` maps player id to team id, used with ``fixtures_by_id`` to
+        attribute each ``explain`` entry to the home or away venue.
+        """
+        if not 1 <= gw <= self.max_gw:
+            return
+
+        cells: list[tuple[int, int, int, int]] = []  # (channel, row, venue, value)
+        for el in live_data.get("elements", []):
+            row = self._row(el["id"])
+            team_id = team_of.get(el["id"])
+            attributed = 0
+            for expl in el.get("explain", []):
+                fixture = fixtures_by_id.get(expl.get("fixture"))
+                if fixture is None or team_id is None:
+                    venue = VENUE_OTHER
+                else:
+                    venue = VENUE_HOME if fixture.is_home_for(team_id) else VENUE_AWAY
+                stats = expl.get("stats", [])
+                fixture_points = sum(s["points"] for s in stats)
+                attributed += fixture_points
+                cells.append((0, row, venue, fixture_points))
+                for s in stats:
+                    cells.append((self._channel(s["identifier"]), row, venue, int(s["value"])))
+                    if s["identifier"] == "minutes" and s["value"] > 0:
+                        cells.append((1, row, venue, 1))
+            # Anything in total_points not explained by a fixture (e.g. late corrections)
+            remainder = el.get("stats", {}).get("total_points", 0) - attributed
+            if remainder:
+                cells.append((0, row, VENUE_OTHER, remainder))
+
+        self._grow(len(self.player_ids), len(self.channels))
+        self._data[:, :, gw, :] = 0
+        if cells:
+            channel, row, venue, value = (np.array(col) for col in zip(*cells))
+            np.add.at(self._data[:, :, gw, :], (channel, row, venue), value)
+        self._prefix[:, :, gw:, :] = self._prefix[:, :, gw - 1 : gw, :] + np.cumsum(self._data[:, :, gw:, :], axis=2)
+
+        if final:
+            self.final_gameweeks.add(gw)
+            self._sources.pop(gw, None)
+        else:
+            self._sources[gw] = live_data
+
+    def totals(self, channel: str, min_gw: int, max_gw: int, venue: str = "both") -> np.ndarray:
+        """Per-player sum of ``channel`` over ``min_gw..max_gw`` for ``venue``, aligned with ``player_ids``."""
+        index = self._channel_index.get(channel)
+        min_gw = max(1, min_gw)
+        max_gw = min(self.max_gw, max_gw)
+        if index is None or max_gw < min_gw:
+            return np.zeros(len(self.player_ids), dtype=np.int64)
+        venues = list(VENUES[venue])
+        window = self._prefix[index, :, max_gw, :] - self._prefix[index, :, min_gw - 1, :]
+        return window[:, venues].sum(axis=1, dtype=np.int64)
+
+    def totals_by_player(self, channel: str, min_gw: int, max_gw: int, venue: str = "both") -> dict[int, int]:
+        values = self.totals(channel, min_gw, max_gw, venue)
+        return dict(zip(self.player_ids, values.tolist()))
@@ -0,0 +1,62 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+class _Flight:
+    __slots__ = ("future", "waiters")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into a single in-flight task.
+
+    The first caller for a key starts the work; anyone arriving while it is
+    still running awaits the same future instead of repeating it. Once the
+    task settles the key is released, so later calls start fresh.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, _Flight] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._inflight[key] = flight
+            flight.future.add_done_callback(lambda f: self._release(key, f))
+        else:
+            self.shared += 1
+
+        flight.waiters += 1
+        try:
+            # shield: one caller being cancelled must not cancel the shared call
+            return await asyncio.shield(flight.future)
+        finally:
+            flight.waiters -= 1
+
+    def _release(self, key: str, future: asyncio.Future) -> None:
+        flight = self._inflight.get(key)
+        if flight is not None and flight.future is future:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not future.cancelled():
+            future.exception()
+
+    def waiters(self) -> dict[str, int]:
+        """Current number of callers awaiting each in-flight key."""
+        return {key: flight.waiters for key, flight in self._inflight.items()}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "shared": self.shared,
+            "waiters": self.waiters(),
+        }
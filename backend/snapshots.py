@@ -0,0 +1,139 @@
+from dataclasses import dataclass
+from typing import Any
+
+from .models import Fixture
+
+
+@dataclass(frozen=True, slots=True)
+class BootstrapSnapshot:
+    """Read-only lookup tables derived from one bootstrap-static payload.
+
+    Built once per bootstrap refresh and shared by every request, so handlers
+    never rebuild id maps or scan ``elements`` themselves. The contained dicts
+    and lists are shared too and must not be mutated.
+    """
+
+    raw: dict[str, Any]
+    elements_by_id: dict[int, dict[str, Any]]
+    teams_by_id: dict[int, dict[str, Any]]
+    events_by_id: dict[int, dict[str, Any]]
+    players_by_team: dict[int, tuple[dict[str, Any], ...]]
+    players_by_position: dict[int, tuple[dict[str, Any], ...]]
+    current_event: dict[str, Any] | None
+    next_event: dict[str, Any] | None
+
+    @classmethod
+    def from_bootstrap(cls, data: dict[str, Any]) -> "BootstrapSnapshot":
+        elements = data.get("elements", [])
+        events = data.get("events", [])
+
+        by_team: dict[int, list[dict[str, Any]]] = {}
+        by_position: dict[int, list[dict[str, Any]]] = {}
+        for p in elements:
+            by_team.setdefault(p["team"], []).append(p)
+            by_position.setdefault(p["element_type"], []).append(p)
+
+        return cls(
+            raw=data,
+            elements_by_id={p["id"]: p for p in elements},
+            teams_by_id={t["id"]: t for t in data.get("teams", [])},
+            events_by_id={e["id"]: e for e in events},
+            players_by_team={team_id: tuple(players) for team_id, players in by_team.items()},
+            players_by_position={pos: tuple(players) for pos, players in by_position.items()},
+            current_event=next((e for e in events if e.get("is_current")), None),
+            next_event=next((e for e in events if e.get("is_next")), None),
+        )
+
+    @property
+    def elements(self) -> list[dict[str, Any]]:
+        return self.raw.get("elements", [])
+
+    @property
+    def teams(self) -> list[dict[str, Any]]:
+        return self.raw.get("teams", [])
+
+    @property
+    def events(self) -> list[dict[str, Any]]:
+        return self.raw.get("events", [])
+
+    @property
+    def current_gameweek(self) -> int:
+        if self.current_event:
+            return self.current_event["id"]
+        # Fallback if no current (e.g. pre-season)
+        if self.next_event:
+            return max(1, self.next_event["id"] - 1)
+        return 38
+
+    @property
+    def next_gameweek(self) -> int:
+        return self.next_event["id"] if self.next_event else 38
+
+    def is_gameweek_final(self, gw: int) -> bool:
+        """A gameweek is final once FPL marks it finished and data-checked."""
+        event = self.events_by_id.get(gw)
+        return bool(event and event["finished"] and event["data_checked"])
+
+
+@dataclass(frozen=True, slots=True)
+class FixtureIndex:
+    """Read-only fixture lookups, built once per fixtures refresh.
+
+    ``by_team`` lists are ordered by gameweek (unscheduled fixtures last) and
+    ``by_event_team`` holds every fixture a team plays in a gameweek, so a
+    double gameweek yields two entries and a blank yields none.
+    """
+
+    fixtures: tuple[Fixture, ...]
+    by_id: dict[int, Fixture]
+    by_event: dict[int, tuple[Fixture, ...]]
+    by_team: dict[int, tuple[Fixture, ...]]
+    by_event_team: dict[tuple[int, int], tuple[Fixture, ...]]
+    by_kickoff: tuple[Fixture, ...]
+    team_ids: frozenset[int]
+
+    @classmethod
+    def from_fixtures(cls, fixtures: list[Fixture]) -> "FixtureIndex":
+        by_event: dict[int, list[Fixture]] = {}
+        by_team: dict[int, list[Fixture]] = {}
+        by_event_team: dict[tuple[int, int], list[Fixture]] = {}
+        for f in fixtures:
+            for team_id in (f.team_h, f.team_a):
+                by_team.setdefault(team_id, []).append(f)
+            if f.event is None:
+                continue
+            by_event.setdefault(f.event, []).append(f)
+            for team_id in (f.team_h, f.team_a):
+                by_event_team.setdefault((f.event, team_id), []).append(f)
+
+        return cls(
+            fixtures=tuple(fixtures),
+            by_id={f.id: f for f in fixtures},
+            by_event={event: tuple(fs) for event, fs in by_event.items()},
+            by_team={team_id: tuple(sorted(fs, key=lambda x: x.event or 999)) for team_id, fs in by_team.items()},
+            by_event_team={key: tuple(fs) for key, fs in by_event_team.items()},
+            by_kickoff=tuple(sorted(fixtures, key=lambda x: x.kickoff_time if x.kickoff_time else "")),
+            team_ids=frozenset(by_team),
+        )
+
+    def for_event(self, event: int) -> tuple[Fixture, ...]:
+        return self.by_event.get(event, ())
+
+    def for_events(self, first: int, last: int) -> list[Fixture]:
+        """All fixtures in gameweeks ``first``..``last`` inclusive, in gameweek order."""
+        return [f for event in range(first, last + 1) for f in self.by_event.get(event, ())]
+
+    def for_team(self, team_id: int) -> tuple[Fixture, ...]:
+        return self.by_team.get(team_id, ())
+
+    def for_event_team(self, event: int, team_id: int) -> tuple[Fixture, ...]:
+        return self.by_event_team.get((event, team_id), ())
+
+    def is_blank(self, event: int, team_id: int) -> bool:
+        return (event, team_id) not in self.by_event_team
+
+    def blank_teams(self, event: int) -> list[int]:
+        return sorted(t for t in self.team_ids if (event, t) not in self.by_event_team)
+
+    def double_teams(self, event: int) -> list[int]:
+        return sorted(t for t in self.team_ids if len(self.by_event_team.get((event, t), ())) > 1)
@@ -0,0 +1,229 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any
+
+from loguru import logger
+
+SOLVER_WORKERS = int(os.getenv("FPL_SOLVER_WORKERS", "2"))
+SOLVER_QUEUE_SIZE = int(os.getenv("FPL_SOLVER_QUEUE_SIZE", "8"))  # waiting solves beyond the busy workers
+SOLVER_TIME_LIMIT = 20  # seconds of CBC time per solve
+SOLVER_GAP_REL = 0.0  # relative MIP gap; 0 proves optimality
+SOLVE_TIME_SAMPLES = 200
+
+
+class SolverBusyError(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+def solve_squad(
+    players: list[dict[str, Any]],
+    budget: float,
+    exclude_bench: bool,
+    time_limit: float = SOLVER_TIME_LIMIT,
+    gap_rel: float = SOLVER_GAP_REL,
+) -> dict[str, Any]:
+    """Build and solve the squad selection MILP. Runs inside a worker process.
+
+    ``players`` only need ``id``, ``position``, ``team``, ``cost`` and ``points``.
+    Returns the selected and starting player ids plus solver status.
+    """
+    import pulp
+
+    started = time.perf_counter()
+    prob = pulp.LpProblem("FPL_Team_Optimization", pulp.LpMaximize)
+
+    # Decision Variables
+    # x[i] = 1 if player i is selected, 0 otherwise
+    player_vars = pulp.LpVariable.dicts("Player", [p["id"] for p in players], cat="Binary")
+    starter_vars = None
+
+    # Objective Function
+    if exclude_bench:
+        # If excluding bench points, we verify optimization based on Starting XI only.
+        # We need additional variables for "Starter".
+        starter_vars = pulp.LpVariable.dicts("Starter", [p["id"] for p in players], cat="Binary")
+
+        # Link Starter to Squad: if starter, must be in squad
+        for p in players:
+            prob += starter_vars[p["id"]] <= player_vars[p["id"]]
+
+        # 11 Starters
+        prob += (
+            pulp.lpSum([starter_vars[p["id"]] for p in players]) == 11,
+            "Starter Count",
+        )
+
+        # Formation Constraints (Starters)
+        # 1 GK
+        prob += (
+            pulp.lpSum([starter_vars[p["id"]] for p in players if p["position"] == 1]) == 1,
+            "Starter GKP",
+        )
+        # Min 3 DEF
+        prob += (
+            pulp.lpSum([starter_vars[p["id"]] for p in players if p["position"] == 2]) >= 3,
+            "Starter Min DEF",
+        )
+        # Min 1 FWD
+        prob += (
+            pulp.lpSum([starter_vars[p["id"]] for p in players if p["position"] == 4]) >= 1,
+            "Starter Min FWD",
+        )
+
+        # Objective: Maximize Starter Points - 0.001 * Total Cost (to prefer cheaper bench/squad)
+        prob += (
+            pulp.lpSum([p["points"] * starter_vars[p["id"]] for p in players])
+            - 0.001 * pulp.lpSum([p["cost"] * player_vars[p["id"]] for p in players]),
+            "Total Points",
+        )
+
+    else:
+        # Objective Function: Maximize Total Points (All 15)
+        prob += (
+            pulp.lpSum([p["points"] * player_vars[p["id"]] for p in players]),
+            "Total Points",
+        )
+
+    # Constraints
+
+    # 1. Budget Constraint
+    prob += (
+        pulp.lpSum([p["cost"] * player_vars[p["id"]] for p in players]) <= budget,
+        "Budget",
+    )
+
+    # 2. Squad Size (Exactly 15 players)
+    prob += pulp.lpSum([player_vars[p["id"]] for p in players]) == 15, "Squad Size"
+
+    # 3. Position Constraints
+    for position, count, label in ((1, 2, "GKP"), (2, 5, "DEF"), (3, 5, "MID"), (4, 3, "FWD")):
+        prob += (
+            pulp.lpSum([player_vars[p["id"]] for p in players if p["position"] == position]) == count,
+            f"{label} Count",
+        )
+
+    # 4. Max Players per Team (3)
+    teams = set(p["team"] for p in players)
+    for t in teams:
+        prob += (
+            pulp.lpSum([player_vars[p["id"]] for p in players if p["team"] == t]) <= 3,
+            f"Max Players Team {t}",
+        )
+
+    # Suppress output; the time limit bounds how long a worker can be held
+    prob.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit, gapRel=gap_rel))
+
+    selected = [p["id"] for p in players if pulp.value(player_vars[p["id"]]) == 1]
+    if starter_vars is not None:
+        starters = [pid for pid in selected if pulp.value(starter_vars[pid]) == 1]
+    else:
+        starters = list(selected)
+
+    return {
+        "status": pulp.LpStatus[prob.status],
+        "solution_status": pulp.LpSolution.get(getattr(prob, "sol_status", None), "Unknown"),
+        "selected": selected,
+        "starters": starters,
+        "solve_time": time.perf_counter() - started,
+    }
+
+
+class SolverPool:
+    """Runs MILP solves in a bounded process pool, off the event loop.
+
+    At most ``workers`` solves run at once and ``queue_size`` more may wait;
+    beyond that ``solve`` raises ``SolverBusyError`` instead of queueing
+    unboundedly. Cancelling a waiting ``solve`` (e.g. on client disconnect)
+    drops the job before it starts; a job already running is bounded by its
+    time limit and keeps its slot until it ends. The executor is created on
+    first use.
+    """
+
+    def __init__(self, workers: int = SOLVER_WORKERS, queue_size: int = SOLVER_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor: ProcessPoolExecutor | None = None
+        self._jobs: set[Future] = set()
+        self._solve_times: deque[float] = deque(maxlen=SOLVE_TIME_SAMPLES)
+        self._wait_times: deque[float] = deque(maxlen=SOLVE_TIME_SAMPLES)
+        self._counters = {"completed": 0, "failed": 0, "cancelled": 0, "rejected": 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def solve(
+        self,
+        players: list[dict[str, Any]],
+        budget: float,
+        exclude_bench: bool,
+        time_limit: float = SOLVER_TIME_LIMIT,
+        gap_rel: float = SOLVER_GAP_REL,
+    ) -> dict[str, Any]:
+        if len(self._jobs) >= self.workers + self.queue_size:
+            self._counters["rejected"] += 1
+            raise SolverBusyError(f"Solver busy: {len(self._jobs)} solves running or queued")
+
+        submitted = time.perf_counter()
+        job = self._get_executor().submit(solve_squad, players, budget, exclude_bench, time_limit, gap_rel)
+        self._jobs.add(job)
+        try:
+            result = await asyncio.wrap_future(job)
+        except asyncio.CancelledError:
+            if job.cancel():
+                logger.info("Solver job cancelled before it started")
+                self._jobs.discard(job)
+            else:
+                logger.info("Solver job abandoned while running; it will stop at its time limit")
+                # The process is still solving, so the job holds its slot until it ends.
+                # Done callbacks run on the executor's thread; hand the discard to the loop.
+                loop = asyncio.get_running_loop()
+                job.add_done_callback(lambda job: loop.call_soon_threadsafe(self._jobs.discard, job))
+            self._counters["cancelled"] += 1
+            raise
+        except Exception:
+            self._jobs.discard(job)
+            self._counters["failed"] += 1
+            raise
+        self._jobs.discard(job)
+
+        self._counters["completed"] += 1
+        self._solve_times.append(result["solve_time"])
+        self._wait_times.append(max(0.0, time.perf_counter() - submitted - result["solve_time"]))
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        running = sum(1 for job in self._jobs if job.running())
+        solve_times = sorted(self._solve_times)
+        return {
+            "workers": self.workers,
+            "queue_capacity": self.queue_size,
+            "running": running,
+            "queued": len(self._jobs) - running,
+            **self._counters,
+            "solve_time": _summary(solve_times),
+            "queue_wait": _summary(sorted(self._wait_times)),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _summary(samples: list[float]) -> dict[str, float | None]:
+    if not samples:
+        return {"avg": None, "p95": None, "max": None}
+    return {
+        "avg": round(sum(samples) / len(samples), 3),
+        "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "max": round(samples[-1], 3),
+    }
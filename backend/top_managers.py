@@ -0,0 +1,531 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import polars as pl
+from loguru import logger
+
+STANDINGS_PAGE_SIZE = 50
+MAX_SAMPLED_GAMEWEEKS = 2  # current GW and the reference GW used by analysis
+TOP_MANAGER_REQUEST_RATE = float(os.getenv("FPL_TOP_MANAGER_REQUEST_RATE", "50"))  # upstream requests per second
+PICKS_WORKERS = 16  # concurrent picks requests; the rate limiter sets the pace
+PICKS_QUEUE_SIZE = 4 * STANDINGS_PAGE_SIZE
+TOP_MANAGERS_DIR = os.getenv("FPL_TOP_MANAGERS_DIR", os.path.join("data", "top_managers"))
+
+SQUAD_SIZE = 15
+NO_CHIP = ""
+
+
+@dataclass(frozen=True, slots=True)
+class OwnershipMatrix:
+    """Picks of a top-manager sample as rank-ordered arrays (row 0 is the best rank).
+
+    ``elements`` and ``multipliers`` are ``managers x 15``; a row of zeros is a
+    manager whose picks could not be fetched. ``chips`` indexes ``chip_names``
+    (0 is no chip). Rank-band aggregates come from cumulative counts at the
+    band boundaries, computed in one ``bincount`` pass over the matrix.
+    """
+
+    entries: np.ndarray  # int32 (n,)
+    elements: np.ndarray  # int16 (n, 15)
+    multipliers: np.ndarray  # int8 (n, 15)
+    captains: np.ndarray  # int16 (n,)
+    chips: np.ndarray  # int8 (n,)
+    chip_names: tuple[str, ...]
+
+    @property
+    def size(self) -> int:
+        return len(self.entries)
+
+    def band_counts(self, bands: list[tuple[int, int]]) -> list[dict[str, Any]]:
+        """Aggregates for each ``(start, stop)`` rank band (0-based, stop exclusive).
+
+        Each result has ``size`` and per-element arrays ``owned``, ``captained``
+        and ``effective`` (summed multipliers, so a triple captain counts 3),
+        indexed by element id, plus ``chips`` keyed by chip name.
+        """
+        bands = [(max(0, start), min(self.size, stop)) for start, stop in bands]
+        boundaries = np.unique(np.array([0] + [b for band in bands for b in band], dtype=np.int64))
+        n_segments = len(boundaries) - 1
+        n_elements = int(self.elements.max(initial=0)) + 1
+        n_chips = len(self.chip_names)
+
+        rows = np.arange(self.size)
+        segment = np.searchsorted(boundaries, rows, side="right") - 1
+        in_range = (segment >= 0) & (segment < n_segments)
+        segment, elements = segment[in_range], self.elements[in_range]
+        multipliers, captains, chips = self.multipliers[in_range], self.captains[in_range], self.chips[in_range]
+
+        picked = elements > 0
+        pick_keys = (segment[:, None] * n_elements + elements)[picked]
+        owned = np.bincount(pick_keys, minlength=n_segments * n_elements)
+        effective = np.bincount(pick_keys, weights=multipliers[picked], minlength=n_segments * n_elements)
+        captained = np.bincount(segment * n_elements + captains, minlength=n_segments * n_elements)
+        chip_counts = np.bincount(segment * n_chips + chips, minlength=n_segments * n_chips)
+
+        def prefix(counts: np.ndarray, width: int) -> np.ndarray:
+            per_segment = counts.reshape(n_segments, width)
+            return np.vstack([np.zeros((1, width), dtype=per_segment.dtype), np.cumsum(per_segment, axis=0)])
+
+        owned_p, effective_p = prefix(owned, n_elements), prefix(effective, n_elements)
+        captained_p, chips_p = prefix(captained, n_elements), prefix(chip_counts, n_chips)
+        captained_p[:, 0] = 0  # element 0 is "no captain"
+
+        results = []
+        for start, stop in bands:
+            i, j = np.searchsorted(boundaries, start), np.searchsorted(boundaries, max(start, stop))
+            band_chips = chips_p[j] - chips_p[i]
+            results.append(
+                {
+                    "start": start,
+                    "stop": max(start, stop),
+                    "size": max(0, stop - start),
+                    "owned": owned_p[j] - owned_p[i],
+                    "captained": captained_p[j] - captained_p[i],
+                    "effective": effective_p[j] - effective_p[i],
+                    "chips": {
+                        name: int(band_chips[k]) for k, name in enumerate(self.chip_names) if k and band_chips[k]
+                    },
+                }
+            )
+        return results
+
+
+def transfer_trends(
+    previous: OwnershipMatrix, current: OwnershipMatrix, bands: list[tuple[int, int]]
+) -> list[dict[str, Any]]:
+    """Squad changes between two gameweeks for each rank band of ``current``.
+
+    Entries are joined by id and only those with picks in both gameweeks are
+    compared. Per band, ``transfers_in``/``transfers_out`` count managers who
+    added/removed each element and ``captain_in``/``captain_out`` count
+    captaincy moving to/from it; all are arrays indexed by element id.
+    ``chips`` and ``previous_chips`` count chips played by the compared managers.
+    """
+    _, cur_rows, prev_rows = np.intersect1d(current.entries, previous.entries, assume_unique=True, return_indices=True)
+    both = (current.elements[cur_rows].any(axis=1)) & (previous.elements[prev_rows].any(axis=1))
+    cur_rows, prev_rows = cur_rows[both], prev_rows[both]
+
+    cur_elements, prev_elements = current.elements[cur_rows], previous.elements[prev_rows]
+    # Row-wise set differences: an element is new if it matches nothing in the same manager's old squad
+    added = (cur_elements > 0) & ~(cur_elements[:, :, None] == prev_elements[:, None, :]).any(axis=2)
+    removed = (prev_elements > 0) & ~(prev_elements[:, :, None] == cur_elements[:, None, :]).any(axis=2)
+    cur_captains, prev_captains = current.captains[cur_rows], previous.captains[prev_rows]
+    switched = cur_captains != prev_captains
+    n_elements = int(max(cur_elements.max(initial=0), prev_elements.max(initial=0))) + 1
+
+    def chip_counts(matrix: OwnershipMatrix, rows: np.ndarray) -> dict[str, int]:
+        counts = np.bincount(matrix.chips[rows], minlength=len(matrix.chip_names))
+        return {name: int(counts[k]) for k, name in enumerate(matrix.chip_names) if k and counts[k]}
+
+    results = []
+    for start, stop in bands:
+        start, stop = max(0, start), max(start, min(current.size, stop))
+        in_band = (cur_rows >= start) & (cur_rows < stop)
+        band_switched = in_band & switched
+        results.append(
+            {
+                "start": start,
+                "stop": stop,
+                "size": int(in_band.sum()),
+                "transfers_in": np.bincount(cur_elements[in_band][added[in_band]], minlength=n_elements),
+                "transfers_out": np.bincount(prev_elements[in_band][removed[in_band]], minlength=n_elements),
+                "captain_in": np.bincount(cur_captains[band_switched], minlength=n_elements),
+                "captain_out": np.bincount(prev_captains[band_switched], minlength=n_elements),
+                "captain_switches": int(band_switched.sum()),
+                "chips": chip_counts(current, cur_rows[in_band]),
+                "previous_chips": chip_counts(previous, prev_rows[in_band]),
+            }
+        )
+    return results
+
+
+class GameweekSample:
+    """Top-manager entries and their picks for one gameweek.
+
+    Standings pages are stored individually with the time they were read, so
+    a refresh re-reads only expired or missing pages. Picks are immutable
+    within a gameweek and are kept per entry as one compact array row, so
+    entries that stay in the sample across refreshes are never fetched twice.
+    """
+
+    def __init__(self, gw: int):
+        self.gw = gw
+        self.pages: dict[int, list[int]] = {}
+        self.page_read_at: dict[int, float] = {}
+        self.chip_names: list[str] = [NO_CHIP]
+        self._row_of: dict[int, int] = {}
+        self._elements = np.zeros((0, SQUAD_SIZE), dtype=np.int16)
+        self._multipliers = np.zeros((0, SQUAD_SIZE), dtype=np.int8)
+        self._captains = np.zeros(0, dtype=np.int16)
+        self._chips = np.zeros(0, dtype=np.int8)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self._elements, self._multipliers, self._captains, self._chips)
+        return sum(a.nbytes for a in arrays)
+
+    @property
+    def picks_count(self) -> int:
+        return len(self._row_of)
+
+    def stale_pages(self, count: int, max_age: float, now: float | None = None) -> list[int]:
+        now = time.time() if now is None else now
+        num_pages = (count + STANDINGS_PAGE_SIZE - 1) // STANDINGS_PAGE_SIZE
+        return [
+            page
+            for page in range(1, num_pages + 1)
+            if page not in self.pages or now - self.page_read_at[page] >= max_age
+        ]
+
+    def set_page(self, page: int, entries: list[int], now: float | None = None) -> None:
+        self.pages[page] = entries
+        self.page_read_at[page] = time.time() if now is None else now
+
+    def ranking(self, count: int) -> list[int]:
+        """Entry ids in rank order. Pages read at different times can overlap, so entries are de-duplicated.
+
+        Pages that could not be read are skipped, so the ranking is shorter than
+        ``count`` until they are; see ``missing_pages``. Later pages only make up
+        for entries lost to de-duplication, never for a missing page.
+        """
+        seen: set[int] = set()
+        ranked = []
+        num_pages = (count + STANDINGS_PAGE_SIZE - 1) // STANDINGS_PAGE_SIZE
+        has_gaps = bool(self.missing_pages(count))
+        page = 1
+        while len(ranked) < count:
+            if page > num_pages and (has_gaps or page not in self.pages):
+                break
+            for entry in self.pages.get(page, []):
+                if entry not in seen:
+                    seen.add(entry)
+                    ranked.append(entry)
+            page += 1
+        return ranked[:count]
+
+    def missing_pages(self, count: int) -> list[int]:
+        """Standings pages covering the top ``count`` that have not been read."""
+        num_pages = (count + STANDINGS_PAGE_SIZE - 1) // STANDINGS_PAGE_SIZE
+        return [page for page in range(1, num_pages + 1) if page not in self.pages]
+
+    def has_picks(self, entry: int) -> bool:
+        return entry in self._row_of
+
+    def missing_picks(self, count: int) -> list[int]:
+        return [entry for entry in self.ranking(count) if entry not in self._row_of]
+
+    def _chip_code(self, chip: str | None) -> int:
+        chip = chip or NO_CHIP
+        if chip not in self.chip_names:
+            self.chip_names.append(chip)
+        return self.chip_names.index(chip)
+
+    def add_picks(self, entry: int, data: dict[str, Any]) -> None:
+        """Store an entry's ``picks`` payload (``picks`` list and ``active_chip``)."""
+        row = self._row_of.get(entry)
+        if row is None:
+            row = len(self._row_of)
+            if row == len(self._elements):
+                grow = max(STANDINGS_PAGE_SIZE, row)
+                self._elements = np.concatenate([self._elements, np.zeros((grow, SQUAD_SIZE), np.int16)])
+                self._multipliers = np.concatenate([self._multipliers, np.zeros((grow, SQUAD_SIZE), np.int8)])
+                self._captains = np.concatenate([self._captains, np.zeros(grow, np.int16)])
+                self._chips = np.concatenate([self._chips, np.zeros(grow, np.int8)])
+            self._row_of[entry] = row
+
+        picks = sorted(data.get("picks", []), key=lambda p: p.get("position", 0))[:SQUAD_SIZE]
+        self._elements[row] = 0
+        self._multipliers[row] = 0
+        self._elements[row, : len(picks)] = [p["element"] for p in picks]
+        self._multipliers[row, : len(picks)] = [p.get("multiplier", 1) for p in picks]
+        self._captains[row] = next((p["element"] for p in picks if p.get("is_captain")), 0)
+        self._chips[row] = self._chip_code(data.get("active_chip"))
+
+    def to_frames(self) -> tuple[pl.DataFrame, pl.DataFrame]:
+        """Standings pages and stored picks as two columnar frames."""
+        standings = pl.DataFrame(
+            {
+                "page": [page for page, entries in self.pages.items() for _ in entries],
+                "position": [i for entries in self.pages.values() for i in range(len(entries))],
+                "entry": [entry for entries in self.pages.values() for entry in entries],
+                "read_at": [self.page_read_at[page] for page, entries in self.pages.items() for _ in entries],
+            },
+            schema={"page": pl.Int16, "position": pl.Int16, "entry": pl.Int32, "read_at": pl.Float64},
+        )
+        n = self.picks_count
+        entries = sorted(self._row_of, key=self._row_of.__getitem__)
+        picks = pl.DataFrame(
+            [
+                pl.Series("entry", entries, dtype=pl.Int32),
+                pl.Series("elements", self._elements[:n], dtype=pl.Array(pl.Int16, SQUAD_SIZE)),
+                pl.Series("multipliers", self._multipliers[:n], dtype=pl.Array(pl.Int8, SQUAD_SIZE)),
+                pl.Series("captain", self._captains[:n], dtype=pl.Int16),
+                pl.Series("chip", [self.chip_names[c] for c in self._chips[:n]], dtype=pl.Categorical),
+            ]
+        )
+        return standings, picks
+
+    @classmethod
+    def from_frames(cls, gw: int, standings: pl.DataFrame, picks: pl.DataFrame) -> "GameweekSample":
+        sample = cls(gw)
+        for (page,), rows in standings.sort("page", "position").group_by("page", maintain_order=True):
+            sample.pages[page] = rows["entry"].to_list()
+            sample.page_read_at[page] = rows["read_at"][0]
+
+        sample._row_of = {entry: row for row, entry in enumerate(picks["entry"].to_list())}
+        sample._elements = picks["elements"].to_numpy().astype(np.int16).reshape(-1, SQUAD_SIZE)
+        sample._multipliers = picks["multipliers"].to_numpy().astype(np.int8).reshape(-1, SQUAD_SIZE)
+        sample._captains = picks["captain"].to_numpy().astype(np.int16)
+        sample._chips = np.array([sample._chip_code(chip) for chip in picks["chip"].cast(pl.String)], dtype=np.int8)
+        return sample
+
+    def matrix(self, count: int, fetched_only: bool = False) -> OwnershipMatrix:
+        """Rank-ordered picks of the top ``count`` entries.
+
+        Entries without picks get empty rows, or are left out with ``fetched_only``.
+        """
+        entries = self.ranking(count)
+        if fetched_only:
+            entries = [entry for entry in entries if entry in self._row_of]
+        return self.matrix_for(entries)
+
+    def matrix_for(self, entries: list[int]) -> OwnershipMatrix:
+        """Picks of the given entries in the given order, with empty rows for entries without picks."""
+        rows = np.array([self._row_of.get(entry, -1) for entry in entries], dtype=np.int64)
+        found = rows >= 0
+        n = len(entries)
+
+        elements = np.zeros((n, SQUAD_SIZE), dtype=np.int16)
+        multipliers = np.zeros((n, SQUAD_SIZE), dtype=np.int8)
+        captains = np.zeros(n, dtype=np.int16)
+        chips = np.zeros(n, dtype=np.int8)
+        elements[found] = self._elements[rows[found]]
+        multipliers[found] = self._multipliers[rows[found]]
+        captains[found] = self._captains[rows[found]]
+        chips[found] = self._chips[rows[found]]
+        return OwnershipMatrix(
+            entries=np.array(entries, dtype=np.int32),
+            elements=elements,
+            multipliers=multipliers,
+            captains=captains,
+            chips=chips,
+            chip_names=tuple(self.chip_names),
+        )
+
+
+class TopManagerStore:
+    """Per-gameweek samples, keeping only the most recently used gameweeks in memory.
+
+    With a ``directory``, every sample is also persisted as two Parquet files
+    (standings pages and picks) and loaded lazily the first time its gameweek
+    is requested, so restarts and older gameweeks need no re-crawl.
+    """
+
+    def __init__(self, max_gameweeks: int = MAX_SAMPLED_GAMEWEEKS, directory: str | None = TOP_MANAGERS_DIR):
+        self.max_gameweeks = max_gameweeks
+        self.directory = directory
+        self._samples: OrderedDict[int, GameweekSample] = OrderedDict()
+
+    def _paths(self, gw: int) -> tuple[str, str]:
+        assert self.directory is not None
+        return (
+            os.path.join(self.directory, f"gw_{gw}_standings.parquet"),
+            os.path.join(self.directory, f"gw_{gw}_picks.parquet"),
+        )
+
+    def _read(self, gw: int) -> GameweekSample | None:
+        standings_path, picks_path = self._paths(gw)
+        try:
+            return GameweekSample.from_frames(gw, pl.read_parquet(standings_path), pl.read_parquet(picks_path))
+        except FileNotFoundError:
+            return None
+        except (OSError, pl.exceptions.PolarsError) as e:
+            logger.warning(f"Discarding unreadable top manager snapshot for GW{gw}: {e}")
+            return None
+
+    def _write(self, gw: int, standings: pl.DataFrame, picks: pl.DataFrame) -> None:
+        assert self.directory is not None
+        os.makedirs(self.directory, exist_ok=True)
+        for frame, path in zip((standings, picks), self._paths(gw)):
+            tmp_path = f"{path}.tmp"
+            frame.write_parquet(tmp_path)
+            os.replace(tmp_path, path)
+
+    async def get(self, gw: int) -> GameweekSample:
+        """The sample for ``gw`` from memory, else from disk, else a new empty one."""
+        if gw not in self._samples and self.directory is not None:
+            loaded = await asyncio.to_thread(self._read, gw)
+            # Another caller may have created the sample while we were reading
+            if loaded is not None and gw not in self._samples:
+                logger.info(f"Loaded top manager snapshot for GW{gw}: {loaded.picks_count} entries")
+                self._samples[gw] = loaded
+        return self.sample(gw)
+
+    async def save(self, sample: GameweekSample) -> None:
+        if self.directory is None:
+            return
+        standings, picks = sample.to_frames()
+        try:
+            await asyncio.to_thread(self._write, sample.gw, standings, picks)
+        except OSError as e:
+            # The in-memory sample is still valid; it is simply re-crawled after a restart
+            logger.warning(f"Failed to persist top manager snapshot for GW{sample.gw}: {e}")
+
+    def sample(self, gw: int) -> GameweekSample:
+        sample = self._samples.get(gw)
+        if sample is None:
+            sample = self._samples[gw] = GameweekSample(gw)
+        self._samples.move_to_end(gw)
+        while len(self._samples) > self.max_gameweeks:
+            self._samples.popitem(last=False)
+        return sample
+
+    def clear(self) -> None:
+        self._samples.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "gameweeks": list(self._samples),
+            "entries": sum(sample.picks_count for sample in self._samples.values()),
+            "bytes": sum(sample.nbytes for sample in self._samples.values()),
+        }
+
+
+class RateLimiter:
+    """Spaces calls to ``acquire`` evenly at ``rate`` per second.
+
+    Each caller reserves the next free slot before sleeping, so concurrent
+    callers on one event loop never share a slot and no lock is needed.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def collect_sample(
+    sample: GameweekSample,
+    count: int,
+    fetch_page: Callable[[int], Awaitable[list[int] | None]],
+    fetch_picks: Callable[[int], Awaitable[dict[str, Any] | None]],
+    max_page_age: float,
+    limiter: RateLimiter,
+    on_picks: Callable[[int, dict[str, Any]], None] | None = None,
+    workers: int = PICKS_WORKERS,
+) -> dict[str, int]:
+    """Bring ``sample`` up to ``count`` entries as a standings -> picks pipeline.
+
+    Expired standings pages are requested concurrently; as each one arrives its
+    entries without stored picks go straight onto a bounded queue drained by
+    ``workers`` fetchers at the limiter's pace, so picks requests start with the
+    first page rather than after the last. ``fetch_page`` returns the entry ids
+    of a page (None on failure) and ``fetch_picks`` an entry's picks payload
+    (None on failure; the entry is retried on the next refresh). ``on_picks`` is called
+    for every newly stored entry as it arrives.
+    """
+    queue: asyncio.Queue[int | None] = asyncio.Queue(maxsize=PICKS_QUEUE_SIZE)
+    queued: set[int] = set()
+    stats = {"pages": 0, "picks": 0, "failed": 0}
+
+    async def enqueue(page: int) -> None:
+        # Only the part of the page that falls inside the requested count
+        limit = count - (page - 1) * STANDINGS_PAGE_SIZE
+        for entry in sample.pages.get(page, [])[:limit]:
+            if not sample.has_picks(entry) and entry not in queued:
+                queued.add(entry)
+                await queue.put(entry)
+
+    async def read_page(page: int) -> int:
+        await limiter.acquire()
+        entries = await fetch_page(page)
+        if entries is not None:
+            sample.set_page(page, entries)
+            stats["pages"] += 1
+        return page
+
+    async def produce() -> None:
+        stale = sample.stale_pages(count, max_page_age)
+        num_pages = (count + STANDINGS_PAGE_SIZE - 1) // STANDINGS_PAGE_SIZE
+        for page in range(1, num_pages + 1):
+            if page not in stale:
+                await enqueue(page)
+        for next_page in asyncio.as_completed([read_page(page) for page in stale]):
+            await enqueue(await next_page)
+        # Ranks can shift between page reads; pick up anything the page slices missed
+        for entry in sample.missing_picks(count):
+            if entry not in queued:
+                queued.add(entry)
+                await queue.put(entry)
+
+    async def consume() -> None:
+        while (entry := await queue.get()) is not None:
+            await limiter.acquire()
+            picks = await fetch_picks(entry)
+            if picks is None:
+                stats["failed"] += 1
+                continue
+            sample.add_picks(entry, picks)
+            stats["picks"] += 1
+            if on_picks:
+                on_picks(entry, picks)
+
+    async def produce_then_stop() -> None:
+        await produce()
+        for _ in range(workers):
+            await queue.put(None)
+
+    # Awaited together so that a failing task cancels the rest; otherwise the producer
+    # would block forever on the full queue once every consumer has died
+    tasks = [asyncio.create_task(produce_then_stop()), *(asyncio.create_task(consume()) for _ in range(workers))]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    logger.debug(
+        f"Top managers GW{sample.gw}: {stats['pages']} pages, {stats['picks']} picks, {stats['failed']} failed"
+    )
+    return stats
+
+
+async def collect_picks(
+    sample: GameweekSample,
+    entries: list[int],
+    fetch_picks: Callable[[int], Awaitable[dict[str, Any] | None]],
+    limiter: RateLimiter,
+    workers: int = PICKS_WORKERS,
+) -> dict[str, int]:
+    """Fetch picks for the given ``entries`` that ``sample`` does not hold yet, without reading standings."""
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for entry in dict.fromkeys(entries):
+        if not sample.has_picks(entry):
+            queue.put_nowait(entry)
+    stats = {"pages": 0, "picks": 0, "failed": 0}
+
+    async def consume() -> None:
+        while not queue.empty():
+            entry = queue.get_nowait()
+            await limiter.acquire()
+            picks = await fetch_picks(entry)
+            if picks is None:
+                stats["failed"] += 1
+                continue
+            sample.add_picks(entry, picks)
+            stats["picks"] += 1
+
+    await asyncio.gather(*(consume() for _ in range(min(workers, queue.qsize()))))
+    return stats
@@ -0,0 +1,161 @@
+import functools
+import inspect
+import json
+import re
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from .metrics import path_template
+
+TRACE_HEADER = "X-Debug-Trace"  # request header asking for the full JSON trace in the log
+MAX_SERVER_TIMING_ENTRIES = 20
+_START = "trace_start"  # httpx request extension holding the send time
+
+
+class Span:
+    __slots__ = ("duration", "name", "parent", "start")
+
+    def __init__(self, name: str, start: float, parent: int | None):
+        self.name = name
+        self.start = start
+        self.parent = parent
+        self.duration: float | None = None
+
+
+class Trace:
+    """Spans recorded while handling one request.
+
+    Spans are appended from the request task and from any task it spawns
+    (``asyncio.gather`` copies the context), so concurrent calls appear as
+    overlapping spans under the same parent.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:16]
+        self.started = time.perf_counter()
+        self.spans: list[Span] = []
+
+    def add(self, name: str, start: float, duration: float, parent: int | None) -> None:
+        span = Span(name, start, parent)
+        span.duration = duration
+        self.spans.append(span)
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` value with the total time per span name, slowest first."""
+        totals: dict[str, list[float]] = {}
+        for span in self.spans:
+            if span.duration is not None:
+                total = totals.setdefault(span.name, [0.0, 0])
+                total[0] += span.duration
+                total[1] += 1
+        slowest = sorted(totals.items(), key=lambda item: -item[1][0])[:MAX_SERVER_TIMING_ENTRIES]
+        entries = [f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}"]
+        for i, (name, (duration, count)) in enumerate(slowest):
+            # Metric names must be tokens; the readable name goes in desc
+            desc = name if count == 1 else f"{name} x{count}"
+            entries.append(f'{re.sub(r"[^A-Za-z0-9_]", "_", name)[:40]}_{i};dur={duration * 1000:.1f};desc="{desc}"')
+        return ", ".join(entries)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.id,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "spans": [
+                {
+                    "id": i,
+                    "name": span.name,
+                    "parent": span.parent,
+                    "start_ms": round((span.start - self.started) * 1000, 1),
+                    "duration_ms": round(span.duration * 1000, 1) if span.duration is not None else None,
+                }
+                for i, span in enumerate(self.spans)
+            ],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+
+_trace: ContextVar[Trace | None] = ContextVar("trace", default=None)
+_parent: ContextVar[int | None] = ContextVar("trace_parent", default=None)
+
+
+def current_trace() -> Trace | None:
+    return _trace.get()
+
+
+@contextmanager
+def start_trace() -> Iterator[Trace]:
+    trace = Trace()
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Record ``name`` as a span of the current trace; does nothing outside a trace."""
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+    record = Span(name, time.perf_counter(), _parent.get())
+    trace.spans.append(record)
+    token = _parent.set(len(trace.spans) - 1)
+    try:
+        yield
+    finally:
+        _parent.reset(token)
+        record.duration = time.perf_counter() - record.start
+
+
+def trace_methods(*private: str):
+    """Class decorator recording a span for every public coroutine method and the named private ones."""
+
+    def decorate(cls):
+        for attr, member in list(vars(cls).items()):
+            if (attr.startswith("_") and attr not in private) or not inspect.iscoroutinefunction(member):
+                continue
+            setattr(cls, attr, _traced(f"{cls.__name__}.{attr}", member))
+        return cls
+
+    return decorate
+
+
+def _traced(name: str, fn):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        if _trace.get() is None:
+            return await fn(*args, **kwargs)
+        with span(name):
+            return await fn(*args, **kwargs)
+
+    return wrapper
+
+
+async def _trace_upstream_request(request: httpx.Request) -> None:
+    if _trace.get() is not None:
+        request.extensions[_START] = time.perf_counter()
+
+
+async def _trace_upstream_response(response: httpx.Response) -> None:
+    trace = _trace.get()
+    started = response.request.extensions.get(_START)
+    if trace is None or started is None:
+        return
+    parts = urlsplit(str(response.request.url))
+    name = f"{response.request.method} {parts.hostname}{path_template(parts.path)}"
+    trace.add(name, started, time.perf_counter() - started, _parent.get())
+
+
+# For httpx.AsyncClient(event_hooks=...), after the metrics hooks so the body is already read
+UPSTREAM_TRACE_HOOKS = {"request": [_trace_upstream_request], "response": [_trace_upstream_response]}
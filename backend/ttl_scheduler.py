@@ -0,0 +1,112 @@
+import bisect
+import time
+from datetime import datetime
+from typing import Any
+
+PHASE_LIVE = "live"
+PHASE_DEADLINE = "deadline"
+PHASE_IDLE = "idle"
+
+MATCH_WINDOW = 150 * 60  # kickoff until final whistle, stoppage time and bonus points settle
+DEADLINE_WINDOW = 60 * 60  # either side of a deadline: team news, price moves, picks becoming public
+MIN_TTL = 15  # never schedule refreshes tighter than this
+
+# Seconds per resource and phase
+TTL_TABLE: dict[str, dict[str, float]] = {
+    "bootstrap": {PHASE_LIVE: 60, PHASE_DEADLINE: 120, PHASE_IDLE: 1800},
+    "fixtures": {PHASE_LIVE: 60, PHASE_DEADLINE: 300, PHASE_IDLE: 1800},
+    "live_gameweek": {PHASE_LIVE: 30, PHASE_DEADLINE: 120, PHASE_IDLE: 600},
+    "polymarket": {PHASE_LIVE: 300, PHASE_DEADLINE: 300, PHASE_IDLE: 1800},
+    "top_managers": {PHASE_LIVE: 900, PHASE_DEADLINE: 600, PHASE_IDLE: 6 * 3600},
+}
+
+
+def _parse_kickoff(kickoff_time: str | None) -> float | None:
+    if not kickoff_time:
+        return None
+    try:
+        return datetime.fromisoformat(kickoff_time.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class TTLScheduler:
+    """Computes cache TTLs from the FPL calendar.
+
+    Refreshes are aggressive while matches are being played and around
+    gameweek deadlines, and relaxed otherwise. A TTL never runs past the next
+    phase change, so an idle-period entry still expires in time for a
+    deadline or kickoff. Until a schedule is known, ``defaults`` are used.
+    """
+
+    def __init__(self, defaults: dict[str, float], table: dict[str, dict[str, float]] | None = None):
+        self.defaults = defaults
+        self.table = table or TTL_TABLE
+        self._deadlines: list[float] = []
+        self._kickoffs: list[float] = []
+        self._boundaries: list[float] = []
+
+    def clear(self) -> None:
+        self._deadlines = []
+        self._kickoffs = []
+        self._boundaries = []
+
+    def set_deadlines(self, events: list[dict[str, Any]]) -> None:
+        self._deadlines = sorted(float(e["deadline_time_epoch"]) for e in events if e.get("deadline_time_epoch"))
+        self._rebuild_boundaries()
+
+    def set_kickoffs(self, kickoff_times: list[str | None]) -> None:
+        parsed = (_parse_kickoff(k) for k in kickoff_times)
+        self._kickoffs = sorted(k for k in parsed if k is not None)
+        self._rebuild_boundaries()
+
+    def _rebuild_boundaries(self) -> None:
+        boundaries = self._kickoffs + [k + MATCH_WINDOW for k in self._kickoffs]
+        boundaries += [d - DEADLINE_WINDOW for d in self._deadlines] + [d + DEADLINE_WINDOW for d in self._deadlines]
+        self._boundaries = sorted(boundaries)
+
+    @property
+    def has_schedule(self) -> bool:
+        return bool(self._deadlines or self._kickoffs)
+
+    def phase(self, now: float | None = None) -> str:
+        now = time.time() if now is None else now
+        # Any kickoff in (now - MATCH_WINDOW, now] means a match is in progress
+        i = bisect.bisect_right(self._kickoffs, now)
+        if i > 0 and self._kickoffs[i - 1] > now - MATCH_WINDOW:
+            return PHASE_LIVE
+        j = bisect.bisect_left(self._deadlines, now - DEADLINE_WINDOW)
+        if j < len(self._deadlines) and self._deadlines[j] < now + DEADLINE_WINDOW:
+            return PHASE_DEADLINE
+        return PHASE_IDLE
+
+    def next_transition(self, now: float | None = None) -> float | None:
+        now = time.time() if now is None else now
+        i = bisect.bisect_right(self._boundaries, now)
+        return self._boundaries[i] if i < len(self._boundaries) else None
+
+    def ttl(self, resource: str, now: float | None = None, since: float | None = None) -> float:
+        """TTL for ``resource`` given the current phase.
+
+        ``since`` is when the cached value was stored; the TTL is capped so the
+        value expires at the first phase boundary after it, which lets an entry
+        cached during a quiet spell expire exactly when a match or deadline
+        window opens.
+        """
+        if not self.has_schedule or resource not in self.table:
+            return self.defaults[resource]
+        now = time.time() if now is None else now
+        since = now if since is None else since
+        ttl = self.table[resource][self.phase(now)]
+        transition = self.next_transition(since)
+        if transition is not None:
+            ttl = min(ttl, max(MIN_TTL, transition - since))
+        return ttl
+
+    def policy(self, now: float | None = None) -> dict[str, Any]:
+        now = time.time() if now is None else now
+        return {
+            "phase": self.phase(now) if self.has_schedule else None,
+            "next_transition": self.next_transition(now),
+            "ttls": {resource: round(self.ttl(resource, now), 1) for resource in self.defaults},
+        }
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from loguru import logger
+
+WARMUP_RETRY_DELAY = 2.0  # first retry delay in seconds, doubled per attempt
+WARMUP_MAX_RETRY_DELAY = 60.0
+
+
+class Warmup:
+    """Runs startup loaders concurrently in the background and tracks their progress.
+
+    Each step is retried with exponential backoff until it succeeds. The
+    instance is ready once every ``required`` step has succeeded; optional
+    steps only warm caches and never hold readiness back.
+    """
+
+    def __init__(self, steps: dict[str, Callable[[], Awaitable[Any]]], required: set[str] | None = None):
+        self.steps = steps
+        self.required = set(steps) if required is None else required
+        self.started_at: float | None = None
+        self._state = {name: {"status": "pending", "attempts": 0, "duration": None, "error": None} for name in steps}
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self.started_at = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        await asyncio.gather(*(self._run_step(name, loader) for name, loader in self.steps.items()))
+        logger.info(f"Warmup finished in {time.monotonic() - self.started_at:.1f}s")
+
+    async def _run_step(self, name: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        state = self._state[name]
+        delay = WARMUP_RETRY_DELAY
+        while True:
+            state["status"] = "running"
+            state["attempts"] += 1
+            started = time.monotonic()
+            try:
+                await loader()
+            except Exception as e:
+                state["status"] = "retrying"
+                state["error"] = str(e)
+                logger.warning(
+                    f"Warmup step {name} failed (attempt {state['attempts']}), retrying in {delay:.0f}s: {e}"
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, WARMUP_MAX_RETRY_DELAY)
+                continue
+            state.update(status="done", duration=round(time.monotonic() - started, 3), error=None)
+            logger.info(f"Warmup step {name} done in {state['duration']:.1f}s")
+            return
+
+    @property
+    def ready(self) -> bool:
+        return all(self._state[name]["status"] == "done" for name in self.required)
+
+    def progress(self) -> dict[str, Any]:
+        done = sum(1 for state in self._state.values() if state["status"] == "done")
+        return {
+            "ready": self.ready,
+            "completed": done,
+            "total": len(self._state),
+            "elapsed": round(time.monotonic() - self.started_at, 1) if self.started_at is not None else None,
+            "steps": {name: {**state, "required": name in self.required} for name, state in self._state.items()},
+        }
@@ -0,0 +1,82 @@
+import pytest
+from backend.cache_backend import CacheBackend, MemoryBackend, SQLiteBackend, create_cache_backend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryBackend()
+    else:
+        backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+        yield backend
+        backend.close()
+
+
+class TestCacheBackend:
+    async def test_round_trip_keeps_stored_at(self, backend):
+        assert await backend.get("bootstrap") is None
+        await backend.set("bootstrap", {"events": [1, 2]}, stored_at=123.5)
+        assert await backend.get("bootstrap") == ({"events": [1, 2]}, 123.5)
+
+    async def test_purge_drops_old_values_under_prefix(self, backend):
+        await backend.set("job:old", 1, stored_at=10.0)
+        await backend.set("job:new", 2, stored_at=30.0)
+        await backend.set("jobs", 3, stored_at=10.0)
+        await backend.set("bootstrap", 4, stored_at=10.0)
+        await backend.purge("job:", stored_before=20.0)
+        assert await backend.get("job:old") is None
+        assert await backend.get("job:new") == (2, 30.0)
+        assert await backend.get("jobs") == (3, 10.0)
+        assert await backend.get("bootstrap") == (4, 10.0)
+
+    async def test_lease_is_exclusive_until_released(self, backend):
+        # Another worker on the same store; in-process leases are held per backend instance
+        peer = SQLiteBackend(backend.path) if isinstance(backend, SQLiteBackend) else backend
+        assert await backend.acquire_lease("fixtures")
+        assert not await peer.acquire_lease("fixtures")
+        await backend.release_lease("fixtures")
+        assert await peer.acquire_lease("fixtures")
+
+    async def test_expired_lease_can_be_taken_over(self, backend):
+        assert await backend.acquire_lease("fixtures", ttl=-1)
+        assert await backend.acquire_lease("fixtures")
+
+
+class TestSQLiteBackend:
+    async def test_workers_share_values(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        first, second = SQLiteBackend(path), SQLiteBackend(path)
+        await first.set("history:2023-24", {"season": "2023-24"}, stored_at=1.0)
+        assert await second.get("history:2023-24") == ({"season": "2023-24"}, 1.0)
+        first.close()
+        second.close()
+
+    async def test_release_only_drops_own_lease(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        holder, other = SQLiteBackend(path), SQLiteBackend(path)
+        assert await holder.acquire_lease("bootstrap")
+        await other.release_lease("bootstrap")
+        assert not await other.acquire_lease("bootstrap")
+        holder.close()
+        other.close()
+
+    async def test_unusable_database_degrades_to_unshared(self, tmp_path):
+        backend = SQLiteBackend(str(tmp_path))  # a directory cannot be opened as a database
+        await backend.set("bootstrap", {}, stored_at=1.0)
+        assert await backend.get("bootstrap") is None
+        assert await backend.acquire_lease("bootstrap")
+
+
+def test_backend_selection(tmp_path):
+    assert isinstance(create_cache_backend("memory"), MemoryBackend)
+    assert isinstance(create_cache_backend("sqlite", str(tmp_path / "c.db")), SQLiteBackend)
+    assert isinstance(create_cache_backend("redis"), MemoryBackend)
+
+
+def test_incomplete_backend_fails_at_construction():
+    class GetOnly(CacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError, match="abstract"):
+        GetOnly()
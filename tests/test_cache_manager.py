@@ -0,0 +1,93 @@
+import time
+
+import numpy as np
+import polars as pl
+import pytest
+from backend.cache_manager import CacheManager, CacheNamespace, estimate_size
+
+
+class TestEstimateSize:
+    def test_counts_nested_containers(self):
+        small = estimate_size({"a": [1, 2]})
+        large = estimate_size({"a": [list(range(100)) for _ in range(10)]})
+        assert large > 10 * small
+
+    def test_shared_objects_counted_once(self):
+        payload = ["x" * 10_000]
+        assert estimate_size([payload, payload]) < 2 * estimate_size(payload)
+
+    def test_frames_and_arrays_use_buffer_sizes(self):
+        frame = pl.DataFrame({"a": np.arange(100_000, dtype=np.int64)})
+        assert estimate_size({"df": frame}) >= 800_000
+        assert estimate_size(np.zeros(1000, dtype=np.int32)) >= 4000
+
+
+class TestCacheNamespace:
+    def test_evicts_least_recently_used_over_budget(self):
+        ns = CacheNamespace("test", max_bytes=3 * estimate_size("x" * 1000) + 100)
+        for key in "abc":
+            ns.set(key, key * 1000)
+        ns.get("a")
+        ns.set("d", "d" * 1000)
+
+        assert ns.keys() == ["c", "a", "d"]
+        assert ns.stats()["evictions"] == 1
+        assert ns.bytes <= ns.max_bytes
+
+    def test_oversized_entry_is_kept_alone(self):
+        ns = CacheNamespace("test", max_bytes=100)
+        ns.set("small", 1)
+        ns.set("big", "x" * 1000)
+        assert ns.keys() == ["big"]
+
+    def test_max_age_expires_entries(self):
+        ns = CacheNamespace("test", max_bytes=10_000, max_age=60)
+        ns.set("old", 1, stored_at=time.time() - 120)
+        ns.set("new", 2)
+        assert ns.sweep() == 1
+        assert "old" not in ns and ns.get("new") == 2
+
+    def test_hit_rate_treats_too_old_as_miss(self):
+        ns = CacheNamespace("test", max_bytes=10_000)
+        ns.set("k", 1, stored_at=time.time() - 30)
+        assert ns.get("k") == 1
+        assert ns.get("k", max_age=10) is None
+        assert ns.get("missing") is None
+        stats = ns.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 2, 0.333)
+        # A too-old entry stays available for stale-while-revalidate
+        assert "k" in ns
+
+    def test_replacing_same_object_keeps_size(self):
+        ns = CacheNamespace("test", max_bytes=10**6)
+        value = {"a": list(range(100))}
+        ns.set("k", value)
+        size = ns.bytes
+        value["b"] = list(range(1000))  # mutated in place, re-stored as the same object
+        ns.set("k", value)
+        assert ns.bytes == size
+
+    def test_given_size_skips_estimate(self, monkeypatch):
+        monkeypatch.setattr("backend.cache_manager.estimate_size", lambda value: pytest.fail("walked the value"))
+        ns = CacheNamespace("test", max_bytes=10**6)
+        ns.set("k", {"a": list(range(100))}, size=1234)
+        assert ns.bytes == 1234
+
+
+class TestCacheManager:
+    def test_routes_by_key_prefix(self):
+        manager = CacheManager({"core": (10_000, None), "gw_payload": (10_000, None)})
+        manager["bootstrap"] = 1
+        manager["gw_payload:event/1/live/"] = 2
+        manager["unknown:key"] = 3
+
+        assert manager.namespace("gw_payload").keys() == ["gw_payload:event/1/live/"]
+        assert sorted(manager.namespace("core").keys()) == ["bootstrap", "unknown:key"]
+        stats = manager.stats()
+        assert stats["entries"] == 3
+        assert set(stats["namespaces"]) == {"core", "gw_payload"}
+
+    def test_budget_override_from_env(self, monkeypatch):
+        monkeypatch.setenv("FPL_CACHE_BUDGETS_MB", "core=1,bogus")
+        manager = CacheManager({"core": (10, None)})
+        assert manager.namespace("core").max_bytes == 1024 * 1024
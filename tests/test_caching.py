@@ -0,0 +1,663 @@
+import asyncio
+import contextlib
+import time
+from datetime import UTC, datetime
+
+import httpx
+import pytest
+from backend.cache_backend import MemoryBackend, SQLiteBackend
+from backend.cache_manager import DECODED_JSON_FACTOR, CacheNamespace
+from backend.fpl_service import FPL_BASE_URL, MAX_STALENESS, FPLService
+from backend.immutable_cache import ImmutableCache
+from backend.snapshots import BootstrapSnapshot
+from backend.top_managers import RateLimiter
+
+BOOTSTRAP = {"events": [], "teams": [{"id": 1, "name": "Arsenal"}], "elements": []}
+
+
+@pytest.fixture
+def fpl_service(monkeypatch, tmp_path):
+    """FPLService with a clean class-level cache; the shared client is restored afterwards."""
+    saved_client = FPLService._http_client
+    _reset_class_state()
+    monkeypatch.setattr(FPLService._top_managers, "directory", str(tmp_path / "top_managers"))
+    yield FPLService()
+    FPLService._http_client = saved_client
+    _reset_class_state()
+
+
+def _reset_class_state() -> None:
+    FPLService._cache.clear()
+    FPLService._validators.clear()
+    FPLService._key_locks.clear()
+    FPLService._refresh_tasks.clear()
+    FPLService._ttl_scheduler.clear()
+    FPLService._points_cube.clear()
+    FPLService._top_managers.clear()
+    FPLService._backend = MemoryBackend()
+
+
+def _expire(key: str) -> None:
+    """Age ``key`` past every TTL."""
+    FPLService._cache.set_stored_at(key, 0)
+
+
+def _install_transport(handler) -> None:
+    FPLService._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestConditionalRevalidation:
+    async def test_not_modified_keeps_cached_object(self, fpl_service):
+        seen_headers = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen_headers.append(dict(request.headers))
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, json=BOOTSTRAP, headers={"ETag": '"v1"'})
+
+        _install_transport(handler)
+        first = await fpl_service.get_bootstrap_static()
+        _expire("bootstrap")
+        second = await fpl_service.get_bootstrap_static()
+
+        assert second is first
+        assert seen_headers[1]["if-none-match"] == '"v1"'
+        assert FPLService._cache.stored_at("bootstrap") > 0
+
+    async def test_unchanged_body_without_validators_is_not_reparsed(self, fpl_service):
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url)
+            return httpx.Response(200, json=BOOTSTRAP)
+
+        _install_transport(handler)
+        first = await fpl_service.get_bootstrap_static()
+        _expire("bootstrap")
+        second = await fpl_service.get_bootstrap_static()
+
+        assert len(calls) == 2
+        assert second is first
+
+    async def test_changed_body_replaces_cache(self, fpl_service):
+        payloads = [BOOTSTRAP, {**BOOTSTRAP, "teams": [{"id": 1, "name": "Chelsea"}]}]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json=payloads.pop(0))
+
+        _install_transport(handler)
+        await fpl_service.get_bootstrap_static()
+        _expire("bootstrap")
+        second = await fpl_service.get_bootstrap_static()
+
+        assert second["teams"][0]["name"] == "Chelsea"
+
+    async def test_validators_not_sent_without_cached_value(self, fpl_service):
+        FPLService._validators[f"{FPL_BASE_URL}/bootstrap-static/"] = {"etag": '"v1"', "last_modified": None}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert "if-none-match" not in request.headers
+            return httpx.Response(200, json=BOOTSTRAP, headers={"ETag": '"v1"'})
+
+        _install_transport(handler)
+        data = await fpl_service.get_bootstrap_static()
+        assert data["teams"][0]["full_name"] == "Arsenal"
+
+
+class TestSharedBackend:
+    @staticmethod
+    def _new_worker() -> None:
+        """Drop this worker's in-process state, keeping the shared backend."""
+        FPLService._cache.clear()
+        FPLService._key_locks.clear()
+
+    async def test_second_worker_reuses_shared_value(self, fpl_service, tmp_path):
+        FPLService._backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url)
+            return httpx.Response(200, json=BOOTSTRAP)
+
+        _install_transport(handler)
+        await fpl_service.get_bootstrap_static()
+        self._new_worker()
+        data = await fpl_service.get_bootstrap_static()
+
+        assert len(calls) == 1
+        assert data["teams"][0]["full_name"] == "Arsenal"
+        FPLService._backend.close()
+
+    async def test_adopted_fixtures_set_the_match_schedule(self, fpl_service, tmp_path):
+        FPLService._backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+        kickoff = datetime.fromtimestamp(time.time() - 600, tz=UTC).isoformat()
+        fixture = {"id": 1, "code": 1, "event": 1, "team_h": 1, "team_a": 2, "kickoff_time": kickoff}
+        fixtures = [{**fixture, "team_h_difficulty": 3, "team_a_difficulty": 3}]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith("/fixtures/"):
+                return httpx.Response(200, json=fixtures)
+            raise AssertionError(f"unexpected request {request.url}")
+
+        _install_transport(handler)
+        await fpl_service.get_fixture_index()
+        assert fpl_service.get_cache_policy()["phase"] == "live"
+
+        # The second worker only reads fixtures from the backend
+        self._new_worker()
+        FPLService._ttl_scheduler.clear()
+        _install_transport(lambda request: pytest.fail("refetched a shared value"))
+        await fpl_service.get_fixture_index()
+
+        policy = fpl_service.get_cache_policy()
+        assert policy["phase"] == "live"
+        assert policy["ttls"]["fixtures"] == 60
+        FPLService._backend.close()
+
+    async def test_waits_for_worker_holding_the_lease(self, fpl_service, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        FPLService._backend = SQLiteBackend(path)
+        other_worker = SQLiteBackend(path)
+        assert await other_worker.acquire_lease("bootstrap")
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise AssertionError("refreshed while another worker held the lease")
+
+        _install_transport(handler)
+        pending = asyncio.create_task(fpl_service.get_bootstrap_snapshot())
+        await asyncio.sleep(0.2)
+        assert not pending.done()
+
+        snapshot = BootstrapSnapshot.from_bootstrap(BOOTSTRAP)
+        await other_worker.set("bootstrap", snapshot, time.time())
+        await other_worker.release_lease("bootstrap")
+
+        assert (await asyncio.wait_for(pending, 2)).raw == BOOTSTRAP
+        FPLService._backend.close()
+        other_worker.close()
+
+
+class TestEntrySizes:
+    async def test_fetched_values_are_sized_by_response_body(self, fpl_service, monkeypatch):
+        monkeypatch.setattr("backend.cache_manager.estimate_size", lambda value: pytest.fail("walked the value"))
+        body = httpx.Response(200, json=BOOTSTRAP).content
+        _install_transport(lambda request: httpx.Response(200, json=BOOTSTRAP))
+
+        await fpl_service.get_bootstrap_snapshot()
+
+        assert FPLService._cache.namespace("core").bytes == len(body) * DECODED_JSON_FACTOR
+
+
+class TestStaleWhileRevalidate:
+    async def test_stale_value_served_while_refreshing_in_background(self, fpl_service):
+        release = asyncio.Event()
+        calls = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return httpx.Response(200, json={**BOOTSTRAP, "teams": [{"id": 1, "name": "Chelsea"}]})
+
+        _install_transport(handler)
+        stale = BootstrapSnapshot.from_bootstrap({"teams": [], "events": [], "elements": []})
+        FPLService._cache.set("bootstrap", stale, stored_at=time.time() - MAX_STALENESS + 60)
+
+        assert await fpl_service.get_bootstrap_snapshot() is stale
+        assert await fpl_service.get_bootstrap_snapshot() is stale
+
+        release.set()
+        await FPLService._refresh_tasks["bootstrap"]
+
+        assert calls == 1
+        assert (await fpl_service.get_bootstrap_static())["teams"][0]["name"] == "Chelsea"
+
+    async def test_slow_refresh_does_not_block_other_keys(self, fpl_service):
+        release = asyncio.Event()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith("/bootstrap-static/"):
+                await release.wait()
+                return httpx.Response(200, json=BOOTSTRAP)
+            return httpx.Response(200, json=[])
+
+        _install_transport(handler)
+        bootstrap_task = asyncio.create_task(fpl_service.get_bootstrap_static())
+        await asyncio.sleep(0)
+
+        assert await asyncio.wait_for(fpl_service.get_fixtures(), timeout=1) == []
+        release.set()
+        await bootstrap_task
+
+    async def test_failed_background_refresh_keeps_stale_value(self, fpl_service):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(500)
+
+        _install_transport(handler)
+        stale = BootstrapSnapshot.from_bootstrap({"teams": [], "events": [], "elements": []})
+        FPLService._cache.set("bootstrap", stale, stored_at=time.time() - MAX_STALENESS + 60)
+
+        assert await fpl_service.get_bootstrap_snapshot() is stale
+        await FPLService._refresh_tasks["bootstrap"]
+        assert FPLService._cache["bootstrap"] is stale
+
+
+class TestImmutableGameweekTier:
+    @pytest.fixture
+    def immutable(self, tmp_path, monkeypatch):
+        store = ImmutableCache(str(tmp_path), CacheNamespace("immutable", max_bytes=10**6))
+        monkeypatch.setattr(FPLService, "_immutable", store)
+        return store
+
+    @staticmethod
+    def _bootstrap_with_events(events):
+        return {**BOOTSTRAP, "events": events}
+
+    async def test_final_gameweek_fetched_once_then_served_from_disk(self, fpl_service, immutable):
+        live_calls = []
+        bootstrap = self._bootstrap_with_events([{"id": 1, "finished": True, "data_checked": True}])
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith("/bootstrap-static/"):
+                return httpx.Response(200, json=bootstrap)
+            live_calls.append(request.url.path)
+            return httpx.Response(200, json={"elements": [{"id": 7}]})
+
+        _install_transport(handler)
+        first = await fpl_service.get_event_live(1)
+        immutable.memory.clear()  # force the disk path
+        second = await fpl_service.get_event_live(1)
+
+        assert first == second == {"elements": [{"id": 7}]}
+        assert len(live_calls) == 1
+
+    async def test_memory_tier_is_bounded_in_bytes(self, tmp_path):
+        store = ImmutableCache(str(tmp_path), CacheNamespace("immutable", max_bytes=1000))
+        await store.put("event/1/live/", {"elements": [1]}, size=600)
+        await store.put("event/2/live/", {"elements": [2]}, size=600)
+
+        assert store.memory.keys() == ["event/2/live/"]
+        assert store.memory.stats()["evictions"] == 1
+        # Evicted from memory only: the disk copy is read back and sized by its JSON
+        assert await store.get("event/1/live/") == {"elements": [1]}
+        assert store.memory.stats()["bytes"] == 600 + len('{"elements":[1]}') * DECODED_JSON_FACTOR
+
+    async def test_unfinished_gameweek_uses_short_ttl(self, fpl_service, immutable):
+        live_calls = []
+        bootstrap = self._bootstrap_with_events([{"id": 2, "finished": False, "data_checked": False}])
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith("/bootstrap-static/"):
+                return httpx.Response(200, json=bootstrap)
+            live_calls.append(request.url.path)
+            return httpx.Response(200, json={"elements": []})
+
+        _install_transport(handler)
+        await fpl_service.get_event_live(2)
+        await fpl_service.get_event_live(2)
+        assert len(live_calls) == 1
+
+        FPLService._cache.set_stored_at("gw_payload:event/2/live/", 0)
+        await fpl_service.get_event_live(2)
+        assert len(live_calls) == 2
+        assert await immutable.get("event/2/live/") is None
+
+
+class TestEnrichedSquadFanOut:
+    BOOTSTRAP = {
+        "events": [{"id": 1, "is_current": True, "is_next": False, "finished": False, "data_checked": False}],
+        "teams": [{"id": 1, "name": "Arsenal", "short_name": "ARS", "code": 3}],
+        "elements": [],
+    }
+
+    @staticmethod
+    def _handler(delay: float, fail_path: str | None = None):
+        async def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path.endswith("/bootstrap-static/"):
+                return httpx.Response(200, json=TestEnrichedSquadFanOut.BOOTSTRAP)
+            await asyncio.sleep(delay)
+            if fail_path and path.endswith(fail_path):
+                return httpx.Response(503)
+            if path.endswith("/fixtures/") or path.endswith("/transfers/"):
+                return httpx.Response(200, json=[])
+            if path.endswith("/history/"):
+                return httpx.Response(200, json={"chips": [], "current": []})
+            if path.endswith("/picks/"):
+                return httpx.Response(200, json={"picks": [], "entry_history": {"event": 1}})
+            if path.endswith("/live/"):
+                return httpx.Response(200, json={"elements": []})
+            return httpx.Response(200, json={"id": 42, "favourite_team": 1})
+
+        return handler
+
+    async def test_upstream_calls_run_concurrently(self, fpl_service):
+        respond = self._handler(delay=0)
+        all_started = asyncio.Event()
+        in_flight, max_in_flight = 0, 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, max_in_flight
+            if request.url.path.endswith("/bootstrap-static/"):
+                return await respond(request)
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            if in_flight == 6:
+                all_started.set()
+            # Held until all six upstream calls are in flight; serial calls would never get there
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(all_started.wait(), timeout=2)
+            in_flight -= 1
+            return await respond(request)
+
+        _install_transport(handler)
+        await fpl_service.get_bootstrap_snapshot()
+        result = await fpl_service.get_enriched_squad(42)
+
+        assert max_in_flight == 6
+        assert result["entry"]["favourite_team_name"] == "Arsenal"
+
+    async def test_failed_branch_falls_back_without_failing_others(self, fpl_service):
+        _install_transport(self._handler(delay=0, fail_path="/history/"))
+        result = await fpl_service.get_enriched_squad(42)
+        assert result["entry"]["id"] == 42
+        assert result["history"] == [{"event": 1}]
+
+    async def test_missing_picks_returns_empty_squad(self, fpl_service):
+        _install_transport(self._handler(delay=0, fail_path="/picks/"))
+        result = await fpl_service.get_enriched_squad(42)
+        assert result["squad"] == []
+        assert result["chips"] == []
+        assert result["entry"]["favourite_team_code"] == 3
+
+
+class TestAggregatedStatsCube:
+    BOOTSTRAP = {
+        "events": [{"id": 1, "is_current": True, "is_next": False, "finished": True, "data_checked": True}],
+        "teams": [{"id": 1, "name": "Arsenal", "short_name": "ARS", "code": 3}],
+        "elements": [
+            {
+                "id": 7,
+                "team": 1,
+                "element_type": 3,
+                "web_name": "Saka",
+                "first_name": "Bukayo",
+                "second_name": "Saka",
+                "now_cost": 100,
+                "total_points": 9,
+                "news": "",
+                "status": "a",
+                "photo": "7.jpg",
+                "code": 7,
+                "chance_of_playing_next_round": None,
+            }
+        ],
+    }
+    FIXTURES = [
+        {
+            "id": 10,
+            "code": 10,
+            "event": 1,
+            "team_h": 1,
+            "team_a": 2,
+            "kickoff_time": None,
+            "team_h_difficulty": 2,
+            "team_a_difficulty": 3,
+        }
+    ]
+    LIVE = {
+        "elements": [
+            {
+                "id": 7,
+                "stats": {"total_points": 9},
+                "explain": [{"fixture": 10, "stats": [{"identifier": "minutes", "points": 2, "value": 90}]}],
+            }
+        ]
+    }
+
+    async def test_final_gameweeks_ingested_once(self, fpl_service, tmp_path, monkeypatch):
+        monkeypatch.setattr(FPLService, "_immutable", ImmutableCache(str(tmp_path)))
+        live_calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path.endswith("/bootstrap-static/"):
+                return httpx.Response(200, json=self.BOOTSTRAP)
+            if path.endswith("/fixtures/"):
+                return httpx.Response(200, json=self.FIXTURES)
+            live_calls.append(path)
+            return httpx.Response(200, json=self.LIVE)
+
+        _install_transport(handler)
+        both = await fpl_service.get_aggregated_player_stats(1, 38)
+        away = await fpl_service.get_aggregated_player_stats(1, 38, "away")
+
+        assert both[0]["points_in_range"] == 9
+        assert both[0]["matches_in_range"] == 1
+        assert away[0]["points_in_range"] == 0
+        assert len(live_calls) == 1
+
+
+class TestSolverWindowPoints:
+    @staticmethod
+    def _element(pid: int, position: int) -> dict:
+        return {
+            "id": pid,
+            "team": pid % 8 + 1,
+            "element_type": position,
+            "web_name": f"P{pid}",
+            "first_name": "P",
+            "second_name": str(pid),
+            "now_cost": 45,
+            "total_points": 50,
+            "form": "1.0",
+            "news": "",
+            "status": "a",
+            "code": pid,
+            "chance_of_playing_next_round": None,
+        }
+
+    async def test_partial_range_uses_points_cube(self, fpl_service, tmp_path, monkeypatch):
+        monkeypatch.setattr(FPLService, "_immutable", ImmutableCache(str(tmp_path)))
+        positions = [1] * 3 + [2] * 7 + [3] * 7 + [4] * 5
+        elements = [self._element(pid, position) for pid, position in enumerate(positions, start=1)]
+        bootstrap = {
+            "events": [
+                {"id": 1, "is_current": False, "is_next": False, "finished": True, "data_checked": True},
+                {"id": 2, "is_current": True, "is_next": False, "finished": False, "data_checked": False},
+            ],
+            "teams": [{"id": t, "name": f"T{t}", "short_name": f"T{t}", "code": t} for t in range(1, 9)],
+            "elements": elements,
+        }
+        # GW1 points favour higher ids; only GW1 is in the window
+        live = {"elements": [{"id": p["id"], "stats": {"total_points": p["id"]}, "explain": []} for p in elements]}
+        paths = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            paths.append(path)
+            if path.endswith("/bootstrap-static/"):
+                return httpx.Response(200, json=bootstrap)
+            if path.endswith("/fixtures/"):
+                return httpx.Response(200, json=[])
+            return httpx.Response(200, json=live)
+
+        _install_transport(handler)
+        result = await fpl_service.get_optimized_team(min_gw=1, max_gw=1)
+
+        assert not any("element-summary" in path for path in paths)
+        assert result["status"] == "Optimal"
+        assert result["total_points"] == sum(p["points"] for p in result["squad"])
+        assert {p["points"] for p in result["squad"]} <= {p["id"] for p in elements}
+
+
+class TestTopManagerSample:
+    BOOTSTRAP = {
+        "events": [{"id": 5, "is_current": True, "is_next": False, "finished": False, "data_checked": False}],
+        "teams": [],
+        "elements": [],
+    }
+
+    async def test_growing_sample_only_fetches_new_entries(self, fpl_service, monkeypatch):
+        monkeypatch.setattr(FPLService, "_top_manager_limiter", RateLimiter(10_000))
+        pages, picks = [], []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path.endswith("/bootstrap-static/"):
+                return httpx.Response(200, json=self.BOOTSTRAP)
+            if path.endswith("/standings/"):
+                page = int(request.url.params["page_standings"])
+                pages.append(page)
+                results = [{"entry": (page - 1) * 50 + i} for i in range(1, 51)]
+                return httpx.Response(200, json={"standings": {"results": results}})
+            picks.append(path)
+            return httpx.Response(200, json={"picks": [], "active_chip": "3xc"})
+
+        _install_transport(handler)
+        first = await fpl_service.get_top_managers_ownership(gw=5, count=100)
+        second = await fpl_service.get_top_managers_ownership(gw=5, count=150)
+
+        assert sorted(pages) == [1, 2, 3]
+        assert len(picks) == 150
+        assert first["sample_size"] == 100
+        assert second["chips"] == {"3xc": 150}
+        working_set = fpl_service.get_cache_stats()["working_sets"]["top_managers"]
+        assert working_set["entries"] == 150 and working_set["bytes"] > 0
+
+    @pytest.mark.parametrize(
+        "failure",
+        [httpx.Response(503), httpx.Response(200, text="<html>The game is being updated.</html>")],
+        ids=["error-status", "non-json"],
+    )
+    async def test_failed_middle_page_is_skipped_and_reported(self, fpl_service, monkeypatch, failure):
+        monkeypatch.setattr(FPLService, "_top_manager_limiter", RateLimiter(10_000))
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path.endswith("/bootstrap-static/"):
+                return httpx.Response(200, json=self.BOOTSTRAP)
+            if path.endswith("/standings/"):
+                page = int(request.url.params["page_standings"])
+                if page == 2:
+                    return failure
+                results = [{"entry": (page - 1) * 50 + i} for i in range(1, 51)]
+                return httpx.Response(200, json={"standings": {"results": results}})
+            return httpx.Response(200, json={"picks": [], "active_chip": "3xc"})
+
+        _install_transport(handler)
+        data = await fpl_service.get_top_managers_ownership(gw=5, count=500)
+
+        assert data["sample_size"] == 450
+        assert data["chips"] == {"3xc": 450}
+        assert data["missing_pages"] == [2]
+
+    async def test_non_json_picks_are_retried_later(self, fpl_service, monkeypatch):
+        monkeypatch.setattr(FPLService, "_top_manager_limiter", RateLimiter(10_000))
+        picks = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path.endswith("/bootstrap-static/"):
+                return httpx.Response(200, json=self.BOOTSTRAP)
+            if path.endswith("/standings/"):
+                return httpx.Response(200, json={"standings": {"results": [{"entry": i} for i in range(1, 51)]}})
+            picks.append(path)
+            if int(path.split("/")[3]) % 10 == 0:
+                return httpx.Response(200, text="<html>The game is being updated.</html>")
+            return httpx.Response(200, json={"picks": [], "active_chip": None})
+
+        _install_transport(handler)
+        await asyncio.wait_for(fpl_service.get_top_managers_ownership(gw=5, count=50), timeout=5)
+        assert len(picks) == 50
+
+        await fpl_service.get_top_managers_ownership(gw=5, count=50)
+        assert sorted(picks[50:]) == [f"/api/entry/{entry}/event/5/picks/" for entry in (10, 20, 30, 40, 50)]
+
+    async def test_sample_persists_across_restart(self, fpl_service, monkeypatch):
+        monkeypatch.setattr(FPLService, "_top_manager_limiter", RateLimiter(10_000))
+        picks = []
+        _install_transport(self._slow_handler(self.BOOTSTRAP, picks))
+        await fpl_service.get_top_managers_ownership(gw=5, count=50)
+
+        # A fresh process starts with an empty in-memory store
+        FPLService._top_managers.clear()
+        second = await fpl_service.get_top_managers_ownership(gw=5, count=50)
+
+        assert len(picks) == 50
+        assert second["sample_size"] == 50
+
+    async def test_trends_reuse_previous_sample(self, fpl_service, monkeypatch):
+        monkeypatch.setattr(FPLService, "_top_manager_limiter", RateLimiter(10_000))
+        bootstrap = {**self.BOOTSTRAP, "elements": [], "teams": []}
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path.endswith("/bootstrap-static/"):
+                return httpx.Response(200, json=bootstrap)
+            requests.append(path)
+            if path.endswith("/standings/"):
+                return httpx.Response(200, json={"standings": {"results": [{"entry": i} for i in range(1, 51)]}})
+            gw = int(path.split("/")[-3])
+            element = 100 + gw  # every manager swaps one player each GW
+            picks = [{"element": e, "position": i, "multiplier": 1} for i, e in enumerate([*range(1, 15), element])]
+            return httpx.Response(200, json={"picks": picks, "active_chip": None})
+
+        _install_transport(handler)
+        await fpl_service.get_top_managers_ownership(gw=4, count=50)
+        requests.clear()
+
+        await fpl_service.get_top_manager_trends(5, [(0, 50)])
+        second_requests = list(requests)
+        trends = await fpl_service.get_top_manager_trends(5, [(0, 50)])
+
+        # GW4 picks were already stored: only GW5 standings and picks were fetched
+        assert not [path for path in second_requests if "/event/4/" in path]
+        assert len([path for path in second_requests if "/event/5/" in path]) == 50
+        assert trends["previous_gameweek"] == 4 and trends["bands"][0]["sample_size"] == 50
+        # Nothing expired: the repeat is a pure matrix diff
+        assert len(requests) == len(second_requests)
+
+    @staticmethod
+    def _slow_handler(bootstrap: dict, picks: list, delay: float = 0):
+        async def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path.endswith("/bootstrap-static/"):
+                return httpx.Response(200, json=bootstrap)
+            if path.endswith("/standings/"):
+                page = int(request.url.params["page_standings"])
+                results = [{"entry": (page - 1) * 50 + i} for i in range(1, 51)]
+                return httpx.Response(200, json={"standings": {"results": results}})
+            await asyncio.sleep(delay)
+            picks.append(path)
+            return httpx.Response(200, json={"picks": [], "active_chip": None})
+
+        return handler
+
+    async def test_stream_emits_partials_then_final(self, fpl_service, monkeypatch):
+        monkeypatch.setattr(FPLService, "_top_manager_limiter", RateLimiter(10_000))
+        _install_transport(self._slow_handler(self.BOOTSTRAP, []))
+
+        lines = [line async for line in fpl_service.stream_top_managers_ownership(gw=5, count=100, every=25)]
+
+        assert lines[-1]["progress"] == {"fetched": 100, "target": 100, "complete": True}
+        assert all(not line["progress"]["complete"] for line in lines[:-1])
+        fetched = [line["progress"]["fetched"] for line in lines]
+        assert fetched == sorted(fetched)
+
+    async def test_closing_stream_stops_crawl(self, fpl_service, monkeypatch):
+        monkeypatch.setattr(FPLService, "_top_manager_limiter", RateLimiter(200))
+        picks = []
+        _install_transport(self._slow_handler(self.BOOTSTRAP, picks, delay=0.01))
+
+        stream = fpl_service.stream_top_managers_ownership(gw=5, count=200, every=10)
+        first = await anext(stream)
+        await stream.aclose()
+        fetched_at_close = len(picks)
+        await asyncio.sleep(0.2)
+
+        assert first["progress"]["complete"] is False
+        assert len(picks) <= fetched_at_close + 16
+        assert len(picks) < 200
@@ -1,3 +1,4 @@
+import json
 from unittest.mock import AsyncMock, patch
 
 import pytest
@@ -67,3 +68,84 @@ async def test_get_current_gameweek(client, mock_fpl_service):
     assert response.status_code == 200
     data = response.json()
     assert data["gameweek"] == 10
+
+
+async def test_top_managers_bands_are_one_based(client, mock_fpl_service):
+    mock_fpl_service.get_top_manager_bands = AsyncMock(return_value={"gameweek": 5, "bands": []})
+    response = await client.get("/api/analysis/top-managers/bands", params={"gw": 5, "bands": "1-10,501-1000"})
+    assert response.status_code == 200
+    mock_fpl_service.get_top_manager_bands.assert_awaited_once_with(5, [(0, 10), (500, 1000)])
+
+
+async def test_top_managers_bands_rejects_reversed_band(client, mock_fpl_service):
+    response = await client.get("/api/analysis/top-managers/bands", params={"bands": "100-10"})
+    assert response.status_code == 422
+
+
+async def test_top_managers_trends_need_previous_gameweek(client, mock_fpl_service):
+    mock_fpl_service.get_top_manager_trends = AsyncMock(return_value={"gameweek": 5, "bands": []})
+    response = await client.get("/api/analysis/top-managers/trends", params={"gw": 5, "bands": "1-100"})
+    assert response.status_code == 200
+    mock_fpl_service.get_top_manager_trends.assert_awaited_once_with(5, [(0, 100)])
+    response = await client.get("/api/analysis/top-managers/trends", params={"gw": 1})
+    assert response.status_code == 422
+
+
+async def test_top_managers_stream_is_ndjson(client, mock_fpl_service):
+    async def stream(gw, count, every):
+        yield {"sample_size": 50, "progress": {"fetched": 50, "target": 100, "complete": False}}
+        yield {"sample_size": 100, "progress": {"fetched": 100, "target": 100, "complete": True}}
+
+    mock_fpl_service.stream_top_managers_ownership = stream
+    response = await client.get("/api/analysis/top-managers/stream", params={"count": 100, "every": 50})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["sample_size"] for line in lines] == [50, 100]
+
+
+async def test_cache_stats(client, mock_fpl_service):
+    mock_fpl_service.get_cache_stats.return_value = {"entries": 1, "bytes": 10, "namespaces": {}}
+    response = await client.get("/api/cache/stats")
+    assert response.status_code == 200
+    assert response.json()["bytes"] == 10
+
+
+async def test_metrics_record_route_templates(client, mock_fpl_service):
+    mock_fpl_service.get_cache_stats.return_value = {"entries": 0, "bytes": 0, "namespaces": {}}
+    await client.get("/api/optimization/stats")
+    response = await client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'fpl_http_requests_total{method="GET",route="/api/optimization/stats",status="200"}' in response.text
+
+
+async def test_responses_carry_server_timing(client, mock_fpl_service):
+    mock_fpl_service.get_cache_policy.return_value = {}
+    response = await client.get("/api/cache/policy", headers={"X-Debug-Trace": "1"})
+    assert response.headers["server-timing"].startswith("total;dur=")
+    assert response.headers["x-trace-id"]
+
+
+async def test_jobs_submit_and_poll(client, mock_fpl_service, monkeypatch):
+    from backend import main
+    from backend.jobs import JobManager
+
+    jobs = JobManager()
+    jobs.register("aggregated_players", main._aggregated_players_job)
+    monkeypatch.setattr(main, "jobs", jobs)
+    mock_fpl_service.get_aggregated_player_stats = AsyncMock(return_value=[{"id": 1}])
+
+    response = await client.post("/api/jobs/players-aggregated", json={"min_gw": 5, "max_gw": 10})
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert (await client.post("/api/jobs/players-aggregated", json={"min_gw": 5, "max_gw": 10})).json()["id"] == job_id
+
+    lines = (await client.get(f"/api/jobs/{job_id}/stream")).text.strip().splitlines()
+    assert json.loads(lines[-1])["status"] == "done"
+    data = (await client.get(f"/api/jobs/{job_id}")).json()
+    assert data["result"] == [{"id": 1}]
+    mock_fpl_service.get_aggregated_player_stats.assert_awaited_once_with(5, 10, "both")
+
+    assert (await client.get("/api/jobs/unknown")).status_code == 404
+    assert (await client.post("/api/jobs/players-aggregated", json={"venue": "neutral"})).status_code == 422
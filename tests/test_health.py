@@ -1,4 +1,35 @@
+import asyncio
+
+
 async def test_health_endpoint(client):
     response = await client.get("/api/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+
+
+async def test_liveness_endpoint(client):
+    response = await client.get("/api/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+async def test_readiness_waits_for_warmup(client, monkeypatch):
+    from backend import main
+    from backend.warmup import Warmup
+
+    gate = asyncio.Event()
+    warmup = Warmup({"bootstrap": gate.wait})
+    monkeypatch.setattr(main, "warmup", warmup)
+    warmup.start()
+    try:
+        response = await client.get("/api/health/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming"
+
+        gate.set()
+        await asyncio.sleep(0)
+        response = await client.get("/api/health/ready")
+        assert response.status_code == 200
+        assert response.json()["steps"]["bootstrap"]["status"] == "done"
+    finally:
+        await warmup.stop()
@@ -0,0 +1,189 @@
+import asyncio
+import time
+
+from backend import jobs as jobs_module
+from backend.cache_backend import SQLiteBackend
+from backend.jobs import Job, JobManager, job_id
+
+
+def _gated(gate: asyncio.Event, calls: list):
+    async def handler(params, report):
+        calls.append(params)
+        report({"step": 1})
+        await gate.wait()
+        return {"total": params["n"] * 2}
+
+    return handler
+
+
+async def _finish(job):
+    await asyncio.wait_for(job.task, timeout=1)
+
+
+async def test_identical_submissions_share_one_run():
+    gate, calls = asyncio.Event(), []
+    jobs = JobManager()
+    jobs.register("double", _gated(gate, calls))
+
+    first = await jobs.submit("double", {"n": 2})
+    second = await jobs.submit("double", {"n": 2})
+    other = await jobs.submit("double", {"n": 3})
+    assert first is second
+    assert first.id == job_id("double", {"n": 2}) != other.id
+
+    gate.set()
+    await _finish(first)
+    await _finish(other)
+    assert len(calls) == 2
+    assert first.to_dict()["result"] == {"total": 4}
+    # A finished result is reused within the TTL
+    assert await jobs.submit("double", {"n": 2}) is first
+    assert jobs.stats()["deduplicated"] == 2
+
+
+async def test_concurrency_is_bounded_per_type():
+    gate, calls = asyncio.Event(), []
+    jobs = JobManager()
+    jobs.register("double", _gated(gate, calls), concurrency=1)
+    jobs.register("other", _gated(gate, []), concurrency=1)
+
+    first = await jobs.submit("double", {"n": 1})
+    second = await jobs.submit("double", {"n": 2})
+    unrelated = await jobs.submit("other", {"n": 1})
+    await asyncio.sleep(0.01)
+    assert (first.status, second.status, unrelated.status) == ("running", "queued", "running")
+    assert jobs.stats()["types"]["double"] == {"concurrency": 1, "queued": 1, "running": 1, "done": 0, "failed": 0}
+
+    gate.set()
+    await _finish(second)
+    assert second.status == "done"
+
+
+async def test_failed_job_is_rerun():
+    attempts = []
+
+    async def flaky(params, report):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("upstream down")
+        return "ok"
+
+    jobs = JobManager()
+    jobs.register("flaky", flaky)
+    failed = await jobs.submit("flaky", {})
+    await _finish(failed)
+    assert failed.to_dict()["error"] == "upstream down"
+    assert "result" not in failed.to_dict()
+
+    retried = await jobs.submit("flaky", {})
+    assert retried is not failed
+    await _finish(retried)
+    assert retried.result == "ok"
+
+
+async def test_expired_results_are_dropped():
+    jobs = JobManager(ttl=0)
+    jobs.register("double", _gated(asyncio.Event(), []))
+    job = await jobs.submit("double", {"n": 1})
+    await asyncio.sleep(0.01)
+    job.task.cancel()
+    await asyncio.gather(job.task, return_exceptions=True)
+    assert job.to_dict()["error"] == "cancelled"
+    await asyncio.sleep(0.01)
+    assert await jobs.get(job.id) is None
+
+
+async def test_updates_stream_until_finished():
+    gate = asyncio.Event()
+    jobs = JobManager()
+    jobs.register("double", _gated(gate, []))
+    job = await jobs.submit("double", {"n": 5})
+
+    seen = []
+
+    async def consume():
+        async for update in jobs.updates(job):
+            seen.append(update["status"])
+            if update["progress"]:
+                gate.set()
+
+    await asyncio.wait_for(consume(), timeout=1)
+    assert len(seen) >= 2
+    assert seen[-1] == "done"
+
+
+async def test_shared_backend_serves_other_workers(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    calls = []
+    gate = asyncio.Event()
+    worker, peer = JobManager(SQLiteBackend(path)), JobManager(SQLiteBackend(path))
+    for jobs in (worker, peer):
+        jobs.register("double", _gated(gate, calls))
+
+    job = await worker.submit("double", {"n": 4})
+    await asyncio.sleep(0.01)
+    assert (await peer.get(job.id)).status == "running"
+
+    gate.set()
+    await _finish(job)
+    reused = await peer.submit("double", {"n": 4})
+    assert reused.status == "done"
+    assert reused.result == {"total": 8}
+    assert len(calls) == 1
+    worker.backend.close()
+    peer.backend.close()
+
+
+async def test_progress_is_shared_with_other_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs_module, "JOB_PROGRESS_INTERVAL", 0)
+    path = str(tmp_path / "cache.sqlite3")
+    gate = asyncio.Event()
+    worker, peer = JobManager(SQLiteBackend(path)), JobManager(SQLiteBackend(path))
+    worker.register("double", _gated(gate, []))
+
+    job = await worker.submit("double", {"n": 4})
+    for _ in range(100):
+        if (await peer.get(job.id)).progress is not None:
+            break
+        await asyncio.sleep(0.01)
+    assert (await peer.get(job.id)).progress == {"step": 1}
+
+    gate.set()
+    await _finish(job)
+    assert (await peer.get(job.id)).status == "done"
+    worker.backend.close()
+    peer.backend.close()
+
+
+async def test_stale_running_job_is_rerun(tmp_path):
+    calls = []
+    jobs = JobManager(SQLiteBackend(str(tmp_path / "cache.sqlite3")))
+    jobs.register("double", _gated(asyncio.Event(), calls))
+    # Left behind by a worker that died mid-run
+    orphan = Job(job_id("double", {"n": 1}), "double", {"n": 1})
+    orphan.status, orphan.updated_at = "running", time.time() - jobs_module.JOB_STALE_AFTER - 1
+    await jobs.backend.set(f"job:{orphan.id}", orphan.to_dict(), orphan.updated_at)
+
+    assert (await jobs.get(orphan.id)).status == "failed"
+    job = await jobs.submit("double", {"n": 1})
+    await asyncio.sleep(0.01)
+    assert job.status == "running"
+    assert calls == [{"n": 1}]
+    await jobs.shutdown()
+    jobs.backend.close()
+
+
+async def test_expired_jobs_are_purged_from_shared_backend(tmp_path):
+    jobs = JobManager(SQLiteBackend(str(tmp_path / "cache.sqlite3")), ttl=0)
+    jobs.register("double", _gated(asyncio.Event(), []))
+    job = await jobs.submit("double", {"n": 1})
+    await asyncio.sleep(0.01)
+    job.task.cancel()
+    await asyncio.gather(job.task, return_exceptions=True)
+    await asyncio.sleep(0.01)
+
+    jobs._purged_at = 0.0
+    await jobs.submit("double", {"n": 2})
+    assert await jobs.backend.get(f"job:{job.id}") is None
+    await jobs.shutdown()
+    jobs.backend.close()
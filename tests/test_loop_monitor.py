@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+from backend.loop_monitor import LOOP_LAG, LoopMonitor
+
+
+def blocking_parse():
+    time.sleep(0.3)
+
+
+async def test_captures_stack_of_blocking_call():
+    monitor = LoopMonitor(interval=0.01, threshold=0.1)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        blocking_parse()
+        await asyncio.sleep(0.05)
+    finally:
+        monitor.stop()
+
+    stats = monitor.stats()
+    assert stats["stalls"] == 1
+    (stall,) = stats["recent_stalls"]
+    assert "blocking_parse" in stall["stack"]
+    assert stall["blocked_for"] >= 0.25
+
+
+async def test_idle_loop_has_no_stalls():
+    samples_before = LOOP_LAG._values.get((), {}).get("count", 0)
+    monitor = LoopMonitor(interval=0.01, threshold=0.2)
+    monitor.start()
+    await asyncio.sleep(0.1)
+    monitor.stop()
+
+    assert monitor.stats()["stalls"] == 0
+    assert LOOP_LAG._values[()]["count"] > samples_before
@@ -0,0 +1,83 @@
+import httpx
+from backend.metrics import (
+    UPSTREAM_BYTES,
+    UPSTREAM_EVENT_HOOKS,
+    UPSTREAM_REQUESTS,
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+    cache_metrics,
+    path_template,
+)
+
+
+class TestRendering:
+    def test_counter_and_gauge_text_format(self):
+        registry = Registry()
+        counter = registry.register(Counter("requests_total", "Requests.", ("route",)))
+        gauge = registry.register(Gauge("in_flight", "In flight."))
+        counter.inc(route="/api/teams")
+        counter.inc(2, route="/api/teams")
+        counter.inc(route='/a"b')
+        gauge.inc()
+
+        text = registry.render()
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{route="/api/teams"} 3' in text
+        assert 'requests_total{route="/a\\"b"} 1' in text
+        assert "in_flight 1" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            histogram.observe(value)
+
+        lines = histogram.render()
+        assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{le="1"} 3' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+        assert "latency_seconds_count 4" in lines
+        assert "latency_seconds_sum 4.25" in lines
+
+    def test_cache_metrics_from_stats(self):
+        stats = {
+            "namespaces": {
+                "core": {
+                    "entries": 2,
+                    "bytes": 100,
+                    "max_bytes": 1000,
+                    "hits": 5,
+                    "misses": 1,
+                    "evictions": 0,
+                    "expirations": 0,
+                }
+            }
+        }
+        stats["single_flight"] = {"in_flight": 1, "calls": 9, "shared": 4, "waiters": {"event/1/live": 3}}
+        text = "\n".join(line for metric in cache_metrics(stats) for line in metric.render())
+        assert 'fpl_cache_hits_total{namespace="core"} 5' in text
+        assert 'fpl_cache_bytes{namespace="core"} 100' in text
+        assert "fpl_upstream_coalesced_shared_total 4" in text
+        assert "fpl_upstream_coalesced_waiters 3" in text
+
+
+def test_path_template_bounds_label_values():
+    assert path_template("/api/entry/123/event/5/picks/") == "/api/entry/{id}/event/{id}/picks/"
+    assert path_template("/vaastav/data/2023-24/teams.csv") == "/vaastav/data/{season}/teams.csv"
+
+
+async def test_upstream_hooks_count_requests_and_bytes():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=b"x" * 42)
+
+    labels = {"host": "fantasy.premierleague.com", "path": "/api/entry/{id}/"}
+    before_requests = UPSTREAM_REQUESTS._values.get(("fantasy.premierleague.com", "/api/entry/{id}/", "200"), 0)
+    before_bytes = UPSTREAM_BYTES._values.get(tuple(labels.values()), 0)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler), event_hooks=UPSTREAM_EVENT_HOOKS) as client:
+        await client.get("https://fantasy.premierleague.com/api/entry/1/")
+        response = await client.get("https://fantasy.premierleague.com/api/entry/2/")
+
+    assert response.content == b"x" * 42
+    assert UPSTREAM_REQUESTS._values[("fantasy.premierleague.com", "/api/entry/{id}/", "200")] == before_requests + 2
+    assert UPSTREAM_BYTES._values[tuple(labels.values())] == before_bytes + 84
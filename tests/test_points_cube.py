@@ -0,0 +1,73 @@
+from backend.models import Fixture
+from backend.points_cube import APPEARANCES, POINTS, PointsCube
+
+# Team 1 hosts team 2 in fixture 10 (GW1); GW2 is a double for team 1: away at 3, home to 4
+FIXTURES = {
+    10: Fixture(
+        id=10, code=10, event=1, team_h=1, team_a=2, kickoff_time=None, team_h_difficulty=2, team_a_difficulty=3
+    ),
+    20: Fixture(
+        id=20, code=20, event=2, team_h=3, team_a=1, kickoff_time=None, team_h_difficulty=2, team_a_difficulty=3
+    ),
+    21: Fixture(
+        id=21, code=21, event=2, team_h=1, team_a=4, kickoff_time=None, team_h_difficulty=2, team_a_difficulty=3
+    ),
+}
+TEAM_OF = {7: 1, 8: 2}
+
+
+def _explain(fixture: int, minutes: int, goals: int = 0) -> dict:
+    stats = [{"identifier": "minutes", "points": 2 if minutes >= 60 else int(minutes > 0), "value": minutes}]
+    if goals:
+        stats.append({"identifier": "goals_scored", "points": 4 * goals, "value": goals})
+    return {"fixture": fixture, "stats": stats}
+
+
+def _element(pid: int, *explain: dict, total_points: int | None = None) -> dict:
+    points = sum(s["points"] for e in explain for s in e["stats"])
+    return {
+        "id": pid,
+        "stats": {"total_points": points if total_points is None else total_points},
+        "explain": list(explain),
+    }
+
+
+def _cube() -> PointsCube:
+    cube = PointsCube()
+    cube.ingest(
+        1, {"elements": [_element(7, _explain(10, 90, goals=1)), _element(8, _explain(10, 30))]}, FIXTURES, TEAM_OF
+    )
+    cube.ingest(2, {"elements": [_element(7, _explain(20, 90), _explain(21, 0))]}, FIXTURES, TEAM_OF)
+    return cube
+
+
+class TestPointsCube:
+    def test_range_totals(self):
+        cube = _cube()
+        assert cube.totals_by_player(POINTS, 1, 2) == {7: 8, 8: 1}
+        assert cube.totals_by_player(POINTS, 2, 2) == {7: 2, 8: 0}
+        assert cube.totals_by_player(APPEARANCES, 1, 2) == {7: 2, 8: 1}
+
+    def test_venue_split_in_double_gameweek(self):
+        cube = _cube()
+        assert cube.totals_by_player(POINTS, 1, 2, "home") == {7: 6, 8: 0}
+        assert cube.totals_by_player(POINTS, 1, 2, "away") == {7: 2, 8: 1}
+        assert cube.totals_by_player(APPEARANCES, 2, 2, "home") == {7: 0, 8: 0}
+
+    def test_explain_stats_are_channels(self):
+        cube = _cube()
+        assert cube.totals_by_player("goals_scored", 1, 38) == {7: 1, 8: 0}
+        assert cube.totals_by_player("minutes", 1, 2) == {7: 180, 8: 30}
+
+    def test_reingest_replaces_gameweek(self):
+        cube = _cube()
+        cube.ingest(1, {"elements": [_element(7, _explain(10, 90))]}, FIXTURES, TEAM_OF, final=True)
+        assert cube.totals_by_player(POINTS, 1, 2) == {7: 4, 8: 0}
+        assert cube.needs(1) is False
+        assert cube.needs(2) is True
+
+    def test_unexplained_points_only_count_for_both_venues(self):
+        cube = PointsCube()
+        cube.ingest(1, {"elements": [_element(7, _explain(10, 90), total_points=5)]}, FIXTURES, TEAM_OF)
+        assert cube.totals_by_player(POINTS, 1, 1) == {7: 5}
+        assert cube.totals_by_player(POINTS, 1, 1, "home") == {7: 2}
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from backend.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    async def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        release = asyncio.Event()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "done"
+
+        tasks = [asyncio.create_task(flight.do("event/1/live", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert flight.waiters() == {"event/1/live": 5}
+
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        assert results == ["done"] * 5
+        assert calls == 1
+        assert flight.waiters() == {}
+        assert flight.stats()["shared"] == 4
+
+    async def test_key_released_after_completion(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await flight.do("k", work) == 1
+        assert await flight.do("k", work) == 2
+
+    async def test_exception_propagates_to_all_waiters(self):
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        tasks = [asyncio.create_task(flight.do("k", work)) for _ in range(3)]
+        for task in tasks:
+            with pytest.raises(ValueError):
+                await task
+
+    async def test_cancelled_waiter_does_not_cancel_shared_call(self):
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return 42
+
+        first = asyncio.create_task(flight.do("k", work))
+        second = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+
+        assert await second == 42
@@ -0,0 +1,103 @@
+from backend.models import Fixture
+from backend.snapshots import BootstrapSnapshot, FixtureIndex
+
+
+def _bootstrap(**overrides) -> dict:
+    data = {
+        "events": [
+            {"id": 1, "is_current": False, "is_next": False, "finished": True, "data_checked": True},
+            {"id": 2, "is_current": True, "is_next": False, "finished": False, "data_checked": False},
+            {"id": 3, "is_current": False, "is_next": True, "finished": False, "data_checked": False},
+        ],
+        "teams": [{"id": 1, "name": "Arsenal"}, {"id": 2, "name": "Chelsea"}],
+        "elements": [
+            {"id": 10, "team": 1, "element_type": 1},
+            {"id": 11, "team": 1, "element_type": 3},
+            {"id": 12, "team": 2, "element_type": 3},
+        ],
+    }
+    data.update(overrides)
+    return data
+
+
+class TestBootstrapSnapshot:
+    def test_lookup_tables(self):
+        snapshot = BootstrapSnapshot.from_bootstrap(_bootstrap())
+        assert snapshot.elements_by_id[12]["team"] == 2
+        assert snapshot.teams_by_id[1]["name"] == "Arsenal"
+        assert [p["id"] for p in snapshot.players_by_team[1]] == [10, 11]
+        assert [p["id"] for p in snapshot.players_by_position[3]] == [11, 12]
+        assert snapshot.events_by_id[3]["is_next"] is True
+
+    def test_current_and_next_gameweek(self):
+        snapshot = BootstrapSnapshot.from_bootstrap(_bootstrap())
+        assert snapshot.current_gameweek == 2
+        assert snapshot.next_gameweek == 3
+
+    def test_preseason_falls_back_to_before_next(self):
+        events = [{"id": 1, "is_current": False, "is_next": True, "finished": False, "data_checked": False}]
+        snapshot = BootstrapSnapshot.from_bootstrap(_bootstrap(events=events))
+        assert snapshot.current_event is None
+        assert snapshot.current_gameweek == 1
+
+    def test_end_of_season_defaults(self):
+        snapshot = BootstrapSnapshot.from_bootstrap(_bootstrap(events=[]))
+        assert snapshot.current_gameweek == 38
+        assert snapshot.next_gameweek == 38
+
+    def test_is_gameweek_final(self):
+        snapshot = BootstrapSnapshot.from_bootstrap(_bootstrap())
+        assert snapshot.is_gameweek_final(1) is True
+        assert snapshot.is_gameweek_final(2) is False
+        assert snapshot.is_gameweek_final(99) is False
+
+
+def _fixture(fixture_id: int, event: int | None, team_h: int, team_a: int, kickoff_time: str | None) -> Fixture:
+    return Fixture(
+        id=fixture_id,
+        code=fixture_id,
+        event=event,
+        team_h=team_h,
+        team_a=team_a,
+        kickoff_time=kickoff_time,
+        team_h_difficulty=3,
+        team_a_difficulty=3,
+    )
+
+
+def _fixture_index() -> FixtureIndex:
+    # GW2: team 1 doubles, team 4 blanks; one postponed fixture has no event yet
+    return FixtureIndex.from_fixtures(
+        [
+            _fixture(5, None, 3, 4, None),
+            _fixture(3, 2, 3, 1, "2025-08-24T14:00:00Z"),
+            _fixture(1, 1, 1, 2, "2025-08-16T14:00:00Z"),
+            _fixture(2, 1, 3, 4, "2025-08-16T11:30:00Z"),
+            _fixture(4, 2, 1, 2, "2025-08-23T14:00:00Z"),
+        ]
+    )
+
+
+class TestFixtureIndex:
+    def test_lookups(self):
+        index = _fixture_index()
+        assert index.by_id[3].team_a == 1
+        assert [f.id for f in index.for_event(1)] == [1, 2]
+        assert [f.id for f in index.for_event_team(2, 1)] == [3, 4]
+        assert index.for_event(99) == ()
+
+    def test_team_fixtures_ordered_by_event_with_unscheduled_last(self):
+        assert [f.id for f in _fixture_index().for_team(3)] == [2, 3, 5]
+
+    def test_kickoff_order(self):
+        assert [f.id for f in _fixture_index().by_kickoff] == [5, 2, 1, 4, 3]
+
+    def test_blank_and_double_gameweeks(self):
+        index = _fixture_index()
+        assert index.blank_teams(2) == [4]
+        assert index.double_teams(2) == [1]
+        assert index.is_blank(2, 4) is True
+        assert index.is_blank(1, 4) is False
+
+    def test_for_events_range(self):
+        assert [f.id for f in _fixture_index().for_events(1, 2)] == [1, 2, 3, 4]
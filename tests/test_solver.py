@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from backend import solver
+from backend.solver import SolverBusyError, SolverPool, solve_squad
+
+
+def _players() -> list[dict]:
+    # Four teams, enough cheap players per position for a legal squad
+    players = []
+    pid = 1
+    for position, count in ((1, 3), (2, 7), (3, 7), (4, 5)):
+        for i in range(count):
+            players.append({"id": pid, "position": position, "team": pid % 8, "cost": 4.5, "points": 10 + i})
+            pid += 1
+    return players
+
+
+class TestSolveSquad:
+    def test_picks_legal_squad(self):
+        result = solve_squad(_players(), budget=100.0, exclude_bench=False)
+        assert result["status"] == "Optimal"
+        assert len(result["selected"]) == 15
+        assert result["starters"] == result["selected"]
+
+    def test_exclude_bench_picks_eleven_starters(self):
+        result = solve_squad(_players(), budget=100.0, exclude_bench=True)
+        assert len(result["starters"]) == 11
+        assert set(result["starters"]) <= set(result["selected"])
+
+
+class TestSolverPool:
+    async def test_rejects_when_full(self):
+        pool = SolverPool(workers=0, queue_size=0)
+        with pytest.raises(SolverBusyError):
+            await pool.solve(_players(), 100.0, False)
+        assert pool.stats()["rejected"] == 1
+
+    async def test_solves_in_worker_process(self):
+        pool = SolverPool(workers=1, queue_size=1)
+        try:
+            result = await asyncio.wait_for(pool.solve(_players(), 100.0, False), timeout=60)
+        finally:
+            pool.shutdown()
+        assert len(result["selected"]) == 15
+        stats = pool.stats()
+        assert stats["completed"] == 1
+        assert stats["running"] == stats["queued"] == 0
+        assert stats["solve_time"]["max"] is not None
+
+    async def test_abandoned_running_solve_keeps_its_slot(self, monkeypatch):
+        started, release = threading.Event(), threading.Event()
+
+        def blocking_solve(*args):
+            started.set()
+            release.wait(5)
+            return {"solve_time": 0.0}
+
+        monkeypatch.setattr(solver, "solve_squad", blocking_solve)
+        pool = SolverPool(workers=1, queue_size=0)
+        pool._executor = ThreadPoolExecutor(max_workers=1)
+        task = asyncio.create_task(pool.solve(_players(), 100.0, False))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        # Still solving, so a new solve is rejected instead of oversubscribing the pool
+        assert pool.stats()["running"] == 1
+        with pytest.raises(SolverBusyError):
+            await pool.solve(_players(), 100.0, False)
+
+        release.set()
+        for _ in range(100):
+            if not pool.stats()["running"] + pool.stats()["queued"]:
+                break
+            await asyncio.sleep(0.01)
+        assert pool.stats()["running"] == pool.stats()["queued"] == 0
+        pool.shutdown()
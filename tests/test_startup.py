@@ -0,0 +1,53 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from backend import main
+
+# Importing the app took ~4.5s while it pulled in DSPy and scikit-learn; it now takes ~1s
+IMPORT_BUDGET = float(os.getenv("FPL_IMPORT_BUDGET", "2.5"))
+HEAVY_MODULES = ("dspy", "openai", "sklearn", "joblib", "pulp", "backend.analysis_service", "backend.ml_service")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import backend.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def _import_app() -> dict:
+    # A fresh interpreter, so modules already imported by the test session don't hide the cost
+    root = Path(__file__).resolve().parent.parent
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=root, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_app_import_skips_heavy_stacks():
+    loaded = set(_import_app()["modules"])
+    assert [name for name in HEAVY_MODULES if name in loaded] == []
+
+
+def test_app_import_time_within_budget():
+    # Best of three, so one slow run on a busy machine doesn't fail the build
+    elapsed = min(_import_app()["elapsed"] for _ in range(3))
+    assert elapsed < IMPORT_BUDGET, f"importing backend.main took {elapsed:.2f}s (budget {IMPORT_BUDGET}s)"
+
+
+async def test_analysis_service_built_once_off_the_loop(monkeypatch):
+    built = []
+
+    def build():
+        built.append(1)
+        return object()
+
+    monkeypatch.setattr(main, "_analysis_service", None)
+    monkeypatch.setattr(main, "_build_analysis_service", build)
+    first, second = await asyncio.gather(main.get_analysis_service(), main.get_analysis_service())
+
+    assert first is second
+    assert len(built) == 1
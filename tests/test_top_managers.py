@@ -0,0 +1,277 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+from backend.top_managers import (
+    GameweekSample,
+    RateLimiter,
+    TopManagerStore,
+    collect_picks,
+    collect_sample,
+    transfer_trends,
+)
+
+
+def _picks(elements: list[int], captain: int, chip: str | None = None, triple: bool = False) -> dict:
+    picks = [
+        {
+            "element": element,
+            "position": position,
+            "multiplier": (3 if triple else 2) if element == captain else int(position <= 11),
+            "is_captain": element == captain,
+        }
+        for position, element in enumerate(elements, start=1)
+    ]
+    return {"picks": picks, "active_chip": chip}
+
+
+class TestGameweekSample:
+    def test_stale_pages(self):
+        sample = GameweekSample(gw=1)
+        sample.set_page(1, [1, 2], now=100)
+        sample.set_page(2, [3, 4], now=10)
+        assert sample.stale_pages(count=120, max_age=60, now=120) == [2, 3]
+
+    def test_ranking_deduplicates_shifted_pages(self):
+        sample = GameweekSample(gw=1)
+        # Entry 2 dropped from page 1 to page 2 between reads
+        sample.set_page(1, [1, 2, 3])
+        sample.set_page(2, [2, 4, 5])
+        assert sample.ranking(5) == [1, 2, 3, 4, 5]
+        assert sample.ranking(2) == [1, 2]
+
+    def test_ranking_skips_missing_page(self):
+        sample = GameweekSample(gw=1)
+        sample.set_page(1, [1, 2])
+        sample.set_page(3, [5, 6])
+        sample.set_page(4, [7, 8])
+        assert sample.ranking(150) == [1, 2, 5, 6]
+        assert sample.missing_pages(150) == [2]
+
+    def test_matrix_in_rank_order_with_empty_rows_for_missing_picks(self):
+        sample = GameweekSample(gw=1)
+        sample.set_page(1, [1, 2, 3])
+        sample.add_picks(3, _picks(list(range(101, 116)), captain=105, chip="bboost"))
+        sample.add_picks(2, _picks(list(range(201, 216)), captain=201))
+        assert sample.missing_picks(3) == [1]
+
+        matrix = sample.matrix(3)
+        assert matrix.entries.tolist() == [1, 2, 3]
+        assert matrix.elements.dtype == np.int16
+        assert matrix.elements[0].tolist() == [0] * 15
+        assert matrix.elements[1, 0] == 201
+        assert matrix.captains.tolist() == [0, 201, 105]
+        assert matrix.chip_names[matrix.chips[2]] == "bboost"
+
+    def test_storage_stays_compact(self):
+        sample = GameweekSample(gw=1)
+        sample.set_page(1, list(range(1, 2001)))
+        for entry in range(1, 2001):
+            sample.add_picks(entry, _picks(list(range(1, 16)), captain=1))
+        matrix = sample.matrix(2000)
+        nbytes = sum(a.nbytes for a in (matrix.entries, matrix.elements, matrix.multipliers, matrix.captains))
+        # ~50 bytes per manager
+        assert nbytes < 120_000
+
+
+class TestOwnershipBands:
+    @staticmethod
+    def _matrix():
+        sample = GameweekSample(gw=1)
+        sample.set_page(1, [1, 2, 3, 4])
+        squad = list(range(1, 16))
+        sample.add_picks(1, _picks(squad, captain=1, chip="3xc", triple=True))
+        sample.add_picks(2, _picks(squad, captain=2))
+        sample.add_picks(3, _picks([*squad[:14], 20], captain=1))
+        sample.add_picks(4, _picks([*squad[:14], 20], captain=20, chip="wildcard"))
+        return sample.matrix(4)
+
+    def test_overlapping_bands(self):
+        top2, top4, bottom2 = self._matrix().band_counts([(0, 2), (0, 4), (2, 4)])
+        assert top2["size"] == 2
+        assert top2["owned"][15] == 2 and top2["owned"][20] == 0
+        assert top4["owned"][1] == 4 and top4["owned"][20] == 2
+        assert bottom2["owned"][15] == 0
+        assert top4["captained"][1] == 2
+        assert top2["chips"] == {"3xc": 1}
+        assert bottom2["chips"] == {"wildcard": 1}
+
+    def test_effective_ownership_counts_multipliers(self):
+        (top4,) = self._matrix().band_counts([(0, 4)])
+        # Triple captain (3) + starter (1) + captain (2) + starter (1)
+        assert top4["effective"][1] == 7
+        # Bench slot for the first two squads, captain for the last
+        assert top4["effective"][20] == 2
+
+    def test_band_beyond_sample_is_clipped(self):
+        (band,) = self._matrix().band_counts([(2, 100)])
+        assert band["size"] == 2
+
+
+class TestTransferTrends:
+    def test_joins_by_entry_and_diffs_squads(self):
+        squad = list(range(1, 16))
+        previous = GameweekSample(gw=1)
+        previous.set_page(1, [2, 1, 3])
+        previous.add_picks(1, _picks(squad, captain=1))
+        previous.add_picks(2, _picks(squad, captain=1))
+        previous.add_picks(3, _picks(squad, captain=1))
+        current = GameweekSample(gw=2)
+        # Rank order changed and entry 9 is new to the sample
+        current.set_page(1, [1, 9, 2, 3])
+        current.add_picks(1, _picks([*squad[:14], 20], captain=20, chip="wildcard"))
+        current.add_picks(9, _picks(squad, captain=1))
+        current.add_picks(2, _picks([*squad[:13], 20, 21], captain=1))
+        current.add_picks(3, _picks(squad, captain=2))
+
+        top2, top4 = transfer_trends(previous.matrix(3), current.matrix(4), [(0, 2), (0, 4)])
+
+        # Entry 9 has no previous picks and is left out
+        assert top2["size"] == 1 and top4["size"] == 3
+        assert top2["transfers_in"][20] == 1 and top2["transfers_out"][15] == 1
+        assert top4["transfers_in"][20] == 2 and top4["transfers_in"][21] == 1
+        assert top4["transfers_out"][14] == 1 and top4["transfers_out"][15] == 2
+        assert top4["transfers_in"][1] == 0
+        assert top4["captain_switches"] == 2
+        assert top4["captain_in"][20] == 1 and top4["captain_in"][2] == 1 and top4["captain_out"][1] == 2
+        assert top4["chips"] == {"wildcard": 1} and top4["previous_chips"] == {}
+
+    def test_no_common_entries(self):
+        a, b = GameweekSample(gw=1), GameweekSample(gw=2)
+        a.set_page(1, [1])
+        a.add_picks(1, _picks(list(range(1, 16)), captain=1))
+        b.set_page(1, [2])
+        b.add_picks(2, _picks(list(range(1, 16)), captain=1))
+        (band,) = transfer_trends(a.matrix(1), b.matrix(1), [(0, 10)])
+        assert band["size"] == 0
+        assert not band["transfers_in"].any()
+
+
+class TestTopManagerStore:
+    def test_keeps_most_recent_gameweeks(self):
+        store = TopManagerStore(max_gameweeks=2)
+        first = store.sample(1)
+        store.sample(2)
+        assert store.sample(1) is first
+        store.sample(3)
+        # GW2 was least recently used
+        assert list(store._samples) == [1, 3]
+
+    async def test_snapshot_round_trip(self, tmp_path):
+        store = TopManagerStore(directory=str(tmp_path))
+        sample = await store.get(7)
+        sample.set_page(1, [11, 12, 13], now=100.0)
+        sample.add_picks(11, _picks(list(range(1, 16)), captain=3, chip="bboost"))
+        sample.add_picks(13, _picks(list(range(16, 31)), captain=20, triple=True))
+        await store.save(sample)
+
+        restarted = TopManagerStore(directory=str(tmp_path))
+        loaded = await restarted.get(7)
+
+        assert loaded.pages == {1: [11, 12, 13]}
+        assert loaded.stale_pages(3, max_age=10, now=105.0) == []
+        assert loaded.missing_picks(3) == [12]
+        expected, actual = sample.matrix(3), loaded.matrix(3)
+        np.testing.assert_array_equal(actual.elements, expected.elements)
+        np.testing.assert_array_equal(actual.multipliers, expected.multipliers)
+        np.testing.assert_array_equal(actual.captains, expected.captains)
+        assert [actual.chip_names[c] for c in actual.chips] == [expected.chip_names[c] for c in expected.chips]
+
+    async def test_unreadable_snapshot_starts_empty(self, tmp_path):
+        (tmp_path / "gw_7_standings.parquet").write_bytes(b"not parquet")
+        (tmp_path / "gw_7_picks.parquet").write_bytes(b"not parquet")
+        sample = await TopManagerStore(directory=str(tmp_path)).get(7)
+        assert sample.picks_count == 0
+
+
+class TestRateLimiter:
+    async def test_spaces_concurrent_callers(self):
+        limiter = RateLimiter(rate=100)
+        started = time.monotonic()
+        await asyncio.gather(*(limiter.acquire() for _ in range(11)))
+        assert time.monotonic() - started >= 0.09
+
+
+class TestCollectSample:
+    async def test_picks_start_before_last_page_arrives(self):
+        sample = GameweekSample(gw=1)
+        last_page = asyncio.Event()
+        picks_before_last_page = []
+
+        async def fetch_page(page: int) -> list[int]:
+            if page == 2:
+                await asyncio.sleep(0.05)
+                last_page.set()
+            return [(page - 1) * 50 + i for i in range(1, 51)]
+
+        async def fetch_picks(entry: int) -> dict:
+            if not last_page.is_set():
+                picks_before_last_page.append(entry)
+            return {"picks": [], "active_chip": None}
+
+        stats = await collect_sample(sample, 80, fetch_page, fetch_picks, max_page_age=60, limiter=RateLimiter(10_000))
+
+        assert stats == {"pages": 2, "picks": 80, "failed": 0}
+        assert picks_before_last_page
+        assert sample.picks_count == 80
+        assert sample.missing_picks(80) == []
+
+    async def test_reuses_fresh_pages_and_stored_picks(self):
+        sample = GameweekSample(gw=1)
+        sample.set_page(1, list(range(1, 51)))
+        for entry in range(1, 41):
+            sample.add_picks(entry, {"picks": [], "active_chip": None})
+        fetched, arrived = [], []
+
+        async def fetch_page(page: int) -> list[int]:
+            raise AssertionError("fresh page re-read")
+
+        async def fetch_picks(entry: int) -> dict | None:
+            fetched.append(entry)
+            return None if entry == 50 else {"picks": [], "active_chip": None}
+
+        stats = await collect_sample(
+            sample,
+            50,
+            fetch_page,
+            fetch_picks,
+            max_page_age=60,
+            limiter=RateLimiter(10_000),
+            on_picks=lambda entry, picks: arrived.append(entry),
+        )
+
+        assert sorted(fetched) == list(range(41, 51))
+        assert sorted(arrived) == list(range(41, 50))
+        assert stats["failed"] == 1
+        assert sample.missing_picks(50) == [50]
+
+    async def test_failing_fetcher_does_not_hang(self):
+        sample = GameweekSample(gw=1)
+
+        async def fetch_page(page: int) -> list[int]:
+            # More entries than the queue holds, so the producer would block on put
+            return [(page - 1) * 50 + i for i in range(1, 51)]
+
+        async def fetch_picks(entry: int) -> dict:
+            raise ValueError("not JSON")
+
+        with pytest.raises(ValueError):
+            await asyncio.wait_for(
+                collect_sample(sample, 2000, fetch_page, fetch_picks, max_page_age=60, limiter=RateLimiter(10_000)),
+                timeout=5,
+            )
+
+    async def test_collect_picks_skips_stored_entries(self):
+        sample = GameweekSample(gw=1)
+        sample.add_picks(1, {"picks": [], "active_chip": None})
+        fetched = []
+
+        async def fetch_picks(entry: int) -> dict:
+            fetched.append(entry)
+            return {"picks": [], "active_chip": None}
+
+        stats = await collect_picks(sample, [1, 2, 3, 2], fetch_picks, limiter=RateLimiter(10_000))
+
+        assert sorted(fetched) == [2, 3]
+        assert stats["picks"] == 2 and sample.pages == {}
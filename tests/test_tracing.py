@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import httpx
+from backend.tracing import UPSTREAM_TRACE_HOOKS, current_trace, span, start_trace, trace_methods
+
+
+@trace_methods("_load")
+class Service:
+    async def get_squad(self):
+        await asyncio.gather(self.get_entry(), self.get_entry())
+        return await self._load()
+
+    async def get_entry(self):
+        await asyncio.sleep(0.01)
+
+    async def _load(self):
+        return "loaded"
+
+    async def _untraced(self):
+        return None
+
+    def sync_helper(self):
+        return 1
+
+
+class TestTraceMethods:
+    async def test_records_nested_spans(self):
+        with start_trace() as trace:
+            assert await Service().get_squad() == "loaded"
+            await Service()._untraced()
+
+        names = [s.name for s in trace.spans]
+        assert names == ["Service.get_squad", "Service.get_entry", "Service.get_entry", "Service._load"]
+        assert all(s.parent == 0 for s in trace.spans[1:])
+        assert trace.spans[0].duration >= trace.spans[1].duration >= 0.01
+
+    async def test_no_trace_outside_requests(self):
+        assert current_trace() is None
+        assert await Service().get_squad() == "loaded"
+        assert Service().sync_helper() == 1
+
+
+class TestServerTiming:
+    def test_aggregates_by_name(self):
+        with start_trace() as trace:
+            for _ in range(3):
+                with span("FPLService.get_entry"):
+                    pass
+        header = trace.server_timing()
+        assert header.startswith("total;dur=")
+        assert "FPLService_get_entry_0;dur=" in header
+        assert 'desc="FPLService.get_entry x3"' in header
+
+    def test_json_dump(self):
+        with start_trace() as trace, span("outer"), span("inner"):
+            pass
+        data = json.loads(trace.to_json())
+        assert [s["parent"] for s in data["spans"]] == [None, 0]
+
+
+async def test_upstream_requests_become_spans():
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200)), event_hooks=UPSTREAM_TRACE_HOOKS
+    ) as client:
+        with start_trace() as trace, span("FPLService.get_entry"):
+            await client.get("https://fantasy.premierleague.com/api/entry/42/")
+
+    assert trace.spans[1].name == "GET fantasy.premierleague.com/api/entry/{id}/"
+    assert trace.spans[1].parent == 0
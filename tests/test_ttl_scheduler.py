@@ -0,0 +1,66 @@
+from datetime import UTC, datetime
+
+from backend.ttl_scheduler import (
+    DEADLINE_WINDOW,
+    MATCH_WINDOW,
+    MIN_TTL,
+    PHASE_DEADLINE,
+    PHASE_IDLE,
+    PHASE_LIVE,
+    TTL_TABLE,
+    TTLScheduler,
+)
+
+DEFAULTS = {"bootstrap": 300, "fixtures": 300, "polymarket": 600}
+DEADLINE = datetime(2025, 8, 15, 17, 30, tzinfo=UTC).timestamp()
+KICKOFF = datetime(2025, 8, 16, 14, 0, tzinfo=UTC).timestamp()
+
+
+def _scheduler() -> TTLScheduler:
+    scheduler = TTLScheduler(DEFAULTS)
+    scheduler.set_deadlines([{"id": 1, "deadline_time_epoch": DEADLINE}, {"id": 2, "deadline_time_epoch": None}])
+    scheduler.set_kickoffs(["2025-08-16T14:00:00Z", None])
+    return scheduler
+
+
+class TestPhase:
+    def test_live_during_match_window(self):
+        scheduler = _scheduler()
+        assert scheduler.phase(KICKOFF) == PHASE_LIVE
+        assert scheduler.phase(KICKOFF + MATCH_WINDOW - 1) == PHASE_LIVE
+
+    def test_idle_after_match_window(self):
+        assert _scheduler().phase(KICKOFF + MATCH_WINDOW + 1) == PHASE_IDLE
+
+    def test_deadline_window_on_both_sides(self):
+        scheduler = _scheduler()
+        assert scheduler.phase(DEADLINE - DEADLINE_WINDOW + 1) == PHASE_DEADLINE
+        assert scheduler.phase(DEADLINE + DEADLINE_WINDOW - 1) == PHASE_DEADLINE
+        assert scheduler.phase(DEADLINE - DEADLINE_WINDOW - 1) == PHASE_IDLE
+
+
+class TestTTL:
+    def test_defaults_without_schedule(self):
+        assert TTLScheduler(DEFAULTS).ttl("bootstrap") == 300
+
+    def test_live_ttl_is_aggressive(self):
+        assert _scheduler().ttl("bootstrap", now=KICKOFF + 60) == TTL_TABLE["bootstrap"][PHASE_LIVE]
+
+    def test_idle_ttl_is_long(self):
+        now = KICKOFF + MATCH_WINDOW + 60
+        assert _scheduler().ttl("bootstrap", now=now) == TTL_TABLE["bootstrap"][PHASE_IDLE]
+
+    def test_idle_ttl_capped_at_next_transition(self):
+        # Stored 10 minutes before kickoff: must expire at kickoff, not 30 minutes later
+        stored = KICKOFF - 600
+        assert _scheduler().ttl("fixtures", now=stored, since=stored) == 600
+
+    def test_ttl_never_below_minimum(self):
+        stored = KICKOFF - 1
+        assert _scheduler().ttl("fixtures", now=stored, since=stored) == MIN_TTL
+
+    def test_policy_lists_every_resource(self):
+        policy = _scheduler().policy(now=KICKOFF)
+        assert policy["phase"] == PHASE_LIVE
+        assert set(policy["ttls"]) == set(DEFAULTS)
+        assert policy["next_transition"] == KICKOFF + MATCH_WINDOW
@@ -0,0 +1,72 @@
+import asyncio
+
+from backend import warmup as warmup_module
+from backend.warmup import Warmup
+
+
+async def test_steps_run_concurrently_and_become_ready():
+    started = []
+
+    def step(name):
+        async def load():
+            started.append(name)
+            await asyncio.sleep(0.05)
+
+        return load
+
+    warmup = Warmup({"a": step("a"), "b": step("b")})
+    assert not warmup.ready
+    warmup.start()
+    await asyncio.sleep(0.01)
+    assert sorted(started) == ["a", "b"]
+    assert warmup.progress()["steps"]["a"]["status"] == "running"
+
+    await asyncio.sleep(0.08)
+    progress = warmup.progress()
+    assert warmup.ready
+    assert progress["completed"] == progress["total"] == 2
+    await warmup.stop()
+
+
+async def test_failed_step_is_retried(monkeypatch):
+    monkeypatch.setattr(warmup_module, "WARMUP_RETRY_DELAY", 0.01)
+    attempts = 0
+
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise RuntimeError("upstream down")
+
+    warmup = Warmup({"flaky": flaky})
+    warmup.start()
+    await asyncio.sleep(0.1)
+
+    state = warmup.progress()["steps"]["flaky"]
+    assert warmup.ready
+    assert state["attempts"] == 3
+    assert state["error"] is None
+    await warmup.stop()
+
+
+async def test_optional_step_does_not_block_readiness():
+    async def fast():
+        pass
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    warmup = Warmup({"data": fast, "model": slow}, required={"data"})
+    warmup.start()
+    await asyncio.sleep(0.01)
+
+    progress = warmup.progress()
+    assert progress["ready"]
+    assert progress["steps"]["model"] == {
+        "status": "running",
+        "attempts": 1,
+        "duration": None,
+        "error": None,
+        "required": False,
+    }
+    await warmup.stop()